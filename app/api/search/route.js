@@ -0,0 +1,38 @@
+/**
+ * API route for full-text search over Qur'an ayat and hadith
+ * Proxies `?q=&type=&limit=` to the backend /search endpoint
+ */
+
+export async function GET(request) {
+  try {
+    const { searchParams } = new URL(request.url);
+
+    // Same resolution order as the chat route
+    const backendUrl =
+      process.env.NEXT_PUBLIC_BACKEND_URL ||
+      process.env.BACKEND_URL ||
+      'http://localhost:8000';
+
+    const response = await fetch(`${backendUrl}/search?${searchParams.toString()}`);
+
+    if (!response.ok) {
+      let errorMessage = 'An error occurred while searching';
+      try {
+        const errorData = await response.json();
+        const detail = errorData?.detail;
+        errorMessage = (typeof detail === 'string' ? detail : detail?.[0]?.msg) || errorData?.error || errorMessage;
+      } catch (_) {
+        // Keep the default message for non-JSON error bodies
+      }
+      return Response.json({ error: errorMessage }, { status: response.status });
+    }
+
+    return Response.json(await response.json());
+  } catch (error) {
+    console.error('Error in search API route:', error);
+    return Response.json(
+      { error: 'Unable to reach the backend service. Is the FastAPI server running?' },
+      { status: 500 }
+    );
+  }
+}
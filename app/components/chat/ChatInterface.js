@@ -3,13 +3,16 @@
 /**
  * ChatInterface component
  * Main component for the chat functionality with streaming support and enhanced UI
+ *
+ * @param {Object} [props.filters] Optional retrieval scope forwarded to the
+ *   backend, e.g. { type: "hadith" } or { source: ["fiqh-of-the-family.json"] }
  */
 import { useState, useRef, useEffect, useCallback } from "react";
 import ChatMessages from "./ChatMessages";
 import ChatInput from "./ChatInput";
 import ChatStatus from "./ChatStatus";
 
-export default function ChatInterface() {
+export default function ChatInterface({ filters } = {}) {
   // State for chat messages
   const [messages, setMessages] = useState([
     {
@@ -142,7 +145,7 @@ export default function ChatInterface() {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ query: message }),
+        body: JSON.stringify(filters ? { query: message, filters } : { query: message }),
         signal: abortControllerRef.current.signal
       });
       
@@ -185,7 +188,7 @@ export default function ChatInterface() {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ query: message }),
+        body: JSON.stringify(filters ? { query: message, filters } : { query: message }),
         signal: controller.signal
       });
       
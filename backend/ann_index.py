@@ -0,0 +1,275 @@
+"""Approximate nearest-neighbour search for the local vector index.
+
+Brute-force scoring (`backend.vector_index.LocalVectorIndex`) touches every
+row per query, which is fine for the JSON fatawa corpus but not once the
+Qur'an and the full hadith collections are chunked in.  This module adds an
+inverted-file (IVF) index in pure NumPy:
+
+* the corpus is clustered with spherical k-means into ``n_lists`` centroids;
+* each row is assigned to its nearest centroid, giving one posting list per
+  centroid;
+* a query scores the centroids, then only the rows in the ``n_probe`` best
+  lists.
+
+``n_lists`` trades build time and list size, ``n_probe`` trades recall for
+latency at query time (``n_probe == n_lists`` is exact search).  The IVF
+structure is stored next to the base index as ``ivf.npz``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.vector_index import LocalVectorIndex, normalize_rows, top_k
+
+logger = logging.getLogger(__name__)
+
+IVF_FILE = "ivf.npz"
+
+# Rows scored per matmul while assigning vectors to centroids.
+_ASSIGN_BLOCK_ROWS = 8192
+
+
+def _as_float32(block: np.ndarray) -> np.ndarray:
+    return block if block.dtype == np.float32 else block.astype(np.float32)
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row of *vectors*."""
+    labels = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], _ASSIGN_BLOCK_ROWS):
+        block = _as_float32(vectors[start:start + _ASSIGN_BLOCK_ROWS])
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    sample_size: int = 100_000,
+    seed: int = 0,
+) -> np.ndarray:
+    """Train unit-norm centroids on (a sample of) normalised *vectors*."""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    n_clusters = max(1, min(n_clusters, n))
+
+    sample_idx = rng.choice(n, size=min(n, max(sample_size, n_clusters)), replace=False)
+    sample = _as_float32(np.asarray(vectors[np.sort(sample_idx)]))
+    centroids = sample[rng.choice(len(sample), size=n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_clusters)
+
+        # Re-seed empty clusters from random sample points so every list is used.
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+class IVFIndex(LocalVectorIndex):
+    """Inverted-file index over the rows of a `LocalVectorIndex`."""
+
+    def __init__(
+        self,
+        base: LocalVectorIndex,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        n_probe: int = 8,
+    ):
+        """Attach IVF lists to *base*.
+
+        Args:
+            base: Index whose rows are being searched
+            centroids: (n_lists, dim) unit-norm centroids
+            order: Row ids grouped by list
+            offsets: ``order[offsets[i]:offsets[i + 1]]`` are the rows of list ``i``
+            n_probe: Number of lists scanned per query
+        """
+        super().__init__(base.vectors, base.ids, base.texts, base.metadata, model=base.model)
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    # ------------------------------------------------------------------
+    # Construction & persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        base: LocalVectorIndex,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        n_iter: int = 20,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Cluster *base* into ``n_lists`` lists (default ``4 * sqrt(n)``)."""
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(len(base))))
+
+        started = time.perf_counter()
+        centroids = spherical_kmeans(base.vectors, n_lists, n_iter=n_iter, seed=seed)
+        labels = assign(base.vectors, centroids)
+
+        order = np.argsort(labels, kind="stable").astype(np.int64)
+        counts = np.bincount(labels, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        logger.info(
+            f"Built IVF index: {len(base)} rows into {len(centroids)} lists "
+            f"(max list {counts.max()}) in {time.perf_counter() - started:.1f}s"
+        )
+        return cls(base, centroids, order, offsets, n_probe=n_probe)
+
+    def save_lists(self, path: Path) -> None:
+        """Write only the IVF structure next to an existing base index."""
+        path = Path(path)
+        np.savez(path / IVF_FILE, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        logger.info(f"Saved IVF structure ({self.n_lists} lists) to {path / IVF_FILE}")
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True, n_probe: int = 8) -> "IVFIndex":
+        path = Path(path)
+        base = LocalVectorIndex.load(path, mmap=mmap)
+        with np.load(path / IVF_FILE) as data:
+            centroids, order, offsets = data["centroids"], data["order"], data["offsets"]
+        if len(order) != len(base):
+            raise ValueError(f"{path / IVF_FILE} covers {len(order)} rows but the index has {len(base)}")
+        return cls(base, centroids, order, offsets, n_probe=n_probe)
+
+    # ------------------------------------------------------------------
+    # Query path
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 5,
+        n_probe: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Approximate top-*k* by scanning the ``n_probe`` closest lists.
+
+        With *rows* (a metadata pre-filter) only those rows are candidates.
+        A filter matching fewer rows than the probed lists would hold is
+        scanned exactly instead, which is both faster and exact.
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        if rows is not None and len(rows) <= len(self) * n_probe / self.n_lists:
+            return LocalVectorIndex.search(self, query, k, rows=rows)
+
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        probes = top_k(self.centroids @ q, n_probe)
+        candidates = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        if len(candidates) == 0:
+            return []
+
+        # Sorted row ids keep reads from the memory-mapped matrix sequential.
+        candidates.sort()
+        scores = _as_float32(self.vectors[candidates]) @ q
+        np.clip(scores, -1.0, 1.0, out=scores)
+        return [(int(candidates[i]), float(scores[i])) for i in top_k(scores, k)]
+
+    def exact_search(
+        self,
+        query: Sequence[float],
+        k: int = 5,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Brute-force search over every (matching) row, the recall reference."""
+        return LocalVectorIndex.search(self, query, k, rows=rows)
+
+
+def open_local_index(
+    path: Path,
+    n_probe: int = 8,
+    quantization: str = "none",
+    rescore: int = 100,
+    shards: int = 1,
+) -> LocalVectorIndex:
+    """Load the index at *path* with the fastest structure that is available.
+
+    Quantized first-pass search is used when *quantization* names a mode
+    whose codes have been built (see `backend.quantized_index`), otherwise
+    IVF search when ``ivf.npz`` exists, otherwise exact search -- split over
+    *shards* threads when more than one (see `backend.sharded_index`).
+    """
+    path = Path(path)
+    if quantization != "none":
+        from backend.quantized_index import QuantizedIndex, quantized_file
+
+        if (path / quantized_file(quantization)).exists():
+            try:
+                return QuantizedIndex.load(path, quantization, rescore=rescore)
+            except ValueError as e:
+                logger.warning(f"Ignoring stale {quantization} codes: {e}")
+        else:
+            logger.warning(f"No {quantization} codes in {path}; run build_quantized_index.py")
+    if (path / IVF_FILE).exists():
+        try:
+            return IVFIndex.load(path, n_probe=n_probe)
+        except ValueError as e:
+            logger.warning(f"Ignoring stale IVF structure, using exact search: {e}")
+    base = LocalVectorIndex.load(path)
+    if shards > 1:
+        from backend.sharded_index import ShardedIndex
+
+        return ShardedIndex(base, shards)
+    return base
+
+
+def recall_report(
+    index: IVFIndex,
+    queries: np.ndarray,
+    k: int = 5,
+    n_probes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+) -> List[Dict[str, Union[int, float]]]:
+    """Recall@k and mean latency of IVF search vs exact search per ``n_probe``."""
+    truth = [{row for row, _ in index.exact_search(q, k)} for q in queries]
+
+    started = time.perf_counter()
+    for q in queries:
+        index.exact_search(q, k)
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    report = []
+    for n_probe in n_probes:
+        if n_probe > index.n_lists:
+            continue
+        hits = 0
+        started = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            hits += len(expected & {row for row, _ in index.search(q, k, n_probe=n_probe)})
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        report.append({
+            "n_probe": n_probe,
+            f"recall@{k}": hits / (len(queries) * k),
+            "ms_per_query": elapsed_ms,
+            "exact_ms_per_query": exact_ms,
+        })
+    return report
+
+
+def format_report(report: List[Dict[str, Union[int, float]]]) -> str:
+    """Render `recall_report` output as a JSON block for logs."""
+    return json.dumps(report, indent=2)
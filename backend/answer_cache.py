@@ -0,0 +1,232 @@
+"""Semantic cache of final `/chat` answers.
+
+Paraphrases of the same question ("can I pray with shoes on" / "is praying
+in shoes allowed") each used to cost a full `chat()` completion.  After
+retrieval, the query embedding is compared with the embeddings of recently
+answered questions; when one is at least `threshold` cosine-similar *and*
+retrieval returned the same set of context ids, the cached `ChatResponse` is
+returned instead of calling the LLM.  Requiring the same context keeps the
+answer grounded in exactly the chunks the new query would have seen.
+
+Embeddings live in one preallocated matrix so a lookup is a single
+matrix-vector product over at most ``max_entries`` rows.  Entries expire
+after ``ttl_seconds``, the least recently used entry is evicted when the
+cache is full, and everything is dropped when the retrieval engine reports a
+new index version (re-ingestion may change what the right answer is).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+
+import numpy as np
+
+from backend.models import ChatResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    context_ids: FrozenSet[str]
+    response: ChatResponse
+    stored_at: float
+
+
+class SemanticAnswerCache:
+    """Bounded, TTL-limited answer cache keyed on query-embedding similarity."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 60 * 60,
+        threshold: float = 0.95,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached answers (0 disables the cache)
+            ttl_seconds: Lifetime of a cached answer
+            threshold: Minimum cosine similarity between query embeddings
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.index_version: Optional[str] = None
+
+        # slot -> entry in LRU order; row ``slot`` of the matrix holds the
+        # unit-norm query embedding.  The matrix is allocated on first use
+        # because the embedding dimension is not known before then.
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+        self._free: List[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.context_mismatches = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(
+        self,
+        embedding: Sequence[float],
+        context_ids: Sequence[str],
+        index_version: str,
+    ) -> Optional[ChatResponse]:
+        """Return a cached answer for a paraphrase of this query, if any."""
+        if not self.enabled:
+            return None
+        self._check_version(index_version)
+
+        q = self._unit(embedding)
+        if self._matrix is None or q is None or q.shape[0] != self._matrix.shape[1] or not self._entries:
+            self.misses += 1
+            return None
+
+        scores = self._matrix @ q
+        scores[~self._live] = -np.inf
+        candidates = np.flatnonzero(scores >= self.threshold)
+
+        now = time.time()
+        wanted = frozenset(context_ids)
+        for slot in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            slot = int(slot)
+            entry = self._entries[slot]
+            if now - entry.stored_at > self.ttl_seconds:
+                self._drop(slot)
+                self.expirations += 1
+                continue
+            if entry.context_ids != wanted:
+                self.context_mismatches += 1
+                continue
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            logger.info(f"Semantic answer cache hit (similarity {scores[slot]:.3f})")
+            return entry.response
+
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        embedding: Sequence[float],
+        context_ids: Sequence[str],
+        response: ChatResponse,
+        index_version: str,
+    ) -> None:
+        """Remember *response* for queries similar to *embedding*."""
+        if not self.enabled:
+            return
+        self._check_version(index_version)
+
+        q = self._unit(embedding)
+        if q is None:
+            return
+        if self._matrix is None or q.shape[0] != self._matrix.shape[1]:
+            # First entry, or the embedding model changed under us.
+            self._allocate(q.shape[0])
+
+        if not self._free:
+            oldest, _ = self._entries.popitem(last=False)
+            self._live[oldest] = False
+            self._free.append(oldest)
+            self.evictions += 1
+
+        slot = self._free.pop()
+        self._matrix[slot] = q
+        self._live[slot] = True
+        self._entries[slot] = _Entry(frozenset(context_ids), response, time.time())
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        self._entries.clear()
+        if self._live is not None:
+            self._live[:] = False
+            self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss and eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "context_mismatches": self.context_mismatches,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "index_version": self.index_version,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _check_version(self, index_version: str) -> None:
+        if index_version == self.index_version:
+            return
+        if self._entries:
+            logger.info(
+                f"Index version changed ({self.index_version} -> {index_version}); "
+                f"dropping {len(self._entries)} cached answers"
+            )
+            self.invalidations += 1
+        self.clear()
+        self.index_version = index_version
+
+    def _allocate(self, dim: int) -> None:
+        self._entries.clear()
+        self._matrix = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._live = np.zeros(self.max_entries, dtype=bool)
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def _drop(self, slot: int) -> None:
+        del self._entries[slot]
+        self._live[slot] = False
+        self._free.append(slot)
+
+    @staticmethod
+    def _unit(embedding: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if embedding is None:
+            return None
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        return q / norm if norm else None
+
+
+# Global answer cache instance
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the global answer cache from settings."""
+    global _answer_cache
+    if _answer_cache is None:
+        from backend.config import get_settings
+
+        settings = get_settings()
+        _answer_cache = SemanticAnswerCache(
+            max_entries=settings.ANSWER_CACHE_SIZE,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+        )
+        logger.info(f"Initialized semantic answer cache (threshold {settings.ANSWER_CACHE_THRESHOLD})")
+    return _answer_cache
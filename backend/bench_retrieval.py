@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Retrieval benchmarks.  Runs in-process against simulated backends, so no
+OpenAI or Pinecone keys are needed.
+
+    python backend/bench_retrieval.py stream
+        Token gaps of one /chat/stream response while N concurrent /chat
+        requests run retrieval, with blocking calls on the event loop
+        ("inline", the old behaviour) vs on the retrieval pool.
+
+    python backend/bench_retrieval.py batch
+        Throughput of N queries through retrieve_context (sequentially and
+        concurrently) vs retrieve_context_batch, which embeds them in one
+        request.
+
+    python backend/bench_retrieval.py shards
+        p50/p99 exact search latency of a synthetic local index split into
+        1, 2, 4, ... shards searched on a thread pool.
+"""
+
+import argparse
+import logging
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-not-used")
+os.environ.setdefault("MODERATION_ENABLED", "false")
+
+import httpx
+import numpy as np
+
+from backend import main as api
+from backend import retrieval
+from backend.embedding_cache import CachedEmbeddings, EmbeddingCache
+from backend.sharded_index import ShardedIndex
+from backend.vector_index import LocalVectorIndex
+
+logging.disable(logging.INFO)
+from backend.retrieval import RetrievalEngine
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def _simulated_engine(latency: float, inline: bool) -> RetrievalEngine:
+    """Engine whose vector search is a blocking sleep, like a network call."""
+    engine = RetrievalEngine()
+    engine.backend = "local"
+    engine._ready = True
+
+    class Embeddings:
+        def embed_query(self, text):
+            return [1.0, 0.0]
+
+    def vector_hits(embedding, k, filters=None):
+        time.sleep(latency)
+        return [(f"doc:{i}", f"context {i}", 0.9 - i * 0.01, 3) for i in range(k)]
+
+    engine._embeddings = Embeddings()
+    engine._vector_hits = vector_hits
+
+    if inline:
+        async def run_inline(fn, *args):
+            return fn(*args)
+        engine._run = run_inline
+
+    return engine
+
+
+class _SimulatedEmbeddings:
+    """Embedding model whose every API request costs a fixed round-trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.model = "simulated"
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        self.requests += 1
+        time.sleep(self.latency)
+        return [[1.0, float(len(t))] for t in texts]
+
+
+# ---------------------------------------------------------------------------
+# stream: SSE token latency under concurrent /chat load
+# ---------------------------------------------------------------------------
+
+async def _stream_scenario(concurrency: int, inline: bool, args) -> Dict[str, float]:
+    engine = _simulated_engine(args.latency, inline)
+    api.get_retrieval_engine = lambda: engine
+
+    gaps: List[float] = []
+
+    async def fake_chat(context, query, *a, **kw):
+        return "An answer citing [[Q 2:255]].", 0.9
+
+    async def fake_chat_stream(context, query):
+        last = time.perf_counter()
+        for _ in range(args.tokens):
+            await asyncio.sleep(args.token_interval)
+            now = time.perf_counter()
+            gaps.append(now - last - args.token_interval)
+            last = now
+            yield "token "
+
+    api.chat = fake_chat
+    api.chat_stream = fake_chat_stream
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stream_done = asyncio.Event()
+
+        async def background_chat():
+            while not stream_done.is_set():
+                await client.post("/chat", json={"query": "how to pray witr"})
+                # In-process transport never yields on socket I/O; a real
+                # client would, so give other tasks a turn between requests.
+                await asyncio.sleep(0)
+
+        workers = [asyncio.create_task(background_chat()) for _ in range(concurrency)]
+        await asyncio.sleep(args.latency)  # let the load ramp up
+        await client.post("/chat/stream", json={"query": "is music haram"})
+        stream_done.set()
+        await asyncio.gather(*workers)
+
+    return _percentiles(gaps)
+
+
+def bench_stream(args) -> None:
+    print(f"Extra delay between stream tokens (simulated retrieval {args.latency * 1000:.0f} ms)")
+    print(f"{'mode':<8} {'concurrent /chat':>16} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for inline in (True, False):
+        mode = "inline" if inline else "pool"
+        for concurrency in args.concurrency:
+            stats = asyncio.run(_stream_scenario(concurrency, inline, args))
+            print(f"{mode:<8} {concurrency:>16} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+
+# ---------------------------------------------------------------------------
+# batch: retrieve_context vs retrieve_context_batch throughput
+# ---------------------------------------------------------------------------
+
+async def _batch_scenario(mode: str, args) -> Dict[str, float]:
+    engine = _simulated_engine(args.latency, inline=False)
+    model = _SimulatedEmbeddings(args.embed_latency)
+    # Size 0 disables the cache so every query costs an embedding
+    engine._embeddings = CachedEmbeddings(model, EmbeddingCache(max_entries=0))
+    retrieval._retrieval_engine = engine
+
+    queries = [f"question {i}" for i in range(args.queries)]
+    started = time.perf_counter()
+    if mode == "sequential":
+        for query in queries:
+            await retrieval.retrieve_context(query)
+    elif mode == "concurrent":
+        await asyncio.gather(*(retrieval.retrieve_context(query) for query in queries))
+    else:
+        await retrieval.retrieve_context_batch(queries)
+    elapsed = time.perf_counter() - started
+    await engine.stop()
+
+    return {"seconds": elapsed, "qps": len(queries) / elapsed, "embedding_requests": model.requests}
+
+
+def bench_batch(args) -> None:
+    print(
+        f"{args.queries} queries, simulated embedding round-trip {args.embed_latency * 1000:.0f} ms, "
+        f"vector search {args.latency * 1000:.0f} ms"
+    )
+    print(f"{'mode':<12} {'seconds':>9} {'queries/s':>10} {'embed calls':>12}")
+    for mode in ("sequential", "concurrent", "batch"):
+        stats = asyncio.run(_batch_scenario(mode, args))
+        print(f"{mode:<12} {stats['seconds']:>9.2f} {stats['qps']:>10.1f} {stats['embedding_requests']:>12}")
+
+
+# ---------------------------------------------------------------------------
+# shards: exact search latency vs shard count
+# ---------------------------------------------------------------------------
+
+def bench_shards(args) -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.rows, args.dim)).astype(np.float32)
+    base = LocalVectorIndex.from_embeddings(
+        vectors, [str(i) for i in range(args.rows)], [""] * args.rows, dtype=args.dtype
+    )
+    del vectors
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    print(
+        f"{args.rows} x {args.dim} {args.dtype} vectors, {args.queries} sequential queries, "
+        f"k={args.k}, {os.cpu_count()} CPUs"
+    )
+    print(f"{'shards':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    def top_rows(index):
+        return [[row for row, _ in index.search(q, args.k)] for q in queries[:5]]
+
+    expected = top_rows(base)
+    for n_shards in args.shards:
+        index = base if n_shards == 1 else ShardedIndex(base, n_shards)
+        assert top_rows(index) == expected
+        for q in queries[:5]:  # warm up the pool
+            index.search(q, args.k)
+
+        samples = []
+        for q in queries:
+            started = time.perf_counter()
+            index.search(q, args.k)
+            samples.append(time.perf_counter() - started)
+        if isinstance(index, ShardedIndex):
+            index.close()
+
+        stats = _percentiles(samples)
+        print(f"{n_shards:>6} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stream = sub.add_parser("stream", help="SSE token latency under concurrent /chat load")
+    stream.add_argument("--concurrency", type=int, nargs="+", default=[0, 4, 16, 32])
+    stream.add_argument("--latency", type=float, default=0.05,
+                        help="Simulated blocking retrieval latency in seconds")
+    stream.add_argument("--tokens", type=int, default=40)
+    stream.add_argument("--token-interval", type=float, default=0.01)
+    stream.set_defaults(func=bench_stream)
+
+    batch = sub.add_parser("batch", help="Batch vs single-query retrieval throughput")
+    batch.add_argument("--queries", type=int, default=200)
+    batch.add_argument("--embed-latency", type=float, default=0.1,
+                       help="Simulated embedding API round-trip in seconds")
+    batch.add_argument("--latency", type=float, default=0.005,
+                       help="Simulated vector search latency in seconds")
+    batch.set_defaults(func=bench_batch)
+
+    shards = sub.add_parser("shards", help="Local exact search latency vs shard count")
+    shards.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    shards.add_argument("--rows", type=int, default=200_000)
+    shards.add_argument("--dim", type=int, default=1536)
+    shards.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    shards.add_argument("--queries", type=int, default=200)
+    shards.add_argument("-k", type=int, default=5)
+    shards.set_defaults(func=bench_shards)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
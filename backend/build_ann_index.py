@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script to build the approximate nearest-neighbour (IVF) structure for an
+existing local index (see build_local_index.py) and report recall@k against
+exact search.  No embeddings are recomputed.
+"""
+
+import argparse
+import os
+import sys
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ann_index import IVFIndex, format_report, recall_report
+from backend.config import get_settings
+from backend.vector_index import LocalVectorIndex
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def sample_queries(index: LocalVectorIndex, count: int, noise: float, seed: int = 0) -> np.ndarray:
+    """Perturbed copies of random corpus rows, standing in for real queries."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), size=min(count, len(index)), replace=False)
+    queries = np.asarray(index.vectors[np.sort(rows)], dtype=np.float32)
+    return queries + rng.normal(scale=noise, size=queries.shape).astype(np.float32)
+
+
+def main():
+    """Build the IVF lists and print the recall/latency report."""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index", type=Path, default=Path(settings.LOCAL_INDEX_PATH),
+                        help="Local index directory to add the IVF structure to")
+    parser.add_argument("--lists", type=int, default=None,
+                        help="Number of k-means lists (default 4 * sqrt(n))")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="k-means iterations")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Sample queries for the recall report (0 skips it)")
+    parser.add_argument("--noise", type=float, default=0.02,
+                        help="Gaussian noise added to sampled query vectors")
+    parser.add_argument("-k", type=int, default=5,
+                        help="k for recall@k")
+    args = parser.parse_args()
+
+    base = LocalVectorIndex.load(args.index)
+    ivf = IVFIndex.build(base, n_lists=args.lists, n_iter=args.iterations,
+                         n_probe=settings.LOCAL_INDEX_NPROBE)
+    ivf.save_lists(args.index)
+
+    if args.queries > 0:
+        queries = sample_queries(base, args.queries, args.noise)
+        report = recall_report(ivf, queries, k=args.k)
+        logger.info(f"Recall@{args.k} vs exact search ({len(queries)} queries):\n{format_report(report)}")
+
+
+if __name__ == "__main__":
+    main()
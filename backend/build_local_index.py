@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Script to build the local NumPy vector index from the content/ JSON files.
+Uses the same document processing as ingest_content.py so the local backend
+and Pinecone serve the same corpus.
+"""
+
+import argparse
+import os
+import sys
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backend.ann_index import IVF_FILE
+from backend.config import get_settings
+from backend.corpus_artifact import CorpusArtifact
+from backend.documents import document_id
+from backend.embedding_store import stored_embeddings
+from backend.chunking import ParentStore
+from backend.ingest_content import (
+    build_lexical_index,
+    get_content_files,
+    iter_artifact_corpus,
+    load_corpus_artifact,
+    parse_content,
+)
+from backend.quantized_index import QUANTIZATION_MODES, quantized_file
+from backend.related_index import RELATED_FILE
+from backend.vector_index import LocalVectorIndex
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def embed_texts(
+    texts: List[str], batch_size: int, artifact: Optional[CorpusArtifact] = None
+) -> Tuple[List[List[float]], str]:
+    """Embed *texts* with the OpenAI model used at query time; returns (vectors, model).
+
+    Vectors compiled into *artifact* (whose documents *texts* are) are used
+    as-is, and texts already in the embedding store are read from disk, so
+    rebuilding an index over unchanged content makes no API calls.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    settings = get_settings()
+    embeddings = stored_embeddings(OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY))
+
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    compiled = artifact.embeddings() if artifact is not None and artifact.embedding_model == embeddings.model else None
+    if compiled is not None and len(compiled[0]) == len(texts):
+        matrix, present = compiled
+        for row in np.flatnonzero(present):
+            vectors[row] = matrix[row].tolist()
+        logger.info(f"{int(present.sum())}/{len(texts)} embeddings from the corpus artifact")
+
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    for start in range(0, len(missing), batch_size):
+        rows = missing[start:start + batch_size]
+        for row, vector in zip(rows, embeddings.embed_documents([texts[i] for i in rows])):
+            vectors[row] = vector
+        logger.info(f"Embedded batch {start//batch_size + 1}: {start + len(rows)}/{len(missing)} documents")
+    if hasattr(embeddings, "hits"):
+        logger.info(f"Embedding store: {embeddings.hits} reused, {embeddings.misses} embedded via the API")
+    return vectors, embeddings.model
+
+
+def main():
+    """Build and save the local index."""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, default=Path(settings.LOCAL_INDEX_PATH),
+                        help="Directory to write the index to")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="Storage precision of the vector matrix")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Documents per embeddings request")
+    args = parser.parse_args()
+
+    # Long documents are indexed as chunks; their full texts are kept for
+    # parent expansion at query time.  The compiled corpus, when current,
+    # saves parsing and may carry the embeddings too.
+    files = get_content_files()
+    artifact = load_corpus_artifact(files)
+    parents = ParentStore(Path(settings.PARENT_STORE_PATH))
+    if artifact is not None:
+        documents = list(iter_artifact_corpus(artifact, files, parents))
+    else:
+        documents = list(parse_content(files, parents))
+
+    if not documents:
+        logger.warning("No documents to index!")
+        return
+
+    build_lexical_index(documents)
+
+    logger.info(f"Embedding {len(documents)} documents for the local index")
+    texts = [doc.page_content for doc in documents]
+    vectors, model = embed_texts(texts, args.batch_size, artifact)
+
+    index = LocalVectorIndex.from_embeddings(
+        vectors,
+        ids=[document_id(doc.metadata) for doc in documents],
+        texts=texts,
+        metadata=[doc.metadata for doc in documents],
+        model=model,
+        dtype=args.dtype,
+    )
+    index.save(args.output)
+
+    # IVF lists, quantized codes and the related-items graph from a previous
+    # build refer to the old rows; drop them so the backend falls back to
+    # exact search until build_ann_index.py / build_quantized_index.py /
+    # build_related_index.py are rerun.
+    stale_files = [(IVF_FILE, "build_ann_index.py"), (RELATED_FILE, "build_related_index.py")]
+    stale_files += [(quantized_file(mode), "build_quantized_index.py") for mode in QUANTIZATION_MODES]
+    for name, script in stale_files:
+        stale = args.output / name
+        if stale.exists():
+            stale.unlink()
+            logger.warning(f"Removed stale {stale}; rerun {script} to rebuild it")
+
+    mb = index.vectors.nbytes / (1024 * 1024)
+    logger.info(f"Local index built: {len(index)} vectors, dim {index.dim}, {args.dtype}, {mb:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
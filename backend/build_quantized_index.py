@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script to build int8 and/or binary quantized codes for an existing local
+index (see build_local_index.py) and report memory per vector and recall@k
+of quantized search (with exact rescoring) against full-precision search.
+No embeddings are recomputed.  Select a mode at query time with
+LOCAL_INDEX_QUANTIZATION.
+"""
+
+import argparse
+import json
+import os
+import sys
+import logging
+from pathlib import Path
+
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.build_ann_index import sample_queries
+from backend.config import get_settings
+from backend.quantized_index import QUANTIZATION_MODES, QuantizedIndex, quantization_report
+from backend.vector_index import LocalVectorIndex
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Build the quantized codes and print the memory/recall report."""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index", type=Path, default=Path(settings.LOCAL_INDEX_PATH),
+                        help="Local index directory to add the codes to")
+    parser.add_argument("--modes", nargs="+", choices=QUANTIZATION_MODES, default=list(QUANTIZATION_MODES),
+                        help="Quantization modes to build")
+    parser.add_argument("--rescore", type=int, default=settings.LOCAL_INDEX_RESCORE,
+                        help="First-pass candidates rescored exactly per query")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Sample queries for the recall report (0 skips it)")
+    parser.add_argument("--noise", type=float, default=0.02,
+                        help="Gaussian noise added to sampled query vectors")
+    parser.add_argument("-k", type=int, default=5,
+                        help="k for recall@k")
+    args = parser.parse_args()
+
+    base = LocalVectorIndex.load(args.index)
+    indexes = [QuantizedIndex.build(base, mode, rescore=args.rescore) for mode in args.modes]
+    for index in indexes:
+        index.save_codes(args.index)
+
+    if args.queries > 0:
+        queries = sample_queries(base, args.queries, args.noise)
+        report = quantization_report(base, indexes, queries, k=args.k)
+        logger.info(
+            f"Memory and recall@{args.k} vs {base.vectors.dtype} search "
+            f"({len(queries)} queries, rescoring {args.rescore}):\n{json.dumps(report, indent=2)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to precompute the "related items" k-nearest-neighbour graph of every
+document in an existing local index (see build_local_index.py).  The graph
+is written to related.npz in the index directory and served by the
+/related endpoint.  No embeddings are recomputed.
+"""
+
+import argparse
+import os
+import sys
+import logging
+from pathlib import Path
+
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ann_index import IVF_FILE, IVFIndex
+from backend.config import get_settings
+from backend.related_index import RelatedIndex
+from backend.vector_index import LocalVectorIndex
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Build and save the related-items graph."""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index", type=Path, default=Path(settings.LOCAL_INDEX_PATH),
+                        help="Local index directory to add the graph to")
+    parser.add_argument("-k", type=int, default=10,
+                        help="Neighbours stored per document")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Query the IVF structure (build_ann_index.py) per row instead of "
+                             "exact all-pairs scoring; for large corpora")
+    args = parser.parse_args()
+
+    if args.approximate:
+        if not (args.index / IVF_FILE).exists():
+            parser.error(f"--approximate needs {args.index / IVF_FILE}; run build_ann_index.py first")
+        index = IVFIndex.load(args.index, n_probe=settings.LOCAL_INDEX_NPROBE)
+    else:
+        index = LocalVectorIndex.load(args.index)
+
+    RelatedIndex.build(index, k=args.k, approximate=args.approximate).save(args.index)
+
+
+if __name__ == "__main__":
+    main()
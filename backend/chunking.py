@@ -0,0 +1,228 @@
+"""Token-bounded chunking of long documents, with links back to the parent.
+
+Many fatwa answers run to thousands of words; embedded whole they make a
+diluted vector and an enormous context block.  `iter_chunks` splits every
+document longer than ``max_tokens`` into overlapping chunks:
+
+* text is cut at paragraph boundaries, then sentence boundaries (Latin and
+  Arabic punctuation), and only as a last resort inside a sentence;
+* consecutive chunks share up to ``overlap_tokens`` of trailing sentences so
+  an idea spanning a boundary is retrievable from either side;
+* Q&A chunks repeat the question, so every chunk embeds in context;
+* each chunk keeps its parent's metadata plus ``parent_id``,
+  ``chunk_index``, ``chunk_count`` and its own ``token_count``, and gets the
+  id ``<parent id>#<chunk index>`` (see `backend.documents.document_id`).
+
+Parent texts go to a small SQLite `ParentStore`, so retrieval can swap a
+group of sibling chunks for the whole document when that is what the query
+needs (see `RetrievalEngine._expand_parents`).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from backend.context_packer import count_tokens, split_sentences
+from backend.documents import document_id
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_WORD_RE = re.compile(r"\S+\s*")
+
+# A repeated header may take at most this share of the chunk budget.
+_MAX_HEADER_SHARE = 0.25
+
+
+def _split_oversized(sentence: str, max_tokens: int) -> List[str]:
+    """Cut a sentence longer than *max_tokens* between words."""
+    pieces: List[str] = []
+    current = ""
+    for word in _WORD_RE.findall(sentence):
+        if current and count_tokens(current + word) > max_tokens:
+            pieces.append(current.strip())
+            current = ""
+        current += word
+    if current.strip():
+        pieces.append(current.strip())
+    return pieces
+
+
+def _units(text: str, max_tokens: int) -> List[Tuple[str, str, int]]:
+    """``(joiner, text, tokens)`` units: whole paragraphs, or their sentences if too long."""
+    units: List[Tuple[str, str, int]] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            units.append(("\n\n", paragraph, tokens))
+            continue
+        joiner = "\n\n"
+        for sentence in split_sentences(paragraph):
+            for piece in _split_oversized(sentence.strip(), max_tokens):
+                units.append((joiner, piece, count_tokens(piece)))
+                joiner = " "
+    return units
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """Split *text* into chunks of at most *max_tokens* tokens.
+
+    Chunks end at paragraph or sentence boundaries where possible; each
+    chunk after the first starts with up to *overlap_tokens* tokens of
+    whole sentences from the end of the previous one.  The paragraph and
+    sentence joiners count towards the budget.
+    """
+    chunks: List[str] = []
+    current: List[Tuple[str, str, int]] = []
+    used = 0
+    fresh = 0  # units in *current* that are not overlap
+
+    def flush() -> None:
+        chunks.append("".join(joiner + body for joiner, body, _ in current).strip())
+
+    for unit in _units(text, max_tokens):
+        # Every unit is charged for its joiner, even the first of a chunk
+        # whose joiner is stripped, so the sum never undercounts the chunk
+        cost = count_tokens(unit[0]) + unit[2]
+        if current and used + cost > max_tokens:
+            flush()
+            # Carry trailing sentences as overlap, leaving room for this unit
+            carried: List[Tuple[str, str, int]] = []
+            carried_tokens = 0
+            limit = min(overlap_tokens, max_tokens - cost)
+            for joiner, body, _ in reversed(current[len(current) - fresh:]):
+                sentences = [s.strip() for s in split_sentences(body) if s.strip()]
+                for i in range(len(sentences) - 1, -1, -1):
+                    sentence_joiner = joiner if i == 0 else " "
+                    tokens = count_tokens(sentences[i])
+                    if carried_tokens + count_tokens(sentence_joiner) + tokens > limit:
+                        break
+                    carried.insert(0, (sentence_joiner, sentences[i], tokens))
+                    carried_tokens += count_tokens(sentence_joiner) + tokens
+                else:
+                    continue
+                break
+            current, used, fresh = carried, carried_tokens, 0
+        current.append(unit)
+        used += cost
+        fresh += 1
+    if current and fresh:
+        flush()
+    return chunks
+
+
+def _header(doc: Any) -> str:
+    """Text repeated at the top of every chunk of *doc* (the question of a Q&A)."""
+    question = doc.metadata.get("question")
+    if doc.metadata.get("type") == "qa" and question and doc.page_content.startswith(f"Question: {question}"):
+        return f"Question: {question}\n\n"
+    return ""
+
+
+def chunk_document(doc: Any, max_tokens: int, overlap_tokens: int = 0) -> List[Any]:
+    """*doc* itself if it fits *max_tokens*, else its chunks as documents of the same type."""
+    tokens = doc.metadata.get("token_count")
+    if tokens is None:
+        tokens = count_tokens(doc.page_content)
+    if tokens <= max_tokens:
+        return [doc]
+
+    header = _header(doc)
+    header_tokens = count_tokens(header) if header else 0
+    if header_tokens > max_tokens * _MAX_HEADER_SHARE:
+        header, header_tokens = "", 0
+    body = doc.page_content[len(header):]
+
+    pieces = split_text(body, max_tokens - header_tokens, overlap_tokens)
+    parent = document_id(doc.metadata)
+    chunks = []
+    for index, piece in enumerate(pieces):
+        text = header + piece
+        metadata = dict(
+            doc.metadata,
+            parent_id=parent,
+            chunk_index=index,
+            chunk_count=len(pieces),
+            token_count=count_tokens(text),
+        )
+        chunks.append(type(doc)(page_content=text, metadata=metadata))
+    return chunks
+
+
+def iter_chunks(
+    documents: Iterable[Any],
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    parents: Optional["ParentStore"] = None,
+) -> Iterator[Any]:
+    """Chunking stage: yield short documents as-is and long ones as chunks.
+
+    The full text of every chunked document is written to *parents*.
+    """
+    for doc in documents:
+        chunks = chunk_document(doc, max_tokens, overlap_tokens)
+        if parents is not None and len(chunks) > 1:
+            tokens = doc.metadata.get("token_count") or count_tokens(doc.page_content)
+            parents.put(document_id(doc.metadata), doc.page_content, int(tokens))
+        yield from chunks
+
+
+class ParentStore:
+    """Full text of chunked documents, keyed by parent id, in SQLite."""
+
+    def __init__(self, path: Path):
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parents ("
+            "id TEXT PRIMARY KEY, text TEXT NOT NULL, token_count INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+    def put(self, parent_id: str, text: str, token_count: int) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO parents (id, text, token_count) VALUES (?, ?, ?)",
+                (parent_id, text, token_count),
+            )
+            self._db.commit()
+
+    def get(self, parent_id: str) -> Optional[Tuple[str, int]]:
+        """``(text, token_count)`` of a parent document, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT text, token_count FROM parents WHERE id = ?", (parent_id,)).fetchone()
+        return (row[0], int(row[1])) if row is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# Global parent store instance
+_parent_store: Optional[ParentStore] = None
+
+
+def get_parent_store() -> ParentStore:
+    """Get or open the global parent store from settings."""
+    global _parent_store
+    if _parent_store is None:
+        from backend.config import get_settings
+
+        _parent_store = ParentStore(Path(get_settings().PARENT_STORE_PATH))
+    return _parent_store
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Script to compile the content/ directory into the corpus artifact
+(CORPUS_ARTIFACT_PATH, see corpus_artifact.py).  Ingestion, the local index
+build and the API's reference index load the artifact instead of parsing
+the raw JSON / XML for as long as the content files and settings match it;
+rerun this script after changing either.
+
+--embeddings adds the vectors the embedding store already holds for the
+documents (no API calls), so the local index can be built without it.
+"""
+
+import argparse
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backend.config import get_settings
+from backend.content_adapters import FileReport, ParentRows, format_reports
+from backend.corpus_artifact import CorpusArtifact, document_columns, fingerprint_file, write_artifact
+from backend.embedding_store import stored_embeddings
+from backend.ingest_content import corpus_config, get_content_files, parse_content
+from backend.references import REFERENCE_TABLES_VERSION, ReferenceIndex
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def stored_vectors(texts: List[str]) -> Optional[Tuple[str, np.ndarray, np.ndarray]]:
+    """``(model, matrix, presence mask)`` of the texts the embedding store holds, or None."""
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = stored_embeddings(OpenAIEmbeddings(openai_api_key=get_settings().OPENAI_API_KEY), read_only=True)
+    if not hasattr(embeddings, "store"):
+        logger.warning("No embedding store configured (EMBEDDING_STORE_PATH); compiling without embeddings")
+        return None
+    found = embeddings.store.get_many(texts)
+    present = np.array([vector is not None for vector in found], dtype=np.uint8)
+    if not present.any():
+        logger.warning(f"The embedding store holds none of the {len(texts)} documents; compiling without embeddings")
+        return None
+    matrix = np.zeros((len(texts), embeddings.store.dim), dtype=np.float32)
+    for row in np.flatnonzero(present):
+        matrix[row] = found[row]
+    logger.info(f"Embeddings for {int(present.sum())}/{len(texts)} documents from the embedding store")
+    return embeddings.model, matrix, present
+
+
+def main():
+    """Compile and save the corpus artifact."""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, default=Path(settings.CORPUS_ARTIFACT_PATH),
+                        help="File to write the artifact to")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="Include the embeddings the embedding store holds for the documents")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    files = get_content_files()
+    if not files:
+        logger.warning("No files found to compile!")
+        return
+
+    parents = ParentRows()
+    reports: List[FileReport] = []
+    documents = list(parse_content(files, parents, reports))
+    logger.info(f"Parsed {len(reports)} files:\n{format_reports(reports)}")
+    failed = [report.name for report in reports if report.failed]
+    if failed:
+        # A partial artifact would pass for current and hide the missing documents
+        logger.error(f"Not writing the corpus artifact: failed to parse {', '.join(failed)}")
+        sys.exit(1)
+
+    tables = {
+        "documents": document_columns(documents),
+        "parents": {
+            "id": [row[0] for row in parents],
+            "text": [row[1] for row in parents],
+            "token_count": [row[2] for row in parents],
+        },
+        **ReferenceIndex.build(Path(settings.CONTENT_DIR)).to_tables(),
+    }
+    embeddings = stored_vectors([doc.page_content for doc in documents]) if args.embeddings else None
+
+    write_artifact(
+        args.output,
+        tables,
+        sources={path.name: fingerprint_file(path) for path, _ in files},
+        config={**corpus_config(), "reference_tables": REFERENCE_TABLES_VERSION},
+        embeddings=embeddings,
+    )
+    compiled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    artifact = CorpusArtifact(args.output)
+    mb = args.output.stat().st_size / (1024 * 1024)
+    logger.info(
+        f"Corpus artifact {args.output}: {len(artifact)} documents, {len(parents)} parents, "
+        f"{mb:.1f} MiB, compiled in {compiled:.1f}s, opens in {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
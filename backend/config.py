@@ -25,12 +25,155 @@ class Settings(BaseSettings):
     PINECONE_ENV: str = Field("us-east1-gcp", env="PINECONE_ENV")
     PINECONE_INDEX_NAME: str = Field("islamic-kb", env="PINECONE_INDEX_NAME")
 
+    # ------------------------------------------------------------------
+    # Content
+    # ------------------------------------------------------------------
+    # Raw Qur'an / hadith / fatawa files shared by ingestion and lookups.
+    CONTENT_DIR: str = Field(str(Path(__file__).resolve().parents[1] / "content"), env="CONTENT_DIR")
+    # Content hash per ingested document id (ingest_content.py), so reruns
+    # only embed and upsert new or changed documents.
+    INGEST_MANIFEST_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "ingest_manifest.json"),
+        env="INGEST_MANIFEST_PATH",
+    )
+    # Content files are parsed and chunked in this many processes (0 uses
+    # every core; 1 parses lazily in-process with constant memory).
+    INGEST_PARSE_WORKERS: int = Field(0, ge=0, env="INGEST_PARSE_WORKERS")
+    # Besides one document per aya, quran.xml is indexed as windows of
+    # QURAN_WINDOW_AYAT consecutive ayat every QURAN_WINDOW_STRIDE ayat
+    # (a window of 1 disables the windows).
+    QURAN_WINDOW_AYAT: int = Field(3, ge=1, env="QURAN_WINDOW_AYAT")
+    QURAN_WINDOW_STRIDE: int = Field(2, ge=1, env="QURAN_WINDOW_STRIDE")
+    # Append-only log of the batches the current ingestion run committed;
+    # an interrupted run leaves it behind for --resume.
+    INGEST_JOURNAL_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "ingest_journal.jsonl"),
+        env="INGEST_JOURNAL_PATH",
+    )
+    # Ingestion keeps INGEST_EMBED_CONCURRENCY embedding requests of up to
+    # INGEST_BATCH_TOKENS tokens in flight, throttled to the account's
+    # embedding tokens-per-minute limit (0 disables throttling).
+    INGEST_EMBED_CONCURRENCY: int = Field(4, ge=1, env="INGEST_EMBED_CONCURRENCY")
+    INGEST_TOKENS_PER_MINUTE: int = Field(1_000_000, ge=0, env="INGEST_TOKENS_PER_MINUTE")
+    INGEST_BATCH_TOKENS: int = Field(20_000, ge=1, env="INGEST_BATCH_TOKENS")
+    INGEST_BATCH_DOCUMENTS: int = Field(256, ge=1, env="INGEST_BATCH_DOCUMENTS")
+    INGEST_MAX_RETRIES: int = Field(5, ge=0, env="INGEST_MAX_RETRIES")
+    # Price of the embedding model per million tokens, used by
+    # `ingest_content.py --dry-run` to estimate the cost of a (re)ingest.
+    EMBEDDING_PRICE_PER_MILLION_TOKENS: float = Field(0.10, ge=0, env="EMBEDDING_PRICE_PER_MILLION_TOKENS")
+    # Documents longer than CHUNK_MAX_TOKENS are split into chunks at
+    # paragraph/sentence boundaries, overlapping by up to CHUNK_OVERLAP_TOKENS;
+    # the full texts are kept in PARENT_STORE_PATH for parent expansion.
+    CHUNK_MAX_TOKENS: int = Field(512, ge=32, env="CHUNK_MAX_TOKENS")
+    CHUNK_OVERLAP_TOKENS: int = Field(64, ge=0, env="CHUNK_OVERLAP_TOKENS")
+    PARENT_STORE_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "parent_documents.sqlite3"),
+        env="PARENT_STORE_PATH",
+    )
+    # Parsed and chunked corpus compiled by backend/compile_corpus.py; loaded
+    # (memory-mapped) instead of parsing CONTENT_DIR while it matches the
+    # content files and settings.  Empty disables it.
+    CORPUS_ARTIFACT_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "corpus.bin"),
+        env="CORPUS_ARTIFACT_PATH",
+    )
+
+    # ------------------------------------------------------------------
+    # Retrieval engine
+    # ------------------------------------------------------------------
+    # "pinecone", "local" (in-process NumPy index built by
+    # backend/build_local_index.py) or "auto": Pinecone when a key is set,
+    # otherwise the local index when one has been built.
+    RETRIEVAL_BACKEND: str = Field("auto", env="RETRIEVAL_BACKEND")
+    LOCAL_INDEX_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "local_index"),
+        env="LOCAL_INDEX_PATH",
+    )
+    # Lists scanned per query when the local index has an IVF structure
+    # (backend/build_ann_index.py); higher is slower but closer to exact.
+    LOCAL_INDEX_NPROBE: int = Field(8, ge=1, env="LOCAL_INDEX_NPROBE")
+    # "int8" or "binary" keeps only quantized codes resident and rescores the
+    # best LOCAL_INDEX_RESCORE first-pass candidates on the memory-mapped
+    # full-precision vectors (backend/build_quantized_index.py); "none"
+    # searches the full-precision matrix directly.
+    LOCAL_INDEX_QUANTIZATION: str = Field("none", env="LOCAL_INDEX_QUANTIZATION")
+    LOCAL_INDEX_RESCORE: int = Field(100, ge=1, env="LOCAL_INDEX_RESCORE")
+    # Exact search over the local index is split into this many row shards
+    # scored in parallel on a persistent thread pool (1 disables sharding).
+    LOCAL_INDEX_SHARDS: int = Field(1, ge=1, env="LOCAL_INDEX_SHARDS")
+
+    # Hybrid retrieval: BM25 index built by the ingestion scripts, fused with
+    # the vector results by reciprocal-rank fusion when the index exists.
+    HYBRID_RETRIEVAL: bool = Field(True, env="HYBRID_RETRIEVAL")
+    LEXICAL_INDEX_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "lexical_index"),
+        env="LEXICAL_INDEX_PATH",
+    )
+    # Candidates taken from each side before fusion, and the RRF constant.
+    HYBRID_CANDIDATES: int = Field(20, ge=1, env="HYBRID_CANDIDATES")
+    RRF_K: int = Field(60, ge=1, env="RRF_K")
+    # When at least this many retrieved chunks come from one long document,
+    # they are replaced by the whole document (0 always returns chunks).
+    RETRIEVAL_EXPAND_PARENTS: int = Field(2, ge=0, env="RETRIEVAL_EXPAND_PARENTS")
+
+    # Blocking retrieval calls run on a dedicated pool of this many threads;
+    # at most RETRIEVAL_MAX_CONCURRENCY searches are in flight or queued on
+    # it at once, the rest wait on the event loop without blocking it.
+    RETRIEVAL_MAX_WORKERS: int = Field(8, ge=1, env="RETRIEVAL_MAX_WORKERS")
+    RETRIEVAL_MAX_CONCURRENCY: int = Field(16, ge=1, env="RETRIEVAL_MAX_CONCURRENCY")
+    # Searches a single retrieve_context_batch call may run at once, so
+    # batch jobs leave semaphore slots for interactive requests.
+    RETRIEVAL_BATCH_CONCURRENCY: int = Field(4, ge=1, env="RETRIEVAL_BATCH_CONCURRENCY")
+
+    # How often the long-lived retrieval engine refreshes Pinecone index
+    # stats in the background (0 disables the refresher).
+    RETRIEVAL_STATS_REFRESH_SECONDS: int = Field(300, ge=0, env="RETRIEVAL_STATS_REFRESH_SECONDS")
+
+    # A failed engine start (e.g. a short Pinecone outage) is retried in the
+    # background and on the next request, first after RETRIEVAL_RETRY_SECONDS
+    # and then backing off exponentially up to RETRIEVAL_RETRY_MAX_SECONDS.
+    RETRIEVAL_RETRY_SECONDS: int = Field(5, ge=1, env="RETRIEVAL_RETRY_SECONDS")
+    RETRIEVAL_RETRY_MAX_SECONDS: int = Field(300, ge=1, env="RETRIEVAL_RETRY_MAX_SECONDS")
+
+    # Query-embedding cache: bounded in-memory LRU (with TTL) in front of a
+    # persistent SQLite file.  An empty path disables the on-disk tier, whose
+    # oldest rows are pruned beyond EMBEDDING_CACHE_DISK_MAX_ENTRIES (0 = no cap;
+    # a 1536-dim vector takes about 6 KiB).
+    EMBEDDING_CACHE_SIZE: int = Field(2048, ge=0, env="EMBEDDING_CACHE_SIZE")
+    EMBEDDING_CACHE_TTL_SECONDS: int = Field(24 * 60 * 60, ge=0, env="EMBEDDING_CACHE_TTL_SECONDS")
+    EMBEDDING_CACHE_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "query_embeddings.sqlite3"),
+        env="EMBEDDING_CACHE_PATH",
+    )
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = Field(50_000, ge=0, env="EMBEDDING_CACHE_DISK_MAX_ENTRIES")
+
+    # Content-addressed store of document embeddings shared by ingestion and
+    # the index builders, so unchanged texts are never re-embedded.  An
+    # empty path disables it.
+    EMBEDDING_STORE_PATH: str = Field(
+        str(Path(__file__).resolve().parents[1] / ".cache" / "embedding_store"),
+        env="EMBEDDING_STORE_PATH",
+    )
+
+    # Semantic answer cache for /chat: a query at least ANSWER_CACHE_THRESHOLD
+    # cosine-similar to a cached one that retrieves the same context ids
+    # reuses the cached answer.  A size of 0 disables the cache.
+    ANSWER_CACHE_SIZE: int = Field(1000, ge=0, env="ANSWER_CACHE_SIZE")
+    ANSWER_CACHE_TTL_SECONDS: int = Field(60 * 60, ge=0, env="ANSWER_CACHE_TTL_SECONDS")
+    ANSWER_CACHE_THRESHOLD: float = Field(0.95, ge=0.0, le=1.0, env="ANSWER_CACHE_THRESHOLD")
+
     # ------------------------------------------------------------------
     # Application behaviour toggles
     # ------------------------------------------------------------------
     MODERATION_ENABLED: bool = Field(True, env="MODERATION_ENABLED")
     CONFIDENCE_THRESHOLD: float = Field(0.25, ge=0.0, le=1.0, env="CONFIDENCE_THRESHOLD")
 
+    # Token budget for retrieved context sent to the LLM (0 sends every chunk
+    # whole); the chunk crossing the budget is cut at a sentence boundary if
+    # at least CONTEXT_MIN_CHUNK_TOKENS remain.
+    CONTEXT_TOKEN_BUDGET: int = Field(3000, ge=0, env="CONTEXT_TOKEN_BUDGET")
+    CONTEXT_MIN_CHUNK_TOKENS: int = Field(64, ge=1, env="CONTEXT_MIN_CHUNK_TOKENS")
+
     # ------------------------------------------------------------------
     # Miscellaneous
     # ------------------------------------------------------------------
@@ -0,0 +1,192 @@
+"""Registry of content-file parsers, and parallel parsing of the corpus.
+
+Each file format under `content/` (hadith collections, Q&A arrays,
+quran.xml, the prophet stories, the prayer guides) has an adapter: a
+``detect(path)`` predicate and a ``parse(path)`` generator of documents.
+`AdapterRegistry.discover` matches every file in the content directory to
+the first adapter that accepts it, so new files are picked up without a
+hardcoded list and unknown ones are reported instead of silently skipped.
+
+`parse_corpus` runs the adapters (and the chunking stage) in a process
+pool, one file per task, and yields the documents in file order.  At most
+``workers`` parsed files are held at once, so memory stays bounded by the
+largest files rather than the corpus.  A per-file `FileReport` (adapter,
+document count, parse time) is collected for the end-of-run summary.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from backend.chunking import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+DetectFn = Callable[[Path], bool]
+# Module-level generator function, so it can be sent to pool workers.
+ParseFn = Callable[[Path], Iterator[Any]]
+
+
+@dataclass(frozen=True)
+class ContentAdapter:
+    """Parser for one content file format."""
+
+    name: str
+    detect: DetectFn
+    parse: ParseFn
+
+
+@dataclass
+class FileReport:
+    """What parsing one content file produced."""
+
+    name: str
+    adapter: str
+    documents: int = 0
+    seconds: float = 0.0
+    # The parser raised; `documents` may be only part of the file
+    failed: bool = False
+
+
+class AdapterRegistry:
+    """Ordered content adapters; the first whose ``detect`` accepts a file parses it."""
+
+    def __init__(self):
+        self.adapters: List[ContentAdapter] = []
+
+    def register(self, name: str, detect: DetectFn) -> Callable[[ParseFn], ParseFn]:
+        """Decorator registering a ``parse(path)`` generator under *name*."""
+        def decorator(parse: ParseFn) -> ParseFn:
+            self.adapters.append(ContentAdapter(name, detect, parse))
+            return parse
+        return decorator
+
+    def adapter_for(self, path: Path) -> Optional[ContentAdapter]:
+        for adapter in self.adapters:
+            try:
+                if adapter.detect(path):
+                    return adapter
+            except (OSError, ValueError) as e:
+                logger.warning(f"Adapter {adapter.name} could not inspect {path.name}: {e}")
+        return None
+
+    def discover(self, content_dir: Path) -> List[Tuple[Path, ContentAdapter]]:
+        """Every file of *content_dir* that some adapter accepts, sorted by name."""
+        found = []
+        for path in sorted(Path(content_dir).iterdir()):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            adapter = self.adapter_for(path)
+            if adapter is None:
+                logger.warning(f"No content adapter for {path.name}; skipping it")
+                continue
+            logger.info(f"Found {path.name} ({adapter.name})")
+            found.append((path, adapter))
+        return found
+
+
+class ParentRows(list):
+    """Collects `ParentStore.put` calls, e.g. in a worker to replay in the parent process."""
+
+    def put(self, parent_id: str, text: str, token_count: int) -> None:
+        self.append((parent_id, text, token_count))
+
+
+def _parse_file(parse: ParseFn, path: Path, max_tokens: int, overlap_tokens: int) -> Tuple[List[Any], List[Tuple[str, str, int]], float]:
+    """Pool task: parse and chunk one file; returns documents, parent rows and seconds."""
+    started = time.perf_counter()
+    parents = ParentRows()
+    documents = list(iter_chunks(parse(path), max_tokens, overlap_tokens, parents=parents))
+    return documents, parents, time.perf_counter() - started
+
+
+def parse_corpus(
+    files: Iterable[Tuple[Path, ContentAdapter]],
+    max_tokens: int,
+    overlap_tokens: int,
+    parents: Any = None,
+    workers: int = 0,
+    reports: Optional[List[FileReport]] = None,
+) -> Iterator[Any]:
+    """Yield the chunked documents of *files* in order, parsing in a process pool.
+
+    Args:
+        files: ``(path, adapter)`` pairs, e.g. from `AdapterRegistry.discover`
+        max_tokens: Chunking budget (see `backend.chunking.iter_chunks`)
+        overlap_tokens: Chunk overlap
+        parents: `ParentStore` receiving the full text of chunked documents
+        workers: Parser processes; 0 uses every core, 1 parses lazily in
+            this process (constant memory, no pool)
+        reports: List a `FileReport` is appended to per file
+
+    A file whose parser raises is logged and reported as failed; the
+    documents it produced before the error have been yielded in serial
+    mode, none in parallel mode.
+    """
+    files = list(files)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    reports = reports if reports is not None else []
+
+    if workers <= 1:
+        for path, adapter in files:
+            report = FileReport(path.name, adapter.name)
+            reports.append(report)
+            started = time.perf_counter()
+            try:
+                for doc in iter_chunks(adapter.parse(path), max_tokens, overlap_tokens, parents=parents):
+                    report.documents += 1
+                    yield doc
+            except Exception as e:
+                logger.error(f"Error parsing {path.name} with {adapter.name}: {e}")
+                report.failed = True
+            # Includes the time the consumer spent on this file's documents
+            report.seconds = time.perf_counter() - started
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Tuple[Path, ContentAdapter, Future]] = deque()
+        queue = iter(files)
+
+        def submit() -> None:
+            item = next(queue, None)
+            if item is not None:
+                path, adapter = item
+                future = pool.submit(_parse_file, adapter.parse, path, max_tokens, overlap_tokens)
+                pending.append((path, adapter, future))
+
+        for _ in range(workers):
+            submit()
+        while pending:
+            path, adapter, future = pending.popleft()
+            failed = False
+            try:
+                documents, rows, seconds = future.result()
+            except Exception as e:
+                # Reported as failed with no documents, so the manifest keeps its ids
+                logger.error(f"Error parsing {path.name} with {adapter.name}: {e}")
+                documents, rows, seconds, failed = [], [], 0.0, True
+            submit()
+            if parents is not None:
+                for row in rows:
+                    parents.put(*row)
+            reports.append(FileReport(path.name, adapter.name, len(documents), seconds, failed))
+            yield from documents
+
+
+def format_reports(reports: List[FileReport]) -> str:
+    """Per-file summary table of a parse."""
+    width = max([len(report.name) for report in reports] + [4])
+    lines = [f"{'file':<{width}}  {'adapter':<18} {'documents':>9} {'seconds':>8}"]
+    for report in reports:
+        line = f"{report.name:<{width}}  {report.adapter:<18} {report.documents:>9} {report.seconds:>8.2f}"
+        lines.append(line + ("  FAILED" if report.failed else ""))
+    total = sum(report.documents for report in reports)
+    lines.append(f"{'total':<{width}}  {'':<18} {total:>9} {sum(r.seconds for r in reports):>8.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,212 @@
+"""Token-budgeted packing of retrieved chunks into the LLM prompt.
+
+`chat()` and `chat_stream()` put every retrieved chunk into the system
+message verbatim, and fatawa Q&A documents are often thousands of tokens
+long.  The packer sits between retrieval and the LLM: it keeps chunks in
+ranking order while they fit a token budget and truncates the chunk that
+crosses the budget at a sentence boundary, dropping whatever no longer fits.
+
+Token counts are computed once at ingest time (``token_count`` in the
+document metadata) so the request path only counts tokens for chunks that
+need truncating, or for documents ingested before counts were stored.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Encoding used by the gpt-4o / gpt-5 family.
+TOKEN_ENCODING = "o200k_base"
+
+# Rough characters-per-token ratio used when tiktoken (or its encoding file)
+# is unavailable, e.g. on an air-gapped host.
+_CHARS_PER_TOKEN = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?؟۔])\s+|\n+")
+
+_encoder: Any = None
+_encoder_failed = False
+
+
+def _get_encoder() -> Any:
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken  # type: ignore
+
+            _encoder = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"tiktoken unavailable, estimating token counts from length: {e}")
+            _encoder_failed = True
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in *text* (estimated when tiktoken is unavailable)."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def tokenizer_name() -> str:
+    """What `count_tokens` counts with: the tiktoken encoding, or "estimate"."""
+    return TOKEN_ENCODING if _get_encoder() is not None else "estimate"
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """``(start, end)`` offsets of the non-blank sentences of *text*."""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for separator in _SENTENCE_RE.finditer(text):
+        if text[start:separator.start()].strip():
+            spans.append((start, separator.start()))
+        start = separator.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split *text* after sentence punctuation (Latin and Arabic) and at newlines."""
+    return [text[start:end] for start, end in _sentence_spans(text)]
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest prefix of whole sentences of *text* that fits *budget* tokens.
+
+    The prefix is sliced from *text*, so paragraph breaks and line breaks
+    between the kept sentences survive; they count towards the budget.
+    """
+    kept = 0
+    used = 0
+    for _, end in _sentence_spans(text):
+        tokens = count_tokens(text[kept:end])
+        if used + tokens > budget:
+            break
+        kept = end
+        used += tokens
+    return text[:kept].strip()
+
+
+@dataclass
+class PackedContext:
+    """Chunks that made it into the prompt plus token accounting."""
+
+    contents: List[str] = field(default_factory=list)
+    tokens_retrieved: int = 0
+    tokens_packed: int = 0
+    truncated: int = 0
+    dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_retrieved - self.tokens_packed
+
+
+class ContextPacker:
+    """Packs ranked chunks into a token budget and keeps running totals."""
+
+    def __init__(self, budget: int = 3000, min_chunk_tokens: int = 64):
+        """Initialize the packer.
+
+        Args:
+            budget: Maximum context tokens sent to the LLM (0 disables packing)
+            min_chunk_tokens: Smallest remaining budget worth truncating a chunk into
+        """
+        self.budget = budget
+        self.min_chunk_tokens = min_chunk_tokens
+
+        self.requests = 0
+        self.tokens_retrieved = 0
+        self.tokens_packed = 0
+        self.truncated_chunks = 0
+        self.dropped_chunks = 0
+
+    def pack(
+        self,
+        contents: Sequence[str],
+        token_counts: Optional[Sequence[Optional[int]]] = None,
+    ) -> PackedContext:
+        """Fit *contents* (best first) into the budget.
+
+        Args:
+            contents: Retrieved chunks in ranking order
+            token_counts: Precomputed token count per chunk (``None`` entries are counted here)
+        """
+        counts = list(token_counts) if token_counts is not None else [None] * len(contents)
+        counts = [n if n is not None else count_tokens(text) for text, n in zip(contents, counts)]
+
+        packed = PackedContext(tokens_retrieved=sum(counts))
+        if self.budget <= 0:
+            packed.contents = list(contents)
+            packed.tokens_packed = packed.tokens_retrieved
+            return self._record(packed)
+
+        remaining = self.budget
+        for text, tokens in zip(contents, counts):
+            if tokens <= remaining:
+                packed.contents.append(text)
+                remaining -= tokens
+                continue
+            if remaining >= self.min_chunk_tokens:
+                head = truncate_to_tokens(text, remaining)
+                if head:
+                    tokens = count_tokens(head)
+                    packed.contents.append(head)
+                    packed.truncated += 1
+                    remaining -= tokens
+                    continue
+            packed.dropped += 1
+
+        packed.tokens_packed = self.budget - remaining
+        return self._record(packed)
+
+    def _record(self, packed: PackedContext) -> PackedContext:
+        self.requests += 1
+        self.tokens_retrieved += packed.tokens_retrieved
+        self.tokens_packed += packed.tokens_packed
+        self.truncated_chunks += packed.truncated
+        self.dropped_chunks += packed.dropped
+        logger.info(
+            f"Packed context: {packed.tokens_packed}/{packed.tokens_retrieved} tokens "
+            f"({packed.tokens_saved} saved, {packed.truncated} truncated, {packed.dropped} dropped)"
+        )
+        return packed
+
+    def stats(self) -> Dict[str, Any]:
+        """Running token totals across requests."""
+        saved = self.tokens_retrieved - self.tokens_packed
+        return {
+            "budget": self.budget,
+            "requests": self.requests,
+            "tokens_retrieved": self.tokens_retrieved,
+            "tokens_packed": self.tokens_packed,
+            "tokens_saved": saved,
+            "avg_tokens_saved": saved / self.requests if self.requests else 0.0,
+            "truncated_chunks": self.truncated_chunks,
+            "dropped_chunks": self.dropped_chunks,
+        }
+
+
+# Global context packer instance
+_context_packer: Optional[ContextPacker] = None
+
+
+def get_context_packer() -> ContextPacker:
+    """Get or create the global context packer from settings."""
+    global _context_packer
+    if _context_packer is None:
+        from backend.config import get_settings
+
+        settings = get_settings()
+        _context_packer = ContextPacker(
+            budget=settings.CONTEXT_TOKEN_BUDGET,
+            min_chunk_tokens=settings.CONTEXT_MIN_CHUNK_TOKENS,
+        )
+    return _context_packer
@@ -0,0 +1,369 @@
+"""Precompiled, memory-mapped corpus artifact.
+
+Parsing `content/` (about 8 MB of JSON and XML) costs seconds and tens of
+megabytes every time a process needs the corpus: ingestion, index builds,
+and the reference index the API compiles at startup.  `compile_corpus.py`
+does that work once and writes a single versioned file that every consumer
+maps read-only in milliseconds::
+
+    magic     b"HCORPUS\\0"
+    length    header length, uint64 little-endian
+    header    JSON: version, source file fingerprints, compile config,
+              tables (rows, columns, section offsets), embedding model
+    sections  64-byte aligned numpy arrays
+
+Data is stored as named tables of columns.  Integer columns are int64
+arrays; string columns are a uint64 offsets array into a UTF-8 blob; any
+other value (floats, lists, mixed types) is stored as a JSON string column.
+Every column has a presence mask, so rows may omit keys, like document
+metadata does.  The ``documents`` table holds the chunked, indexable units
+(``page_content`` plus one column per metadata key) and may carry a float32
+embedding matrix.
+
+An artifact records the size, mtime and SHA-256 of every source file and
+the settings it was compiled with; `CorpusArtifact.stale_reason` tells a
+consumer whether it still matches the content it would otherwise parse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"HCORPUS\x00"
+ARTIFACT_VERSION = 1
+ALIGNMENT = 64
+DOCUMENTS = "documents"
+PAGE_CONTENT = "page_content"
+
+# Rows decoded at once when iterating a table
+_ROW_BLOCK = 4096
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def fingerprint_file(path: Path) -> Dict[str, Any]:
+    """Size, mtime and SHA-256 of *path*, as recorded in the artifact header."""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(path)}
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_matches(path: Path, recorded: Dict[str, Any]) -> bool:
+    """Whether *path* still has the recorded content; hashes only when mtime moved."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    if stat.st_size != recorded["size"]:
+        return False
+    return stat.st_mtime_ns == recorded["mtime_ns"] or _sha256(path) == recorded["sha256"]
+
+
+# ---------------------------------------------------------------------------
+# Columns
+# ---------------------------------------------------------------------------
+def _encode_column(values: Sequence[Any]) -> Tuple[str, Dict[str, np.ndarray]]:
+    """Column kind and arrays for *values* (``None`` marks a missing value)."""
+    present = np.fromiter((value is not None for value in values), dtype=np.uint8, count=len(values))
+    types = {type(value) for value in values if value is not None}
+    if types and types <= {int}:
+        ints = np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(values))
+        return "int", {"values": ints, "present": present}
+
+    kind = "str" if types <= {str} else "json"
+    encoded = [
+        b"" if value is None
+        else (value if kind == "str" else json.dumps(value, ensure_ascii=False)).encode("utf-8")
+        for value in values
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return kind, {"offsets": offsets, "data": data, "present": present}
+
+
+class Column:
+    """Read-only view of one column of an artifact table."""
+
+    def __init__(self, kind: str, arrays: Dict[str, np.ndarray]):
+        self.kind = kind
+        self.present = arrays["present"]
+        self.values = arrays.get("values")  # int columns
+        self._offsets = arrays.get("offsets")
+        self._data = arrays.get("data")
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.slice(row, row + 1)[0]
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Decoded values of rows ``start:stop``, ``None`` where missing."""
+        present = self.present[start:stop].tolist()
+        if self.kind == "int":
+            return [int(value) if has else None for value, has in zip(self.values[start:stop].tolist(), present)]
+        offsets = self._offsets[start:stop + 1].tolist()
+        base = offsets[0] if offsets else 0
+        blob = self._data[base:offsets[-1]].tobytes() if offsets else b""
+        out: List[Any] = []
+        for i, has in enumerate(present):
+            if not has:
+                out.append(None)
+                continue
+            text = blob[offsets[i] - base:offsets[i + 1] - base].decode("utf-8")
+            out.append(json.loads(text) if self.kind == "json" else text)
+        return out
+
+    def __iter__(self) -> Iterator[Any]:
+        for start in range(0, len(self), _ROW_BLOCK):
+            yield from self.slice(start, min(start + _ROW_BLOCK, len(self)))
+
+
+class Table:
+    """Named columns of equal length."""
+
+    def __init__(self, name: str, rows: int, columns: Dict[str, Column]):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> Column:
+        return self.columns[name]
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Rows as dicts in column order, without the keys a row does not have."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        names = list(self.columns)
+        for block in range(start, stop, _ROW_BLOCK):
+            end = min(block + _ROW_BLOCK, stop)
+            values = [self.columns[name].slice(block, end) for name in names]
+            for row in zip(*values):
+                yield {name: value for name, value in zip(names, row) if value is not None}
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+def document_columns(documents: Sequence[Any]) -> Dict[str, List[Any]]:
+    """``documents`` table columns: ``page_content``, then metadata keys in first-seen order."""
+    keys: Dict[str, None] = {}
+    for doc in documents:
+        keys.update(dict.fromkeys(doc.metadata))
+    columns: Dict[str, List[Any]] = {PAGE_CONTENT: [doc.page_content for doc in documents]}
+    for key in keys:
+        columns[key] = [doc.metadata.get(key) for doc in documents]
+    return columns
+
+
+def write_artifact(
+    path: Path,
+    tables: Dict[str, Dict[str, Sequence[Any]]],
+    sources: Dict[str, Dict[str, Any]],
+    config: Dict[str, Any],
+    embeddings: Optional[Tuple[str, np.ndarray, np.ndarray]] = None,
+) -> None:
+    """Write an artifact atomically.
+
+    Args:
+        path: File to write
+        tables: ``{table: {column: values}}``; columns of a table have equal
+            lengths, ``None`` marks a missing value
+        sources: ``{file name: fingerprint_file(...)}`` of the compiled content
+        config: Settings and parser version the tables depend on
+        embeddings: ``(model, (rows, dim) matrix, presence mask)`` aligned
+            with the ``documents`` table
+    """
+    sections: List[Tuple[str, np.ndarray]] = []
+    header_tables: Dict[str, Any] = {}
+    for table, columns in tables.items():
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of table {table} have different lengths: {sorted(lengths)}")
+        spec: Dict[str, Any] = {"rows": lengths.pop() if lengths else 0, "columns": {}}
+        for name, values in columns.items():
+            kind, arrays = _encode_column(values)
+            spec["columns"][name] = {"kind": kind, "arrays": {}}
+            for part, array in arrays.items():
+                spec["columns"][name]["arrays"][part] = len(sections)
+                sections.append((f"{table}.{name}.{part}", array))
+        header_tables[table] = spec
+
+    header: Dict[str, Any] = {
+        "version": ARTIFACT_VERSION,
+        "created_at": time.time(),
+        "sources": sources,
+        "config": config,
+        "tables": header_tables,
+        "embedding_model": None,
+    }
+    if embeddings is not None:
+        model, matrix, present = embeddings
+        header["embedding_model"] = model
+        header["embeddings"] = {"matrix": len(sections), "present": len(sections) + 1}
+        sections.append(("embeddings", np.ascontiguousarray(matrix, dtype=np.float32)))
+        sections.append(("embeddings.present", np.asarray(present, dtype=np.uint8)))
+
+    layout, offset = [], 0
+    for name, array in sections:
+        layout.append({"name": name, "offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)})
+        offset = _align(offset + array.nbytes)
+    header["sections"] = layout
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).astype("<u8").tobytes())
+        f.write(header_bytes)
+        for (name, array), spec in zip(sections, layout):
+            f.seek(data_start + spec["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    tmp.replace(path)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+class CorpusArtifact:
+    """A compiled corpus, memory-mapped read-only."""
+
+    def __init__(self, path: Path):
+        """Map the artifact at *path*.
+
+        Raises:
+            ValueError: if the file is not an artifact of this version
+        """
+        self.path = Path(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if self._buffer[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{self.path} is not a corpus artifact")
+        length = int(self._buffer[len(MAGIC):len(MAGIC) + 8].view("<u8")[0])
+        start = len(MAGIC) + 8
+        self.header: Dict[str, Any] = json.loads(self._buffer[start:start + length].tobytes())
+        if self.header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"{self.path} has artifact version {self.header.get('version')}, expected {ARTIFACT_VERSION}")
+        self._data_start = _align(start + length)
+        self._tables: Dict[str, Table] = {}
+
+    def _section(self, index: int) -> np.ndarray:
+        spec = self.header["sections"][index]
+        dtype = np.dtype(spec["dtype"])
+        start = self._data_start + spec["offset"]
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return self._buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+    @property
+    def tables(self) -> List[str]:
+        return list(self.header["tables"])
+
+    def table(self, name: str) -> Table:
+        if name not in self._tables:
+            spec = self.header["tables"][name]
+            columns = {
+                column: Column(info["kind"], {part: self._section(i) for part, i in info["arrays"].items()})
+                for column, info in spec["columns"].items()
+            }
+            self._tables[name] = Table(name, spec["rows"], columns)
+        return self._tables[name]
+
+    def __len__(self) -> int:
+        return self.header["tables"].get(DOCUMENTS, {}).get("rows", 0)
+
+    def iter_documents(self, factory: Callable[..., Any], start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+        """Documents built as ``factory(page_content=..., metadata=...)``."""
+        for row in self.table(DOCUMENTS).iter_rows(start, stop):
+            text = row.pop(PAGE_CONTENT)
+            yield factory(page_content=text, metadata=row)
+
+    # ------------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------------
+    @property
+    def embedding_model(self) -> Optional[str]:
+        return self.header.get("embedding_model")
+
+    def embeddings(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """``(matrix, presence mask)`` of the documents' embeddings, if compiled in."""
+        spec = self.header.get("embeddings")
+        if spec is None:
+            return None
+        return self._section(spec["matrix"]), self._section(spec["present"]).astype(bool)
+
+    # ------------------------------------------------------------------
+    # Freshness
+    # ------------------------------------------------------------------
+    def stale_reason(self, files: Iterable[Path], config: Dict[str, Any], exact: bool = True) -> Optional[str]:
+        """Why the artifact does not match *files* compiled with *config*, or None.
+
+        With *exact* the artifact must have been compiled from exactly
+        *files*; otherwise it only has to include them.
+        """
+        sources = self.header["sources"]
+        files = list(files)
+        for path in files:
+            recorded = sources.get(path.name)
+            if recorded is None:
+                return f"{path.name} is not in the artifact"
+            if not _file_matches(path, recorded):
+                return f"{path.name} changed since the artifact was compiled"
+        if exact:
+            missing = set(sources) - {path.name for path in files}
+            if missing:
+                return f"{', '.join(sorted(missing))} no longer in the content directory"
+        compiled = self.header["config"]
+        for key, value in config.items():
+            if compiled.get(key) != value:
+                return f"{key} is {value!r}, the artifact was compiled with {compiled.get(key)!r}"
+        return None
+
+
+# Global artifact instance (None when it has not been compiled)
+_corpus_artifact: Optional[CorpusArtifact] = None
+_corpus_artifact_loaded = False
+
+
+def get_corpus_artifact() -> Optional[CorpusArtifact]:
+    """Get the compiled corpus at CORPUS_ARTIFACT_PATH, if there is a valid one."""
+    global _corpus_artifact, _corpus_artifact_loaded
+    if not _corpus_artifact_loaded:
+        from backend.config import get_settings
+
+        path = get_settings().CORPUS_ARTIFACT_PATH
+        if path and Path(path).exists():
+            try:
+                _corpus_artifact = CorpusArtifact(Path(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring corpus artifact {path}: {e}")
+        elif path:
+            logger.info(f"No corpus artifact at {path}; run backend/compile_corpus.py")
+        _corpus_artifact_loaded = True
+    return _corpus_artifact
@@ -0,0 +1,293 @@
+"""Helpers shared by ingestion and retrieval for identifying corpus documents.
+
+Both the vector store and the lexical index are built from the documents
+produced by `ingest_content.py`; fusing their results requires a common id
+derived only from the document metadata.  The same id keys the ingestion
+manifest, which records a content hash per document so reruns only embed
+and upsert what changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+JOURNAL_VERSION = 1
+CHUNK_SEPARATOR = "#"
+
+
+def _id_part(value: Any) -> Any:
+    """*value* as written into an id; Pinecone returns numeric metadata as floats."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def document_id(metadata: Dict[str, Any]) -> str:
+    """Stable id for a processed document: source file plus hadith id / item index.
+
+    Chunks of a long document (see `backend.chunking`) append ``#<chunk index>``.
+    Metadata read back from Pinecone (``1.0`` for ``1``) gives the same id.
+    """
+    key = _id_part(metadata.get("hadith_id") or metadata.get("item_index", ""))
+    doc_id = f"{metadata.get('source', '')}:{key}"
+    if metadata.get("chunk_index") is not None:
+        doc_id += f"{CHUNK_SEPARATOR}{_id_part(metadata['chunk_index'])}"
+    return doc_id
+
+
+def parent_id(doc_id: str) -> str:
+    """Id of the document a chunk id was cut from (the id itself if not a chunk)."""
+    return doc_id.split(CHUNK_SEPARATOR, 1)[0]
+
+
+def content_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """SHA-256 of a document's text and metadata, independent of key order."""
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def manifest_entries(documents: Iterable[Any]) -> Dict[str, Dict[str, str]]:
+    """``{id: {"hash", "source"}}`` manifest entries for *documents*."""
+    return {
+        document_id(doc.metadata): {
+            "hash": content_hash(doc.page_content, doc.metadata),
+            "source": doc.metadata.get("source", ""),
+        }
+        for doc in documents
+    }
+
+
+@dataclass
+class IngestPlan:
+    """What an ingestion run has to do to bring the index up to date."""
+
+    upserts: List[Any] = field(default_factory=list)  # documents, new or changed
+    deletes: List[str] = field(default_factory=list)  # ids no longer produced
+    unchanged: int = 0
+    seen_ids: Set[str] = field(default_factory=set)
+    sources: Set[str] = field(default_factory=set)  # sources that produced documents
+
+
+class IngestManifest:
+    """Content hash and source file per document id from previous ingestions."""
+
+    def __init__(self, path: Path, target: str = "", entries: Optional[Dict[str, Dict[str, str]]] = None):
+        """Create a manifest.
+
+        Args:
+            path: JSON file the manifest is saved to
+            target: Name of the index the documents were written to; a
+                manifest for another target is ignored on load
+            entries: ``{id: {"hash", "source"}}`` of already ingested documents
+        """
+        self.path = Path(path)
+        self.target = target
+        self.entries: Dict[str, Dict[str, str]] = dict(entries or {})
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: Path, target: str = "") -> "IngestManifest":
+        """Load the manifest at *path*, or start an empty one."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path, target)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION or data.get("target", "") != target:
+            logger.warning(f"Ignoring ingestion manifest {path} written for '{data.get('target', '')}'")
+            return cls(path, target)
+        return cls(path, target, data.get("documents", {}))
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "target": self.target, "documents": self.entries}, f)
+        tmp.replace(self.path)
+
+    def select(
+        self,
+        documents: Iterable[Any],
+        plan: IngestPlan,
+        force: bool = False,
+        committed: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> Iterator[Any]:
+        """Lazily yield the new or changed *documents* (``page_content`` / ``metadata``).
+
+        Unchanged documents are counted in *plan*, and every id seen is
+        remembered there for `finish`.  Later duplicates of an id are
+        skipped.  *force* yields every document except those already
+        written by the run being resumed (*committed*, see `IngestJournal`).
+        """
+        for doc in documents:
+            doc_id = document_id(doc.metadata)
+            if doc_id in plan.seen_ids:
+                logger.warning(f"Duplicate document id {doc_id}; keeping the first occurrence")
+                continue
+            plan.seen_ids.add(doc_id)
+            plan.sources.add(doc.metadata.get("source", ""))
+
+            entry = (committed or {}).get(doc_id) if force else self.entries.get(doc_id)
+            if entry is not None and entry["hash"] == content_hash(doc.page_content, doc.metadata):
+                plan.unchanged += 1
+            else:
+                yield doc
+
+    def finish(self, plan: IngestPlan, sources: Iterable[str], failed: Iterable[str] = ()) -> None:
+        """Fill in `plan.deletes` once `select` has seen every document.
+
+        Previously ingested ids of the scanned *sources* that are no longer
+        produced, and all ids of sources no longer scanned, are deleted.
+        Sources that *failed* to parse part-way, and scanned sources that
+        produced no documents at all, keep all their ids.
+        """
+        failed = set(failed) | (set(sources) - plan.sources)
+        for source in sorted(failed):
+            kept = sum(1 for entry in self.entries.values() if entry["source"] == source)
+            if kept:
+                logger.warning(f"{source} failed to parse; keeping its {kept} ingested documents")
+        plan.deletes = [
+            doc_id for doc_id, entry in self.entries.items()
+            if doc_id not in plan.seen_ids and entry["source"] not in failed
+        ]
+
+    def plan(self, documents: Iterable[Any], sources: Iterable[str], force: bool = False) -> IngestPlan:
+        """Diff all *documents* against the manifest at once (see `select` / `finish`)."""
+        plan = IngestPlan()
+        plan.upserts = list(self.select(documents, plan, force))
+        self.finish(plan, sources)
+        return plan
+
+    def record(self, documents: Iterable[Any]) -> None:
+        """Mark *documents* as ingested with their current content."""
+        self.record_entries(manifest_entries(documents))
+
+    def record_entries(self, entries: Dict[str, Dict[str, str]]) -> None:
+        """Mark documents as ingested from ``{id: {"hash", "source"}}`` *entries*."""
+        self.entries.update(entries)
+
+    def forget(self, ids: Iterable[str]) -> None:
+        """Drop deleted *ids* from the manifest."""
+        for doc_id in ids:
+            self.entries.pop(doc_id, None)
+
+
+class IngestJournal:
+    """Durable, append-only log of the batches an ingestion run has committed.
+
+    The manifest is only rewritten at the end of a run; in between, every
+    upserted batch is appended here (source files, batch number, ids with
+    their content hashes) and fsynced.  After a crash the journal tells the
+    next run exactly which documents reached the index: they are folded
+    into the manifest, and ``--resume`` continues the interrupted run with
+    its own options, skipping what it already wrote even under ``--full``.
+    A run that finishes removes its journal.
+    """
+
+    def __init__(self, path: Path, target: str = "", full: bool = False, started_at: Optional[float] = None):
+        """Create an (unopened) journal.
+
+        Args:
+            path: JSONL file of the journal
+            target: Name of the index the run writes to
+            full: Whether the run re-upserts every document (``--full``)
+            started_at: When the run started
+        """
+        self.path = Path(path)
+        self.target = target
+        self.full = full
+        self.started_at = started_at if started_at is not None else time.time()
+        self.batches = 0
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self._file: Any = None
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IngestJournal"]:
+        """The journal an unfinished run left at *path*, or None.
+
+        A torn last line (crash mid-write) is ignored.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        journal: Optional[IngestJournal] = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring incomplete last record of ingestion journal {path}")
+                    break
+                if journal is None:
+                    if record.get("version") != JOURNAL_VERSION:
+                        logger.warning(f"Ignoring ingestion journal {path} of another version")
+                        return None
+                    journal = cls(path, record.get("target", ""), record.get("full", False), record.get("started_at"))
+                    continue
+                journal.batches = max(journal.batches, record["batch"])
+                journal.entries.update(record["documents"])
+        return journal
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self) -> None:
+        """(Re)write the journal file: header, then what is already committed as one record.
+
+        A resumed journal is rewritten rather than appended to, so a torn
+        last line cannot swallow the records that follow it.
+        """
+        self.close()
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            header = {"version": JOURNAL_VERSION, "target": self.target, "full": self.full, "started_at": self.started_at}
+            f.write(json.dumps(header) + "\n")
+            if self.entries:
+                f.write(json.dumps(self._record(self.batches, self.entries), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
+
+    @staticmethod
+    def _record(batch: int, entries: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+        return {
+            "batch": batch,
+            "sources": sorted({entry["source"] for entry in entries.values()}),
+            "documents": entries,
+        }
+
+    def commit(self, documents: List[Any]) -> None:
+        """Durably record that *documents* were written to the index."""
+        entries = manifest_entries(documents)
+        self.batches += 1
+        self.entries.update(entries)
+        self._append(self._record(self.batches, entries))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Delete the journal once its run has been folded into the manifest."""
+        self.close()
+        self.path.unlink(missing_ok=True)
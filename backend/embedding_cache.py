@@ -0,0 +1,290 @@
+"""Two-tier cache for query embeddings.
+
+Popular questions ("how to pray witr", "is music haram") arrive many times a
+day and each one used to cost an OpenAI embeddings round-trip.  This module
+keeps recently used vectors in a bounded in-memory LRU (with TTL) backed by a
+persistent SQLite file so the cache survives restarts.  The file is capped
+at ``disk_max_entries`` rows: once it grows past the cap the oldest rows are
+pruned in one batch, down to ``DISK_PRUNE_FRACTION`` of it.
+
+Entries are keyed on the embedding model name plus the *normalized* query, so
+trivial differences in casing or whitespace share a vector while switching the
+embedding model never returns stale dimensions.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Share of disk_max_entries kept after pruning, so the file is not pruned
+# again on every following write.
+DISK_PRUNE_FRACTION = 0.9
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query used for cache keys."""
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def cache_key(model: str, text: str) -> str:
+    """Stable key for *text* embedded with *model*."""
+    raw = f"{model}\x00{normalize_query(text)}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class EmbeddingCache:
+    """Bounded in-memory LRU with TTL in front of an on-disk SQLite store."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 24 * 60 * 60,
+        path: Optional[Path] = None,
+        disk_max_entries: int = 0,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of vectors kept in memory
+            ttl_seconds: Lifetime of an in-memory entry before it is re-read
+            path: SQLite file for the persistent tier (``None`` disables it)
+            disk_max_entries: Maximum number of rows in the SQLite file (0 = unbounded)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+
+        # OrderedDict for LRU-style eviction: key -> (stored_at, vector)
+        self._memory: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_pruned = 0
+        self._disk_rows = 0
+        self._miss_seconds = 0.0
+
+        if path is not None:
+            self._open_disk(path)
+
+    # ------------------------------------------------------------------
+    # Persistent tier
+    # ------------------------------------------------------------------
+    def _open_disk(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                "vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+            self._db.commit()
+            self._disk_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._disk_prune()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache disk tier disabled ({path}): {e}")
+            self._db = None
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache disk read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return array("f", row[0]).tolist()
+
+    def _disk_put(self, key: str, model: str, vector: List[float]) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, array("f", vector).tobytes(), time.time()),
+            )
+            self._db.commit()
+            # A replaced row is counted twice; the next prune recounts
+            self._disk_rows += 1
+            self._disk_prune()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache disk write failed: {e}")
+
+    def _disk_prune(self) -> None:
+        """Delete the oldest rows once the file holds more than ``disk_max_entries``."""
+        if not self.disk_max_entries or self._disk_rows <= self.disk_max_entries:
+            return
+        self._disk_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._disk_rows - int(self.disk_max_entries * DISK_PRUNE_FRACTION)
+        if self._disk_rows <= self.disk_max_entries:
+            return
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+            (excess,),
+        )
+        self._db.commit()
+        self._disk_rows -= excess
+        self.disk_pruned += excess
+        logger.info(f"Pruned {excess} oldest rows from the embedding cache disk tier")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached vector for *text* or ``None`` on a miss."""
+        key = cache_key(model, text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return vector
+                del self._memory[key]
+
+            vector = self._disk_get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector, now)
+                return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float], elapsed: float = 0.0) -> None:
+        """Store *vector*; *elapsed* is the API latency the miss cost."""
+        key = cache_key(model, text)
+        with self._lock:
+            self._miss_seconds += elapsed
+            self._remember(key, vector, time.time())
+            self._disk_put(key, model, vector)
+
+    def _remember(self, key: str, vector: List[float], now: float) -> None:
+        self._memory[key] = (now, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus an estimate of the API latency saved."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_entries": self._disk_rows,
+            "disk_max_entries": self.disk_max_entries,
+            "disk_pruned": self.disk_pruned,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "embedding_calls_saved": hits,
+            "avg_embedding_latency_seconds": avg_miss,
+            "estimated_seconds_saved": hits * avg_miss,
+            "persistent": self._db is not None,
+        }
+
+
+class CachedEmbeddings:
+    """LangChain-compatible embeddings wrapper that consults `EmbeddingCache`.
+
+    Only single-query embedding is cached; bulk document embedding (used by
+    ingestion) is passed straight through to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Any, cache: EmbeddingCache, model: Optional[str] = None):
+        self._embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", None) or "unknown"
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(self.model, text)
+        if vector is not None:
+            return vector
+
+        started = time.perf_counter()
+        vector = self._embeddings.embed_query(text)
+        self.cache.put(self.model, text, vector, elapsed=time.perf_counter() - started)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, fetching every cache miss in one API request."""
+        vectors: List[Optional[List[float]]] = [self.cache.get(self.model, text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Duplicates within the batch are only sent once.
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            started = time.perf_counter()
+            fetched = dict(zip(unique, self._embeddings.embed_documents(unique)))
+            elapsed = (time.perf_counter() - started) / len(unique)
+            for text, vector in fetched.items():
+                self.cache.put(self.model, text, vector, elapsed=elapsed)
+            for i in missing:
+                vectors[i] = fetched[texts[i]]
+        return vectors  # type: ignore[return-value]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(self.model, text)
+        if vector is not None:
+            return vector
+
+        started = time.perf_counter()
+        vector = await self._embeddings.aembed_query(text)
+        self.cache.put(self.model, text, vector, elapsed=time.perf_counter() - started)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._embeddings.aembed_documents(texts)
+
+
+# Global embedding cache instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the global embedding cache from settings."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        from backend.config import get_settings
+
+        settings = get_settings()
+        path = Path(settings.EMBEDDING_CACHE_PATH) if settings.EMBEDDING_CACHE_PATH else None
+        _embedding_cache = EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            path=path,
+            disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+        )
+        logger.info(f"Initialized embedding cache (disk tier: {path})")
+    return _embedding_cache
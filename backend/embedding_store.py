@@ -0,0 +1,295 @@
+"""Content-addressed, append-only store of document embeddings.
+
+Rebuilding the Pinecone index, a local index, or re-chunking the corpus
+used to re-embed every text through the OpenAI API even when the text had
+been embedded before.  `EmbeddingStore` keeps every document vector ever
+fetched, keyed by the SHA-256 of (model, normalized text), so an unchanged
+text is never paid for twice.
+
+On disk each model has a directory::
+
+    meta.json      model name, dimension and current generation
+    keys.bin       32-byte SHA-256 key per row, append-only
+    vectors.bin    float32 rows, append-only, memory-mapped for reads
+
+The key -> row map is rebuilt from ``keys.bin`` on open.  A crash mid-append
+leaves at most one partial row, which is ignored and overwritten.
+`compact` writes the rows still wanted as a new generation of both files
+(``keys.<n>.bin`` / ``vectors.<n>.bin``) and switches to it by atomically
+replacing ``meta.json``, so a crash leaves either the old or the new pair,
+never a mix.  The store is safe to share between threads, not between
+concurrent writing processes; a store opened with ``read_only=True``
+creates, deletes and truncates nothing, so it can be read alongside one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.bin"
+KEY_BYTES = 32
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a document text for keys: NFC, collapsed whitespace.
+
+    Case is kept: unlike queries, document texts are embedded verbatim.
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """SHA-256 key of *text* embedded with *model*."""
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped vectors of one embedding model."""
+
+    def __init__(self, root: Path, model: str, read_only: bool = False):
+        """Open (or create) the store of *model* under *root*.
+
+        Args:
+            root: Directory holding one subdirectory per model
+            model: Embedding model name, part of every key
+            read_only: Only look vectors up: no directory is created, no
+                leftover or partial files are cleaned up, and writes raise
+        """
+        self.model = model
+        self.path = Path(root) / _UNSAFE_RE.sub("_", model)
+        self.read_only = read_only
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._view: Optional[np.ndarray] = None
+        self.generation = 0
+
+        meta = self.path / META_FILE
+        if meta.exists():
+            with open(meta, encoding="utf-8") as f:
+                data = json.load(f)
+            self.dim = int(data["dim"])
+            self.generation = int(data.get("generation", 0))
+        if not read_only:
+            self._remove_other_generations()
+        self._load_keys()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def _files(self, generation: int) -> Tuple[Path, Path]:
+        """``(keys, vectors)`` files of *generation* (0 is the original pair)."""
+        if generation == 0:
+            return self.path / KEYS_FILE, self.path / VECTORS_FILE
+        return self.path / f"keys.{generation}.bin", self.path / f"vectors.{generation}.bin"
+
+    @property
+    def keys_path(self) -> Path:
+        return self._files(self.generation)[0]
+
+    @property
+    def vectors_path(self) -> Path:
+        return self._files(self.generation)[1]
+
+    def _write_meta(self, generation: int) -> None:
+        """Atomically record model, dimension and the current *generation*."""
+        tmp = self.path / (META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim, "generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path / META_FILE)
+
+    def _remove_other_generations(self) -> None:
+        """Delete files of generations other than the current one.
+
+        They are left by a compaction that crashed before switching (the new
+        generation) or after it (the old one).
+        """
+        current = set(self._files(self.generation))
+        for path in list(self.path.glob("keys*.bin")) + list(self.path.glob("vectors*.bin")):
+            if path not in current:
+                path.unlink(missing_ok=True)
+
+    def _load_keys(self) -> None:
+        """Rebuild the key map, dropping (read-only: ignoring) a partial last row if any."""
+        keys_path, vectors_path = self.keys_path, self.vectors_path
+        if self.dim is None or not keys_path.exists() or not vectors_path.exists():
+            self._rows = {}
+            return
+        row_bytes = 4 * self.dim
+        count = min(keys_path.stat().st_size // KEY_BYTES, vectors_path.stat().st_size // row_bytes)
+        for path, size in ((keys_path, count * KEY_BYTES), (vectors_path, count * row_bytes)):
+            if path.stat().st_size != size and not self.read_only:
+                logger.warning(f"Truncating partial row of {path}")
+                os.truncate(path, size)
+        keys = keys_path.read_bytes()[:count * KEY_BYTES]
+        self._rows = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(count)}
+        self._view = None
+
+    def _vectors(self) -> np.ndarray:
+        """Memory-mapped ``(rows, dim)`` view, remapped when rows were appended."""
+        if self._view is None or self._view.shape[0] != len(self._rows):
+            if not self._rows:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            self._view = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim)
+            )
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Embedding store {self.path} is open read-only")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Stored vector per text (``None`` when not stored), in one pass."""
+        keys = [embedding_key(self.model, text) for text in texts]
+        with self._lock:
+            rows = [self._rows.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            if not found:
+                return [None] * len(texts)
+            # One fancy-indexing read for the whole batch
+            block = np.array(self._vectors()[np.asarray(found)], dtype=np.float32)
+        out: List[Optional[np.ndarray]] = []
+        it = iter(block)
+        for row in rows:
+            out.append(next(it) if row is not None else None)
+        return out
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """Append the vectors of texts not stored yet; returns how many were added."""
+        self._check_writable()
+        if not texts:
+            return 0
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+                self._write_meta(self.generation)
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding store for {self.model} holds {self.dim}-d vectors, got {matrix.shape[1]}")
+
+            new_keys: Dict[bytes, int] = {}
+            for i, text in enumerate(texts):
+                key = embedding_key(self.model, text)
+                if key not in self._rows and key not in new_keys:
+                    new_keys[key] = i
+            if not new_keys:
+                return 0
+            # Vectors first: a key is only trusted once its row is complete
+            with open(self.vectors_path, "ab") as f:
+                f.write(matrix[list(new_keys.values())].tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+            start = len(self._rows)
+            for offset, key in enumerate(new_keys):
+                self._rows[key] = start + offset
+            return len(new_keys)
+
+    def compact(self, keep_texts: Iterable[str]) -> int:
+        """Rewrite the store with only the vectors of *keep_texts*; returns rows dropped."""
+        self._check_writable()
+        keep = {embedding_key(self.model, text) for text in keep_texts}
+        with self._lock:
+            kept = [(key, row) for key, row in self._rows.items() if key in keep]
+            dropped = len(self._rows) - len(kept)
+            if not dropped:
+                return 0
+            vectors = self._vectors()
+            new_keys, new_vectors = self._files(self.generation + 1)
+            with open(new_vectors, "wb") as f:
+                for start in range(0, len(kept), 4096):
+                    rows = [row for _, row in kept[start:start + 4096]]
+                    f.write(np.asarray(vectors[rows], dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(new_keys, "wb") as f:
+                f.write(b"".join(key for key, _ in kept))
+                f.flush()
+                os.fsync(f.fileno())
+            self._view = None
+            del vectors
+            # The switch to the new pair is the single atomic meta.json replace
+            self._write_meta(self.generation + 1)
+            self.generation += 1
+            self._rows = {key: i for i, (key, _) in enumerate(kept)}
+            self._remove_other_generations()
+        logger.info(f"Compacted embedding store {self.path}: {len(kept)} kept, {dropped} dropped")
+        return dropped
+
+
+class StoredEmbeddings:
+    """LangChain-compatible embeddings wrapper that reads and fills an `EmbeddingStore`.
+
+    `embed_documents` only sends texts the store does not hold to the
+    wrapped model; single queries go through untouched (see
+    `backend.embedding_cache` for those).
+    """
+
+    def __init__(self, embeddings: Any, store: EmbeddingStore):
+        self._embeddings = embeddings
+        self.store = store
+        self.model = store.model
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Stored vectors of *texts*, ``None`` for those never embedded."""
+        return [vector.tolist() if vector is not None else None for vector in self.store.get_many(texts)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.lookup(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            fetched = self._embeddings.embed_documents([texts[i] for i in missing])
+            self.store.put_many([texts[i] for i in missing], fetched)
+            for i, vector in zip(missing, fetched):
+                vectors[i] = list(vector)
+        return vectors  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
+
+
+def stored_embeddings(embeddings: Any, read_only: bool = False) -> Any:
+    """Wrap *embeddings* with the store configured in settings (as-is when disabled).
+
+    With *read_only* the store is only used for lookups (see `EmbeddingStore`).
+    """
+    from backend.config import get_settings
+
+    path = get_settings().EMBEDDING_STORE_PATH
+    if not path:
+        return embeddings
+    model = getattr(embeddings, "model", None) or "unknown"
+    store = EmbeddingStore(Path(path), model, read_only=read_only)
+    logger.info(f"Embedding store {store.path}: {len(store)} stored vectors")
+    return StoredEmbeddings(embeddings, store)
@@ -0,0 +1,90 @@
+"""Metadata filters that scope retrieval to part of the corpus.
+
+Ingestion writes ``type`` (hadith/qa), ``source`` (file name),
+``collection_title`` and ``book_id`` into every document's metadata.  A
+filter is a mapping from some of those fields to one or more accepted values
+(fields are AND-ed, values within a field OR-ed) and is applied *before*
+scoring:
+
+* Pinecone receives it as a native metadata filter (``$in`` per field);
+* the local vector index and the BM25 index keep per-field posting lists of
+  row ids (`MetadataPostings`) and only score the matching rows.
+
+So a hadith-only query gets cheaper as the share of hadith shrinks, instead
+of fetching extra candidates and discarding most of them.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Metadata fields that retrieval can be filtered on.
+FILTER_FIELDS = ("type", "source", "collection_title", "book_id")
+
+# field -> accepted values
+Filters = Dict[str, Tuple[str, ...]]
+
+
+def normalize_filters(filters: Optional[Mapping[str, Union[str, Sequence[str], None]]]) -> Optional[Filters]:
+    """Canonical form of *filters*: known fields only, values as sorted tuples.
+
+    Returns ``None`` when nothing is filtered.  Raises ``ValueError`` on
+    unknown fields so typos do not silently widen a scoped query.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, Mapping):
+        raise ValueError("filters must be an object mapping metadata fields to values")
+    normalized: Filters = {}
+    for field, value in filters.items():
+        if value is None:
+            continue
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Unknown filter field '{field}' (expected one of {', '.join(FILTER_FIELDS)})")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        normalized[field] = tuple(sorted({str(v) for v in values}))
+    return normalized or None
+
+
+def to_pinecone_filter(filters: Optional[Filters]) -> Optional[Dict[str, Any]]:
+    """Translate *filters* to Pinecone's metadata filter syntax."""
+    if not filters:
+        return None
+    return {field: {"$in": list(values)} for field, values in filters.items()}
+
+
+class MetadataPostings:
+    """Sorted row ids per ``(field, value)``, built lazily per field."""
+
+    def __init__(self, metadata: Sequence[Dict[str, Any]]):
+        self._metadata = metadata
+        self._fields: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def _field(self, field: str) -> Dict[str, np.ndarray]:
+        postings = self._fields.get(field)
+        if postings is None:
+            rows: Dict[str, List[int]] = defaultdict(list)
+            for row, meta in enumerate(self._metadata):
+                value = meta.get(field)
+                if value is not None:
+                    rows[str(value)].append(row)
+            postings = {value: np.asarray(ids, dtype=np.int64) for value, ids in rows.items()}
+            self._fields[field] = postings
+        return postings
+
+    def rows(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        """Sorted rows matching *filters*, or ``None`` when unfiltered."""
+        if not filters:
+            return None
+        result: Optional[np.ndarray] = None
+        for field, values in filters.items():
+            postings = self._field(field)
+            parts = [postings[v] for v in values if v in postings]
+            matched = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            result = matched if result is None else np.intersect1d(result, matched, assume_unique=True)
+            if len(result) == 0:
+                break
+        return result
@@ -1,26 +1,67 @@
 #!/usr/bin/env python3
 """
-Script to ingest Islamic content from JSON files into Pinecone index.
-Handles both hadith collections and Q&A format content.
+Script to ingest Islamic content from the content/ directory into Pinecone index.
+Every file is matched to a content adapter (hadith collections, Q&A format
+content, the Qur'an in quran.xml, prophet stories, prayer guides) and the
+files are parsed in parallel processes.
+
+Ingestion is incremental: documents are upserted under deterministic ids
+and a manifest of content hashes (INGEST_MANIFEST_PATH) records what the
+index holds, so a rerun only embeds new or changed documents and deletes
+removed ones.  Pass --full to re-upsert everything; vectors of texts embedded
+before come from the embedding store (EMBEDDING_STORE_PATH), not the API.
+
+Indexes filled before the manifest existed hold their vectors under random
+ids that no manifest can track, and re-ingesting would store every document
+twice.  The first run (no manifest) therefore refuses to touch a non-empty
+index; rerun it once with --clear-index to delete every vector in the index
+and ingest the corpus again under deterministic ids.
+
+Documents longer than CHUNK_MAX_TOKENS are indexed as overlapping chunks
+(see chunking.py); their full texts go to PARENT_STORE_PATH.  When
+compile_corpus.py has compiled the content into CORPUS_ARTIFACT_PATH and
+it is still current, documents are read from there instead of parsed.
+
+--dry-run (or --profile) runs every stage against a stub embedder and
+vector store, writes nothing, and reports per-stage throughput, token
+statistics per file and the embedding cost and time of the run.
 """
 
-import json
+import argparse
+import asyncio
+import functools
+import hashlib
+import itertools
 import os
 import sys
+import time
 import logging
+import xml.etree.ElementTree as ET
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
-from pinecone import Pinecone
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
 from langchain.schema import Document
 
-# Add the backend directory to the Python path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Add the repository root to the Python path so `backend.*` imports resolve
+# when this file is run directly as a script.  Sibling modules are always
+# imported as `backend.*`: importing them bare as well would load each of
+# them twice (two settings objects, two corpus artifact mappings, ...).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import get_settings
+from backend.chunking import ParentStore, iter_chunks
+from backend.config import get_settings
+from backend.content_adapters import AdapterRegistry, ContentAdapter, FileReport, format_reports, parse_corpus
+from backend.context_packer import count_tokens, tokenizer_name
+from backend.corpus_artifact import CorpusArtifact, get_corpus_artifact
+from backend.documents import IngestJournal, IngestManifest, IngestPlan, document_id
+from backend.embedding_store import stored_embeddings
+from backend.ingest_pipeline import IngestPipeline, IngestStats, document_tokens
+from backend.ingest_profile import StageTimer, StubEmbeddings, StubIndex, TokenStats, estimate_embedding, histogram, token_table
+from backend.json_stream import iter_json_array, json_object_keys, json_root_type, read_json_object
+from backend.lexical_index import BM25Index
+from backend.quran_stream import iter_ayat, verse_windows
+from backend.references import SURAH_NAMES_EN
 
 # Configure logging
 logging.basicConfig(
@@ -29,22 +70,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_json_file(file_path: Path) -> Dict[str, Any]:
-    """Load and parse a JSON file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading {file_path}: {str(e)}")
-        return {}
+# Vectors per Pinecone upsert request (the API caps request size at 2 MB)
+PINECONE_UPSERT_BATCH = 100
 
-def process_hadith_collection(data: Dict[str, Any], source_file: str) -> List[Document]:
-    """Process hadith collection format into documents."""
-    documents = []
+def iter_hadith_documents(data: Dict[str, Any], source_file: str) -> Iterator[Document]:
+    """Yield a document per hadith of a collection; `data['hadiths']` may be a stream."""
+    count = 0
     
     if 'hadiths' not in data:
         logger.warning(f"No 'hadiths' key found in {source_file}")
-        return documents
+        return
     
     # Extract metadata about the collection
     collection_title = ""
@@ -97,7 +132,7 @@ def process_hadith_collection(data: Dict[str, Any], source_file: str) -> List[Do
                 "book_id": str(hadith.get('bookId', '')),
                 "chapter_id": str(hadith.get('chapterId', '')),
                 "id_in_book": str(hadith.get('idInBook', '')),
-                "timestamp": datetime.now().isoformat()
+                "token_count": count_tokens(page_content)
             }
             
             # Create the document
@@ -106,18 +141,22 @@ def process_hadith_collection(data: Dict[str, Any], source_file: str) -> List[Do
                 metadata=doc_metadata
             )
             
-            documents.append(doc)
+            count += 1
+            yield doc
             
         except Exception as e:
             logger.error(f"Error processing hadith {hadith.get('id', 'unknown')} in {source_file}: {str(e)}")
             continue
     
-    logger.info(f"Processed {len(documents)} hadiths from {source_file}")
-    return documents
+    logger.info(f"Processed {count} hadiths from {source_file}")
 
-def process_qa_collection(data: List[Dict[str, Any]], source_file: str) -> List[Document]:
-    """Process Q&A format content into documents."""
-    documents = []
+def process_hadith_collection(data: Dict[str, Any], source_file: str) -> List[Document]:
+    """Process hadith collection format into documents."""
+    return list(iter_hadith_documents(data, source_file))
+
+def iter_qa_documents(data: Iterable[Dict[str, Any]], source_file: str) -> Iterator[Document]:
+    """Yield a document per Q&A item; *data* may be a stream."""
+    count = 0
     
     for idx, item in enumerate(data):
         try:
@@ -137,7 +176,7 @@ def process_qa_collection(data: List[Dict[str, Any]], source_file: str) -> List[
                 "type": "qa",
                 "question": question,
                 "item_index": str(idx),
-                "timestamp": datetime.now().isoformat()
+                "token_count": count_tokens(page_content)
             }
             
             # Create the document
@@ -146,14 +185,18 @@ def process_qa_collection(data: List[Dict[str, Any]], source_file: str) -> List[
                 metadata=doc_metadata
             )
             
-            documents.append(doc)
+            count += 1
+            yield doc
             
         except Exception as e:
             logger.error(f"Error processing Q&A item {idx} in {source_file}: {str(e)}")
             continue
     
-    logger.info(f"Processed {len(documents)} Q&A items from {source_file}")
-    return documents
+    logger.info(f"Processed {count} Q&A items from {source_file}")
+
+def process_qa_collection(data: List[Dict[str, Any]], source_file: str) -> List[Document]:
+    """Process Q&A format content into documents."""
+    return list(iter_qa_documents(data, source_file))
 
 def determine_content_type(data: Any) -> str:
     """Determine the type of content based on the data structure."""
@@ -169,26 +212,356 @@ def determine_content_type(data: Any) -> str:
     
     return 'unknown'
 
-def process_json_file(file_path: Path) -> List[Document]:
-    """Process a JSON file and return a list of documents."""
+def iter_json_documents(file_path: Path) -> Iterator[Document]:
+    """Parse a JSON file incrementally and yield its documents.
+
+    Q&A arrays and `hadiths` arrays are decoded one item at a time (see
+    json_stream.py), so memory does not grow with the file size.  A file
+    that turns out to be malformed raises after the documents before the
+    bad spot, so callers can tell it from a file that was fully read.
+    """
     logger.info(f"Processing {file_path.name}...")
-    
-    data = load_json_file(file_path)
-    if not data:
-        return []
-    
-    content_type = determine_content_type(data)
-    
-    if content_type == 'hadith':
-        return process_hadith_collection(data, file_path.name)
-    elif content_type == 'qa':
-        return process_qa_collection(data, file_path.name)
-    else:
-        logger.warning(f"Unknown content type for {file_path.name}")
+
+    try:
+        root = json_root_type(file_path)
+        if root == 'array':
+            items = iter_json_array(file_path)
+            first = next(items, None)
+            if first is None:
+                return
+            if determine_content_type([first]) == 'qa':
+                yield from iter_qa_documents(itertools.chain([first], items), file_path.name)
+                return
+        elif root == 'object':
+            header = read_json_object(file_path, skip=['hadiths'])
+            content_type = determine_content_type(header)
+            if content_type == 'hadith':
+                data = dict(header, hadiths=iter_json_array(file_path, key='hadiths'))
+                yield from iter_hadith_documents(data, file_path.name)
+                return
+            if content_type == 'qa':
+                yield from iter_qa_documents([header], file_path.name)
+                return
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading {file_path}: {str(e)}")
+        raise
+
+    logger.warning(f"Unknown content type for {file_path.name}")
+
+def process_json_file(file_path: Path) -> List[Document]:
+    """Process a JSON file and return a list of documents (none if it is malformed)."""
+    try:
+        return list(iter_json_documents(file_path))
+    except (OSError, ValueError):
         return []
 
-def setup_pinecone_vectorstore() -> PineconeVectorStore:
-    """Initialize Pinecone connection and return vector store."""
+def _quran_document(ayat: List[Any], source_file: str) -> Document:
+    """Document for one aya or a window of consecutive ayat of one surah."""
+    surah, first, last = ayat[0].surah, ayat[0].ayah, ayat[-1].ayah
+    name = SURAH_NAMES_EN[surah - 1] if surah <= len(SURAH_NAMES_EN) else f"Surah {surah}"
+    ref = f"{surah}:{first}" if first == last else f"{surah}:{first}-{last}"
+    verses = "\n\n".join(
+        f"[{ayah.ayah}] {ayah.arabic}\n{ayah.translation}" if len(ayat) > 1 else f"{ayah.arabic}\n{ayah.translation}"
+        for ayah in ayat
+    )
+    page_content = f"Qur'an {ref} (Surah {name})\n\n{verses}"
+    return Document(
+        page_content=page_content,
+        metadata={
+            "source": source_file,
+            "type": "quran",
+            "sura": surah,
+            "aya": first,
+            "aya_end": last,
+            "sura_name": name,
+            "item_index": ref,
+            "token_count": count_tokens(page_content),
+        },
+    )
+
+def iter_quran_documents(file_path: Path) -> Iterator[Document]:
+    """Parse quran.xml incrementally: a document per aya and per verse window.
+
+    Windows are yielded right after their last aya (see quran_stream.py),
+    so only a window's worth of ayat is held at a time.
+    """
+    logger.info(f"Processing {file_path.name}...")
+    settings = get_settings()
+    size = settings.QURAN_WINDOW_AYAT
+    ayat_count = windows = 0
+    # Ayat read but not yet yielded; the windows are computed from the
+    # same single pass over the file
+    pending: List[Any] = []
+
+    def read() -> Iterator[Any]:
+        for ayah in iter_ayat(file_path):
+            pending.append(ayah)
+            yield ayah
+
+    def flush() -> Iterator[Document]:
+        nonlocal ayat_count
+        for ayah in pending:
+            yield _quran_document([ayah], file_path.name)
+        ayat_count += len(pending)
+        pending.clear()
+
+    try:
+        if size <= 1:
+            for _ in read():
+                yield from flush()
+        else:
+            for window in verse_windows(read(), size, settings.QURAN_WINDOW_STRIDE):
+                yield from flush()
+                windows += 1
+                yield _quran_document(window, file_path.name)
+            yield from flush()
+    except (OSError, ET.ParseError) as e:
+        # Raised, not swallowed: the ayat before the bad spot are already out
+        logger.error(f"Error loading {file_path}: {str(e)}")
+        raise
+
+    logger.info(f"Processed {ayat_count} ayat and {windows} verse windows from {file_path.name}")
+
+def iter_prophet_story_documents(file_path: Path) -> Iterator[Document]:
+    """Yield a document per prophet introduction and per story section.
+
+    The file maps a number to ``{prophet: {"Intro": str, "Full Story":
+    {section: [paragraphs]}}}``.
+    """
+    logger.info(f"Processing {file_path.name}...")
+    count = 0
+    try:
+        data = read_json_object(file_path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading {file_path}: {str(e)}")
+        return
+
+    for number, entry in data.items():
+        for prophet, story in (entry or {}).items():
+            sections = [("Intro", [story.get("Intro", "")])]
+            sections += list((story.get("Full Story") or {}).items())
+            for idx, (section, paragraphs) in enumerate(sections):
+                body = "\n\n".join(p.strip() for p in paragraphs if p and p.strip())
+                if not body:
+                    continue
+                page_content = f"{prophet}: {section}\n\n{body}"
+                count += 1
+                yield Document(
+                    page_content=page_content,
+                    metadata={
+                        "source": file_path.name,
+                        "type": "story",
+                        "prophet": prophet,
+                        "section": section,
+                        "item_index": f"{number}.{idx}",
+                        "token_count": count_tokens(page_content),
+                    },
+                )
+
+    logger.info(f"Processed {count} story sections from {file_path.name}")
+
+def _prayer_step(step: Dict[str, Any]) -> str:
+    """One paragraph describing a step of a prayer guide."""
+    label = step.get("id", "").replace("_", " ")
+    if step.get("type"):
+        label += f", {step['type']}"
+    text = f"{step.get('order', '-')}. ({label}) {step.get('description', '').strip()}"
+    wording = " / ".join(w for w in (step.get("arabic"), step.get("transliteration")) if w)
+    if wording:
+        text += f" Wording: {wording}."
+    evidence = step.get("evidence") or step.get("sources")
+    if evidence:
+        text += f" Sources: {'; '.join(evidence) if isinstance(evidence, list) else evidence}."
+    return text
+
+def _prayer_section(title: str, value: Any) -> str:
+    """Paragraph for a free-form section (notes, final tashahhud, taslim...)."""
+    if isinstance(value, dict):
+        value = "; ".join(f"{key.replace('_', ' ')}: {item}" for key, item in value.items())
+    elif isinstance(value, list):
+        value = " ".join(str(item) for item in value)
+    return f"{title}: {value}"
+
+def iter_prayer_guide_documents(file_path: Path) -> Iterator[Document]:
+    """Yield one document describing a step-by-step prayer guide.
+
+    Handles both the flat ``steps`` format and the per-rakʿah format with
+    ``rakʿāt``; long guides are split by the chunking stage.
+    """
+    logger.info(f"Processing {file_path.name}...")
+    try:
+        data = read_json_object(file_path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading {file_path}: {str(e)}")
+        return
+
+    school = data.get("school") or data.get("madhab") or ""
+    title = f"How to pray ({school} school)" if school else "How to pray"
+    if data.get("prayer_type"):
+        title += f", {data['prayer_type']} prayer"
+    paragraphs = [title]
+    if data.get("description"):
+        paragraphs.append(data["description"].strip())
+    for step in data.get("steps", []):
+        paragraphs.append(_prayer_step(step))
+    for rakah in data.get("rakʿāt", []):
+        header = f"Rakʿah {rakah.get('number', '')}"
+        if rakah.get("clone_rakʿah_of"):
+            header += f": as rakʿah {rakah['clone_rakʿah_of']}"
+            if rakah.get("exceptions"):
+                header += f", except: {'; '.join(rakah['exceptions'])}"
+        paragraphs.append(header)
+        for order, step in enumerate(rakah.get("steps", []), 1):
+            paragraphs.append(_prayer_step(dict(step, order=step.get("order", order))))
+    known = {"school", "madhab", "prayer_type", "description", "steps", "rakʿāt"}
+    for key, value in data.items():
+        if key not in known and value:
+            paragraphs.append(_prayer_section(key.replace("_", " ").capitalize(), value))
+
+    page_content = "\n\n".join(paragraphs)
+    yield Document(
+        page_content=page_content,
+        metadata={
+            "source": file_path.name,
+            "type": "prayer_guide",
+            "school": school,
+            "item_index": "guide",
+            "token_count": count_tokens(page_content),
+        },
+    )
+    logger.info(f"Processed prayer guide from {file_path.name}")
+
+# ----------------------------------------------------------------------
+# Content adapters: which parser handles which file in CONTENT_DIR
+# ----------------------------------------------------------------------
+ADAPTERS = AdapterRegistry()
+
+@functools.lru_cache(maxsize=None)
+def _json_shape(file_path: Path) -> Tuple[str, Tuple[str, ...]]:
+    """Root type and top-level keys of a JSON file, read once per file."""
+    if file_path.suffix != ".json":
+        return "other", ()
+    root = json_root_type(file_path)
+    return root, tuple(json_object_keys(file_path)) if root == "object" else ()
+
+def _json_keys(file_path: Path) -> Tuple[str, ...]:
+    return _json_shape(file_path)[1]
+
+ADAPTERS.register("quran-xml", lambda path: path.suffix == ".xml")(iter_quran_documents)
+ADAPTERS.register("hadith-collection", lambda path: "hadiths" in _json_keys(path))(iter_json_documents)
+ADAPTERS.register(
+    "qa-collection",
+    lambda path: _json_shape(path)[0] == "array" or {"question", "answer"} <= set(_json_keys(path)),
+)(iter_json_documents)
+ADAPTERS.register(
+    "prophet-stories",
+    lambda path: bool(_json_keys(path)) and all(key.isdigit() for key in _json_keys(path)),
+)(iter_prophet_story_documents)
+ADAPTERS.register(
+    "prayer-guide",
+    lambda path: "steps" in _json_keys(path) or "rakʿāt" in _json_keys(path),
+)(iter_prayer_guide_documents)
+
+def iter_documents(files: Iterable[Path]) -> Iterator[Document]:
+    """Stream the documents of every file in *files*, each parsed by its adapter."""
+    for file_path in files:
+        adapter = ADAPTERS.adapter_for(file_path)
+        if adapter is None:
+            logger.warning(f"Unknown content type for {file_path.name}")
+            continue
+        yield from adapter.parse(file_path)
+
+# Modules whose code decides what the parsed corpus looks like; changing any
+# of them makes a compiled corpus artifact stale.
+_PARSER_MODULES = ("ingest_content.py", "chunking.py", "quran_stream.py", "json_stream.py", "documents.py")
+
+def corpus_config() -> Dict[str, Any]:
+    """Parser version and settings the parsed corpus depends on (see corpus_artifact.py)."""
+    settings = get_settings()
+    digest = hashlib.sha256()
+    for name in _PARSER_MODULES:
+        digest.update((Path(__file__).parent / name).read_bytes())
+    return {
+        "parser": digest.hexdigest(),
+        "tokenizer": tokenizer_name(),
+        "CHUNK_MAX_TOKENS": settings.CHUNK_MAX_TOKENS,
+        "CHUNK_OVERLAP_TOKENS": settings.CHUNK_OVERLAP_TOKENS,
+        "QURAN_WINDOW_AYAT": settings.QURAN_WINDOW_AYAT,
+        "QURAN_WINDOW_STRIDE": settings.QURAN_WINDOW_STRIDE,
+    }
+
+def load_corpus_artifact(files: List[Tuple[Path, ContentAdapter]]) -> Optional[CorpusArtifact]:
+    """The compiled corpus, if there is one matching *files* and the current settings."""
+    artifact = get_corpus_artifact()
+    if artifact is None:
+        return None
+    stale = artifact.stale_reason([path for path, _ in files], corpus_config())
+    if stale is not None:
+        logger.info(f"Not using corpus artifact {artifact.path}: {stale}; rerun compile_corpus.py")
+        return None
+    return artifact
+
+def iter_artifact_corpus(
+    artifact: CorpusArtifact,
+    files: List[Tuple[Path, ContentAdapter]],
+    parents: Optional[ParentStore] = None,
+    reports: Optional[List[FileReport]] = None,
+) -> Iterator[Document]:
+    """Stream the indexable units of a compiled corpus, like `parse_content` would produce them."""
+    logger.info(f"Loading {len(artifact)} documents from corpus artifact {artifact.path}")
+    if parents is not None:
+        for row in artifact.table("parents").iter_rows():
+            parents.put(row["id"], row["text"], row["token_count"])
+    by_source = {path.name: FileReport(path.name, adapter.name) for path, adapter in files}
+    if reports is not None:
+        reports.extend(by_source.values())
+    for doc in artifact.iter_documents(Document):
+        by_source[doc.metadata["source"]].documents += 1
+        yield doc
+
+def iter_corpus(
+    files: Iterable[Tuple[Path, ContentAdapter]],
+    parents: Optional[ParentStore] = None,
+    reports: Optional[List[FileReport]] = None,
+) -> Iterator[Document]:
+    """Stream the indexable units of *files*: short documents whole, long ones as chunks.
+
+    They are read from the compiled corpus (CORPUS_ARTIFACT_PATH) while it
+    matches *files*, and parsed otherwise (see `parse_content`).
+    """
+    files = list(files)
+    artifact = load_corpus_artifact(files)
+    if artifact is not None:
+        return iter_artifact_corpus(artifact, files, parents, reports)
+    return parse_content(files, parents, reports)
+
+def parse_content(
+    files: Iterable[Tuple[Path, ContentAdapter]],
+    parents: Any = None,
+    reports: Optional[List[FileReport]] = None,
+) -> Iterator[Document]:
+    """Parse and chunk *files* in INGEST_PARSE_WORKERS processes (see content_adapters.py).
+
+    Chunked documents' full texts are saved to *parents* and a per-file
+    `FileReport` is added to *reports* when given.
+    """
+    settings = get_settings()
+    return parse_corpus(
+        files,
+        max_tokens=settings.CHUNK_MAX_TOKENS,
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+        parents=parents,
+        workers=settings.INGEST_PARSE_WORKERS,
+        reports=reports,
+    )
+
+def setup_pinecone_index() -> Tuple["OpenAIEmbeddings", Any]:
+    """Initialize Pinecone connection; returns the embedding model and index."""
+    # Imported here so the document processing helpers above can be reused
+    # (e.g. by build_local_index.py) without the Pinecone client installed.
+    from pinecone import Pinecone
+    from langchain_openai import OpenAIEmbeddings
+
     settings = get_settings()
     
     # Set environment variables for LangChain components
@@ -205,95 +578,363 @@ def setup_pinecone_vectorstore() -> PineconeVectorStore:
     if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():
         raise RuntimeError(f"Pinecone index '{settings.PINECONE_INDEX_NAME}' not found!")
     
-    # Initialize embedding model
-    embeddings = OpenAIEmbeddings()
+    # Initialize embedding model; texts embedded before are read from the
+    # embedding store instead of the API
+    embeddings = stored_embeddings(OpenAIEmbeddings())
     
-    # Create vector store
-    vector_store = PineconeVectorStore(
-        index_name=settings.PINECONE_INDEX_NAME,
-        embedding=embeddings,
-        text_key="text"
+    return embeddings, pc.Index(settings.PINECONE_INDEX_NAME)
+
+def clear_untracked_vectors(index: Any, clear: bool) -> None:
+    """Make sure an index no manifest describes is empty before ingesting into it.
+
+    Raises:
+        RuntimeError: the index holds vectors and *clear* is not set
+    """
+    stats = index.describe_index_stats()
+    stats = stats.to_dict() if hasattr(stats, "to_dict") else dict(stats)
+    count = stats.get("total_vector_count") or 0
+    if not count:
+        return
+    if not clear:
+        raise RuntimeError(
+            f"Pinecone index holds {count} vectors but there is no ingestion manifest "
+            f"({get_settings().INGEST_MANIFEST_PATH}); they were not written by this script and would be "
+            f"duplicated. Rerun with --clear-index to delete them and ingest the whole corpus."
+        )
+    logger.warning(f"Deleting all {count} vectors from the Pinecone index (--clear-index)")
+    index.delete(delete_all=True)
+
+
+def get_content_files() -> List[Tuple[Path, ContentAdapter]]:
+    """Every file in CONTENT_DIR with the adapter that parses it."""
+    return ADAPTERS.discover(Path(get_settings().CONTENT_DIR))
+
+def pinecone_upsert(index: Any, documents: List[Document], vectors: List[List[float]]):
+    """Upsert embedded documents under their deterministic ids.
+
+    The text is stored under the "text" metadata key, where the retrieval
+    side's PineconeVectorStore(text_key="text") reads it.
+    """
+    for i in range(0, len(documents), PINECONE_UPSERT_BATCH):
+        index.upsert(vectors=[
+            {
+                "id": document_id(doc.metadata),
+                "values": vector,
+                "metadata": {**doc.metadata, "text": doc.page_content},
+            }
+            for doc, vector in zip(documents[i:i + PINECONE_UPSERT_BATCH], vectors[i:i + PINECONE_UPSERT_BATCH])
+        ])
+
+def batch_add_documents(
+    embeddings: "OpenAIEmbeddings",
+    index: Any,
+    documents: Iterable[Document],
+    manifest: IngestManifest,
+    journal: Optional[IngestJournal] = None,
+) -> IngestStats:
+    """Embed and upsert a (streamed) sequence of documents concurrently (see ingest_pipeline.py).
+
+    Each upserted batch is recorded in *manifest* and durably appended to
+    *journal*, so an interrupted run resumes without redoing finished
+    batches.  Failing requests are retried with backoff by the pipeline.
+    """
+    settings = get_settings()
+    logger.info(
+        f"Upserting documents to Pinecone with {settings.INGEST_EMBED_CONCURRENCY} "
+        f"concurrent embedding requests of up to {settings.INGEST_BATCH_TOKENS} tokens"
     )
-    
-    return vector_store
-
-def get_new_json_files() -> List[Path]:
-    """Get list of new JSON files to process."""
-    # List of new files mentioned by the user
-    new_files = [
-        "the-quran-and-its-sciences.json",
-        "psychological-and-social-problems.json", 
-        "principles-of-fiqh.json",
-        "pedagogy-education-and-upbringing.json",
-        "knowledge-propagation.json",
-        "islamic-politics.json",
-        "islamic-history-and-biography.json",
-        "hadith-its-sciences.json",
-        "fiqh-of-the-family.json",
-        "etiquette-morals-and-heart-softeners.json",
-        "basic-tenets-of-faith.json"
-    ]
-    
-    content_dir = Path("content")
-    found_files = []
-    
-    for filename in new_files:
-        file_path = content_dir / filename
-        if file_path.exists():
-            found_files.append(file_path)
-            logger.info(f"Found file: {filename}")
-        else:
-            logger.warning(f"File not found: {filename}")
-    
-    return found_files
 
-def batch_add_documents(vector_store: PineconeVectorStore, documents: List[Document], batch_size: int = 100):
-    """Add documents to Pinecone in batches."""
-    logger.info(f"Adding {len(documents)} documents to Pinecone in batches of {batch_size}")
-    
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
-        try:
-            vector_store.add_documents(batch)
-            logger.info(f"Added batch {i//batch_size + 1}: {len(batch)} documents")
-        except Exception as e:
-            logger.error(f"Error adding batch {i//batch_size + 1}: {str(e)}")
-            raise
+    def on_upserted(batch: List[Document]) -> None:
+        manifest.record(batch)
+        if journal is not None:
+            journal.commit(batch)
+
+    pipeline = IngestPipeline(
+        embed=embeddings.embed_documents,
+        upsert=lambda batch, vectors: pinecone_upsert(index, batch, vectors),
+        concurrency=settings.INGEST_EMBED_CONCURRENCY,
+        tokens_per_minute=settings.INGEST_TOKENS_PER_MINUTE,
+        batch_tokens=settings.INGEST_BATCH_TOKENS,
+        batch_documents=settings.INGEST_BATCH_DOCUMENTS,
+        max_retries=settings.INGEST_MAX_RETRIES,
+        on_upserted=on_upserted,
+        lookup=getattr(embeddings, "lookup", None),
+    )
+    return asyncio.run(pipeline.run(documents))
+
+def batch_delete_documents(index: Any, ids: List[str], manifest: IngestManifest, batch_size: int = 1000):
+    """Delete documents that are no longer produced from Pinecone."""
+    logger.info(f"Deleting {len(ids)} removed documents from Pinecone")
+
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        index.delete(ids=batch)
+        manifest.forget(batch)
+        manifest.save()
+
+def build_lexical_index(documents: Iterable[Document]) -> None:
+    """Build and save the BM25 index used for hybrid retrieval over *documents*."""
+    settings = get_settings()
+    ids, texts, metadata = [], [], []
+    for doc in documents:
+        ids.append(document_id(doc.metadata))
+        texts.append(doc.page_content)
+        metadata.append(doc.metadata)
+    index = BM25Index.build(ids=ids, texts=texts, metadata=metadata)
+    index.save(Path(settings.LEXICAL_INDEX_PATH))
+
+def open_journal(manifest: IngestManifest, resume: bool, full: bool) -> IngestJournal:
+    """Fold an interrupted run's journal into *manifest* and start this run's journal.
+
+    With *resume* the interrupted run is continued: its journal is kept,
+    along with its ``--full`` setting.
+    """
+    settings = get_settings()
+    path = Path(settings.INGEST_JOURNAL_PATH)
+    previous = IngestJournal.load(path)
+    if previous is not None and previous.target != manifest.target:
+        logger.warning(f"Ignoring ingestion journal {path} written for '{previous.target}'")
+        previous = None
+
+    if previous is not None:
+        # Those batches reached the index whatever happens next
+        manifest.record_entries(previous.entries)
+        manifest.save()
+        logger.info(
+            f"Interrupted run from {time.ctime(previous.started_at)} committed "
+            f"{len(previous.entries)} documents in {previous.batches} batches"
+        )
+        if resume:
+            logger.info(f"Resuming it after batch {previous.batches}" + (" (--full)" if previous.full else ""))
+            previous.start()
+            return previous
+    elif resume:
+        logger.info("No interrupted run to resume; starting a new one")
+
+    journal = IngestJournal(path, target=manifest.target, full=full)
+    journal.start()
+    return journal
+
+def compact_embedding_store(files: List[Tuple[Path, ContentAdapter]]) -> None:
+    """Rewrite the embedding store keeping only the texts *files* still produce."""
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = stored_embeddings(OpenAIEmbeddings())
+    if not hasattr(embeddings, "store"):
+        logger.warning("No embedding store configured (EMBEDDING_STORE_PATH); nothing to compact")
+        return
+    reports: List[FileReport] = []
+    texts = [doc.page_content for doc in iter_corpus(files, reports=reports)]
+    failed = [report.name for report in reports if report.failed]
+    if failed:
+        logger.error(f"Not compacting the embedding store: failed to parse {', '.join(failed)}")
+        return
+    embeddings.store.compact(texts)
+
+def profile_ingestion(
+    files: List[Tuple[Path, ContentAdapter]],
+    full: bool = False,
+    chunk_tokens: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    stub_latency: float = 0.0,
+) -> str:
+    """Dry run: push *files* through every stage with stubbed embedding and upserts.
+
+    Parsing and chunking run serially in this process so each stage can be
+    timed on its own.  Vectors already in the embedding store count as
+    free, as they would in a real run; nothing is written anywhere.
+    Returns the report.
+    """
+    settings = get_settings()
+    max_tokens = chunk_tokens or settings.CHUNK_MAX_TOKENS
+    tokens_per_minute = settings.INGEST_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+    timer = StageTimer()
+    stats: Dict[str, TokenStats] = defaultdict(TokenStats)
+    manifest = IngestManifest.load(Path(settings.INGEST_MANIFEST_PATH), target=settings.PINECONE_INDEX_NAME)
+    plan = IngestPlan()
+    failed: List[str] = []
+
+    def units() -> Iterator[Document]:
+        for path, adapter in files:
+            source = stats[path.name]
+
+            def parsed() -> Iterator[Document]:
+                for doc in timer.iterate("parse", adapter.parse(path)):
+                    source.documents.append(document_tokens(doc))
+                    yield doc
+
+            chunks = iter_chunks(parsed(), max_tokens, settings.CHUNK_OVERLAP_TOKENS)
+            try:
+                for unit in timer.iterate("chunk", chunks):
+                    source.units.append(document_tokens(unit))
+                    yield unit
+            except Exception as e:
+                logger.error(f"Error parsing {path.name} with {adapter.name}: {e}")
+                failed.append(path.name)
+
+    def changed() -> Iterator[Document]:
+        for doc in timer.iterate("select", manifest.select(units(), plan, force=full)):
+            stats[doc.metadata.get("source", "")].changed_tokens += document_tokens(doc)
+            yield doc
+
+    # Only the lookup of the embedding store is used: stub vectors must never be stored
+    from langchain_openai import OpenAIEmbeddings
+
+    store = stored_embeddings(OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY), read_only=True)
+    stub = StubEmbeddings(latency=stub_latency)
+    index = StubIndex(latency=stub_latency)
+    stub_embed = timer.wrap("embed", stub.embed_documents)
+    api_tokens = 0
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        nonlocal api_tokens
+        api_tokens += sum(count_tokens(text) for text in texts)
+        return stub_embed(texts)
+
+    pipeline = IngestPipeline(
+        embed=embed,
+        upsert=timer.wrap("upsert", lambda batch, vectors: pinecone_upsert(index, batch, vectors)),
+        concurrency=settings.INGEST_EMBED_CONCURRENCY,
+        batch_tokens=settings.INGEST_BATCH_TOKENS,
+        batch_documents=settings.INGEST_BATCH_DOCUMENTS,
+        lookup=getattr(store, "lookup", None),
+    )
+    run = asyncio.run(pipeline.run(changed()))
+    manifest.finish(plan, sources=[path.name for path, _ in files], failed=failed)
+
+    all_units = [tokens for entry in stats.values() for tokens in entry.units]
+    corpus_tokens = sum(all_units)
+    price = settings.EMBEDDING_PRICE_PER_MILLION_TOKENS
+    return "\n\n".join([
+        f"Dry run over {len(files)} files (CHUNK_MAX_TOKENS={max_tokens}); nothing was written.",
+        "Stages:\n" + timer.report(
+            ["parse", "chunk", "select", "embed", "upsert"], exclusive={"chunk": "parse", "select": "chunk"}
+        ) + f"\npipeline: {run.report()}",
+        "Tokens per embedded unit:\n" + token_table(stats),
+        "Token-length histogram:\n" + histogram(all_units),
+        "\n".join([
+            f"{len(plan.seen_ids)} units: {run.documents} new or changed, {plan.unchanged} unchanged, "
+            f"{len(plan.deletes)} to delete; {run.stored} embeddings already stored",
+            "Full reingest:  " + estimate_embedding(corpus_tokens, tokens_per_minute, price),
+            "This run (API): " + estimate_embedding(api_tokens, tokens_per_minute, price),
+        ]),
+    ])
 
 def main():
     """Main function to process and ingest content."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-upsert every document")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run with its options, skipping the batches it committed")
+    parser.add_argument("--compact-embeddings", action="store_true",
+                        help="Drop stored embeddings of texts no longer in the corpus")
+    parser.add_argument("--clear-index", action="store_true",
+                        help="Without a manifest: delete every vector already in the index before ingesting")
+    parser.add_argument("--dry-run", "--profile", dest="dry_run", action="store_true",
+                        help="Run every stage against a stub embedder and vector store and report "
+                             "throughput, token statistics and embedding cost; writes nothing")
+    parser.add_argument("--chunk-tokens", type=int, default=None,
+                        help="With --dry-run: chunk budget to try instead of CHUNK_MAX_TOKENS")
+    parser.add_argument("--tokens-per-minute", type=int, default=None,
+                        help="With --dry-run: rate limit for the time estimate (default INGEST_TOKENS_PER_MINUTE)")
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="With --dry-run: simulated seconds per embedding / upsert request")
+    args = parser.parse_args()
+
     try:
         logger.info("Starting content ingestion process...")
+        settings = get_settings()
         
         # Get list of files to process
-        files_to_process = get_new_json_files()
+        files_to_process = get_content_files()
         
         if not files_to_process:
             logger.warning("No files found to process!")
             return
+
+        if args.dry_run:
+            logger.info(profile_ingestion(
+                files_to_process,
+                full=args.full,
+                chunk_tokens=args.chunk_tokens,
+                tokens_per_minute=args.tokens_per_minute,
+                stub_latency=args.stub_latency,
+            ))
+            return
         
-        # Setup Pinecone vector store
-        logger.info("Setting up Pinecone connection...")
-        vector_store = setup_pinecone_vectorstore()
-        
-        # Process each file and collect documents
-        all_documents = []
-        
-        for file_path in files_to_process:
-            documents = process_json_file(file_path)
-            all_documents.extend(documents)
-        
-        if not all_documents:
+        # Parse -> diff against the manifest -> embed -> upsert run as one
+        # stream: files are parsed incrementally and only as fast as
+        # embedding slots free up, so memory stays flat with corpus size.
+        manifest = IngestManifest.load(Path(settings.INGEST_MANIFEST_PATH), target=settings.PINECONE_INDEX_NAME)
+        journal = open_journal(manifest, resume=args.resume, full=args.full)
+        plan = IngestPlan()
+        parents = ParentStore(Path(settings.PARENT_STORE_PATH))
+        reports: List[FileReport] = []
+        changed = manifest.select(
+            iter_corpus(files_to_process, parents, reports), plan, force=journal.full, committed=journal.entries
+        )
+
+        # Only new or changed documents are embedded; Pinecone is not even
+        # contacted until the first one turns up -- except on the first run,
+        # when vectors of an earlier ingestion must not be left behind.
+        index = None
+        if not len(manifest):
+            logger.info("No ingestion manifest; checking the Pinecone index is empty...")
+            embeddings, index = setup_pinecone_index()
+            try:
+                clear_untracked_vectors(index, clear=args.clear_index)
+            except RuntimeError:
+                journal.remove()
+                raise
+        first = next(changed, None)
+        stats = IngestStats()
+        if first is not None:
+            if index is None:
+                logger.info("Setting up Pinecone connection...")
+                embeddings, index = setup_pinecone_index()
+            stats = batch_add_documents(embeddings, index, itertools.chain([first], changed), manifest, journal)
+
+        logger.info(f"Parsed {len(reports)} files:\n{format_reports(reports)}")
+        manifest.finish(
+            plan,
+            sources=[path.name for path, _ in files_to_process],
+            failed=[report.name for report in reports if report.failed],
+        )
+        # Every committed batch is now in the manifest; the journal is done
+        manifest.save()
+        journal.remove()
+        if not plan.seen_ids:
             logger.warning("No documents to add!")
             return
-        
-        logger.info(f"Total documents to add: {len(all_documents)}")
-        
-        # Add documents to Pinecone in batches
-        batch_add_documents(vector_store, all_documents)
+        logger.info(
+            f"{len(plan.seen_ids)} documents: {stats.documents} upserted, "
+            f"{plan.unchanged} unchanged, {len(plan.deletes)} removed"
+        )
+
+        if plan.deletes:
+            if index is None:
+                logger.info("Setting up Pinecone connection...")
+                _, index = setup_pinecone_index()
+            batch_delete_documents(index, plan.deletes, manifest)
+
+        # Lexical side of hybrid retrieval is rebuilt over the same documents
+        # in a second streaming pass (no embedding calls)
+        build_lexical_index(iter_corpus(files_to_process))
+
+        if args.compact_embeddings:
+            compact_embedding_store(files_to_process)
+
+        if stats.failed_ids:
+            # Failed documents are not in the manifest, so a rerun retries them
+            logger.error(f"{len(stats.failed_ids)} documents failed: {', '.join(stats.failed_ids[:20])}")
+            sys.exit(1)
         
         logger.info("Content ingestion completed successfully!")
-        logger.info(f"Added {len(all_documents)} documents from {len(files_to_process)} files")
+        logger.info(
+            f"Upserted {stats.documents} and deleted {len(plan.deletes)} documents "
+            f"from {len(files_to_process)} files"
+        )
         
     except Exception as e:
         logger.error(f"Error during ingestion: {str(e)}")
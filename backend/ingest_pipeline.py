@@ -0,0 +1,317 @@
+"""Concurrent embed-and-upsert pipeline for ingestion.
+
+Embedding a corpus one 100-document request at a time leaves most of the
+API's rate limit unused: each request waits for the previous embed *and*
+upsert.  `IngestPipeline` instead
+
+* groups documents into batches by token count (`token_batches`), so every
+  request carries a similar payload whatever the document lengths;
+* keeps up to ``concurrency`` embedding requests in flight, each admitted by
+  a tokens-per-minute bucket (`TokenRateLimiter`) so the run stays under the
+  account's TPM limit instead of bouncing off 429s;
+* pulls documents lazily from the (streaming) input and hands embedded
+  batches to upsert workers through a bounded queue, so upserts overlap
+  with the next embeddings and memory stays bounded;
+* retries failed requests with exponential backoff, then splits the batch so
+  one bad document cannot sink its neighbours, and records what still fails
+  instead of aborting the run;
+* with a ``lookup`` (e.g. `backend.embedding_store.StoredEmbeddings.lookup`),
+  documents whose embeddings are already known skip the API and the rate
+  limiter entirely.
+
+Blocking client calls run on worker threads via `asyncio.to_thread`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from backend.context_packer import count_tokens
+from backend.documents import document_id
+
+logger = logging.getLogger(__name__)
+
+# Called with the texts of a batch, returns one embedding per text.
+EmbedFn = Callable[[List[str]], List[List[float]]]
+# Called with a batch of documents and their embeddings.
+UpsertFn = Callable[[List[Any], List[List[float]]], None]
+# Called with the texts of a batch, returns the already known embeddings (None if unknown).
+LookupFn = Callable[[List[str]], List[Optional[List[float]]]]
+
+
+def document_tokens(doc: Any) -> int:
+    """Token count of a document, from its metadata when ingestion recorded it."""
+    tokens = doc.metadata.get("token_count")
+    return int(tokens) if tokens is not None else count_tokens(doc.page_content)
+
+
+def token_batches(documents: Iterable[Any], max_tokens: int, max_documents: int) -> Iterator[List[Any]]:
+    """Group *documents* into batches of at most *max_tokens* / *max_documents*.
+
+    A single document larger than *max_tokens* forms its own batch.
+    """
+    batch: List[Any] = []
+    tokens = 0
+    for doc in documents:
+        doc_tokens = document_tokens(doc)
+        if batch and (tokens + doc_tokens > max_tokens or len(batch) >= max_documents):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(doc)
+        tokens += doc_tokens
+    if batch:
+        yield batch
+
+
+class TokenRateLimiter:
+    """Token bucket holding up to one minute of the tokens-per-minute budget."""
+
+    def __init__(self, tokens_per_minute: int):
+        """Create a full bucket.
+
+        Args:
+            tokens_per_minute: Sustained budget; 0 disables throttling
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until *tokens* (capped at the bucket size) can be spent."""
+        if self.rate <= 0:
+            return
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                wait = (tokens - self.available) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+
+@dataclass
+class IngestStats:
+    """Counters and throughput of one pipeline run."""
+
+    documents: int = 0
+    tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    stored: int = 0  # documents whose embeddings came from `lookup`
+    failed_ids: List[str] = field(default_factory=list)
+    throttled_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    def report(self) -> str:
+        elapsed = max(self.elapsed_seconds, 1e-9)
+        return (
+            f"{self.documents} documents / {self.tokens} tokens in {self.elapsed_seconds:.1f}s "
+            f"({self.documents / elapsed:.1f} docs/s, {self.tokens / elapsed:.0f} tokens/s); "
+            f"{self.requests} embedding requests, {self.stored} stored embeddings reused, {self.retries} retries, "
+            f"{self.throttled_seconds:.1f}s throttled, {len(self.failed_ids)} failed"
+        )
+
+
+class IngestPipeline:
+    """Embed documents with bounded concurrency and upsert them as batches finish."""
+
+    def __init__(
+        self,
+        embed: EmbedFn,
+        upsert: UpsertFn,
+        concurrency: int = 4,
+        tokens_per_minute: int = 0,
+        batch_tokens: int = 20000,
+        batch_documents: int = 256,
+        max_retries: int = 5,
+        upsert_workers: int = 2,
+        on_upserted: Optional[Callable[[List[Any]], None]] = None,
+        lookup: Optional[LookupFn] = None,
+    ):
+        """Configure the pipeline.
+
+        Args:
+            embed: Blocking call embedding a list of texts
+            upsert: Blocking call writing documents with their embeddings
+            concurrency: Embedding requests in flight at once
+            tokens_per_minute: Embedding token budget (0 disables throttling)
+            batch_tokens: Token budget of one embedding request
+            batch_documents: Documents per embedding request at most
+            max_retries: Attempts per request after the first before splitting it
+            upsert_workers: Upserts in flight at once
+            on_upserted: Called (on the event loop) with each upserted batch
+            lookup: Blocking call returning already known embeddings, so
+                only the rest of a batch is embedded (and throttled)
+        """
+        self.embed = embed
+        self.upsert = upsert
+        self.concurrency = max(1, concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self.batch_tokens = batch_tokens
+        self.batch_documents = batch_documents
+        self.max_retries = max_retries
+        self.upsert_workers = max(1, upsert_workers)
+        self.on_upserted = on_upserted
+        self.lookup = lookup
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    async def _with_retries(self, stats: IngestStats, what: str, call: Callable[[], Any]) -> Any:
+        """Run blocking *call* on a thread, retrying with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(call)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+                stats.retries += 1
+                logger.warning(f"{what} failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _embed_batch(
+        self,
+        batch: List[Any],
+        limiter: TokenRateLimiter,
+        queue: "asyncio.Queue[Any]",
+        stats: IngestStats,
+    ) -> None:
+        """Embed *batch* and queue it for upsert; split it if it keeps failing."""
+        tokens = sum(document_tokens(doc) for doc in batch)
+        texts = [doc.page_content for doc in batch]
+        if self.lookup is not None:
+            known = await asyncio.to_thread(self.lookup, texts)
+            stored = [i for i, vector in enumerate(known) if vector is not None]
+            stats.stored += len(stored)
+            if len(stored) == len(batch):
+                await queue.put((batch, known, tokens))
+                return
+            # Only the unknown part of the batch is sent and throttled
+            missing = [i for i, vector in enumerate(known) if vector is None]
+            if stored:
+                known_batch = [batch[i] for i in stored]
+                known_tokens = sum(document_tokens(doc) for doc in known_batch)
+                await queue.put((known_batch, [known[i] for i in stored], known_tokens))
+                batch, texts, tokens = [batch[i] for i in missing], [texts[i] for i in missing], tokens - known_tokens
+        await limiter.acquire(tokens)
+        stats.requests += 1
+        try:
+            vectors = await self._with_retries(stats, f"Embedding {len(batch)} documents", lambda: self.embed(texts))
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Giving up on document {document_id(batch[0].metadata)}: {e}")
+                stats.failed_ids.append(document_id(batch[0].metadata))
+                return
+            half = len(batch) // 2
+            logger.warning(f"Splitting failing batch of {len(batch)} documents")
+            await self._embed_batch(batch[:half], limiter, queue, stats)
+            await self._embed_batch(batch[half:], limiter, queue, stats)
+            return
+        await queue.put((batch, vectors, tokens))
+
+    async def _upsert_worker(
+        self, queue: "asyncio.Queue[Any]", stats: IngestStats, failure: List[BaseException]
+    ) -> None:
+        """Upsert queued batches until the ``None`` sentinel.
+
+        If ``on_upserted`` raises (e.g. the journal cannot be written), the
+        error is kept in *failure* for `run` to re-raise, and the remaining
+        batches are drained unwritten so embed tasks never block on a full
+        queue.
+        """
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                if failure:
+                    continue
+                batch, vectors, tokens = item
+                try:
+                    await self._with_retries(
+                        stats, f"Upserting {len(batch)} documents", lambda: self.upsert(batch, vectors)
+                    )
+                except Exception as e:
+                    logger.error(f"Giving up on upserting {len(batch)} documents: {e}")
+                    stats.failed_ids.extend(document_id(doc.metadata) for doc in batch)
+                    continue
+                stats.documents += len(batch)
+                stats.tokens += tokens
+                if self.on_upserted is not None:
+                    try:
+                        self.on_upserted(batch)
+                    except Exception as e:
+                        logger.error(f"Recording {len(batch)} upserted documents failed; stopping: {e}")
+                        failure.append(e)
+            finally:
+                queue.task_done()
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+    async def run(self, documents: Iterable[Any]) -> IngestStats:
+        """Embed and upsert every document; returns counters and throughput.
+
+        Raises:
+            Exception: the first error of ``on_upserted``, once the batches
+                in flight are cancelled and the upsert workers stopped
+        """
+        stats = IngestStats()
+        started = time.perf_counter()
+        limiter = TokenRateLimiter(self.tokens_per_minute)
+        # Bounded, so embedding pauses when upserts fall behind
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=2 * self.concurrency)
+        failure: List[BaseException] = []
+        workers = [
+            asyncio.create_task(self._upsert_worker(queue, stats, failure)) for _ in range(self.upsert_workers)
+        ]
+
+        # Documents may be a lazy parse stream; batches are pulled on a worker
+        # thread, and only when an embedding slot is free, so parsing never
+        # blocks the event loop or runs ahead of the embedding requests.
+        batches = token_batches(documents, self.batch_tokens, self.batch_documents)
+        in_flight: set = set()
+        try:
+            while not failure:
+                if len(in_flight) >= self.concurrency:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                    continue
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                in_flight.add(asyncio.create_task(self._embed_batch(batch, limiter, queue, stats)))
+            if failure:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            elif in_flight:
+                await asyncio.gather(*in_flight)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in list(in_flight) + workers:
+                task.cancel()
+
+        stats.throttled_seconds = limiter.waited_seconds
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(f"Ingestion throughput: {stats.report()}")
+        if failure:
+            raise failure[0]
+        return stats
@@ -0,0 +1,182 @@
+"""Profiling helpers for ``ingest_content.py --dry-run``.
+
+A dry run pushes the corpus through every ingestion stage -- parse,
+chunk, manifest diff, embed, upsert -- with the embedding model and the
+vector store replaced by local stubs, and reports
+
+* wall time and throughput per stage (`StageTimer`);
+* the token-length distribution of what would be embedded, per source file
+  (`TokenStats`);
+* the embedding cost and the time the run would take at a given
+  tokens-per-minute limit (`estimate_embedding`).
+
+Nothing is written: the manifest, journal, parent store and indexes are
+left untouched.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# Upper bounds of the token-length histogram buckets.
+HISTOGRAM_BOUNDS = (64, 128, 256, 512, 1024, 2048, 4096)
+
+
+class StageTimer:
+    """Thread-safe wall-time and item counters per ingestion stage."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.items: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, items: int = 0) -> None:
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.items[stage] += items
+
+    @contextmanager
+    def measure(self, stage: str, items: int = 0) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, items)
+
+    def iterate(self, stage: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Yield from *iterable*, charging the time spent producing each item to *stage*.
+
+        Time of nested timed iterables is included; `report` takes
+        ``exclusive`` pairs to subtract it.
+        """
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, time.perf_counter() - started)
+                return
+            self.add(stage, time.perf_counter() - started, 1)
+            yield item
+
+    def wrap(self, stage: str, fn: Any, count: Any = len) -> Any:
+        """*fn* timed under *stage*; ``count(first argument)`` items per call."""
+        def timed(arg: Any, *args: Any) -> Any:
+            with self.measure(stage, count(arg)):
+                return fn(arg, *args)
+        return timed
+
+    def report(self, stages: List[str], exclusive: Optional[Dict[str, str]] = None) -> str:
+        """Table of seconds, items and items/s for *stages*.
+
+        *exclusive* maps a stage to the nested stage whose time it includes,
+        e.g. ``{"chunk": "parse"}``.
+        """
+        exclusive = exclusive or {}
+        lines = [f"{'stage':<10} {'seconds':>9} {'items':>9} {'items/s':>11}"]
+        for stage in stages:
+            seconds = self.seconds.get(stage, 0.0)
+            if stage in exclusive:
+                seconds -= self.seconds.get(exclusive[stage], 0.0)
+            seconds = max(seconds, 0.0)
+            items = self.items.get(stage, 0)
+            rate = f"{items / seconds:>11.0f}" if seconds > 0 else f"{'-':>11}"
+            lines.append(f"{stage:<10} {seconds:>9.3f} {items:>9} {rate}")
+        return "\n".join(lines)
+
+
+@dataclass
+class TokenStats:
+    """Token counts of the documents of one source file."""
+
+    documents: List[int] = field(default_factory=list)  # before chunking
+    units: List[int] = field(default_factory=list)  # what is embedded
+    changed_tokens: int = 0  # tokens of new or changed units
+
+    def summary(self) -> Dict[str, float]:
+        units = np.asarray(self.units or [0])
+        return {
+            "documents": len(self.documents),
+            "units": len(self.units),
+            "tokens": int(units.sum()),
+            "p50": float(np.percentile(units, 50)),
+            "p95": float(np.percentile(units, 95)),
+            "max": int(units.max()),
+            "max_document": max(self.documents, default=0),
+        }
+
+
+def token_table(stats: Dict[str, TokenStats]) -> str:
+    """Per-source table of document / unit counts and unit token percentiles."""
+    width = max([len(source) for source in stats] + [6])
+    lines = [
+        f"{'source':<{width}} {'docs':>6} {'units':>6} {'tokens':>10} {'p50':>6} {'p95':>6} {'max':>6} {'max doc':>8}"
+    ]
+    for source, entry in sorted(stats.items()):
+        s = entry.summary()
+        lines.append(
+            f"{source:<{width}} {s['documents']:>6} {s['units']:>6} {s['tokens']:>10} "
+            f"{s['p50']:>6.0f} {s['p95']:>6.0f} {s['max']:>6} {s['max_document']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def histogram(counts: Iterable[int], bounds: Iterable[int] = HISTOGRAM_BOUNDS) -> str:
+    """Text histogram of token counts over *bounds* buckets."""
+    counts = np.asarray(list(counts) or [0])
+    bounds = list(bounds)
+    edges = [0] + bounds + [max(int(counts.max()), bounds[-1]) + 1]
+    totals, _ = np.histogram(counts, bins=edges)
+    peak = max(int(totals.max()), 1)
+    lines = []
+    for lo, hi, total in zip(edges, edges[1:], totals):
+        label = f"{lo}-{hi - 1}" if hi <= bounds[-1] else f">={lo}"
+        lines.append(f"{label:>10} {int(total):>7} {'#' * round(40 * total / peak)}")
+    return "\n".join(lines)
+
+
+def estimate_embedding(tokens: int, tokens_per_minute: int, price_per_million: float) -> str:
+    """Cost and minimum time of embedding *tokens* under a TPM limit."""
+    cost = tokens / 1_000_000 * price_per_million
+    if tokens_per_minute > 0:
+        minutes = tokens / tokens_per_minute
+        duration = f"at least {minutes:.1f} min at {tokens_per_minute:,} tokens/min"
+    else:
+        duration = "no rate limit configured"
+    return f"{tokens:,} tokens: ${cost:,.2f} at ${price_per_million:.2f}/1M tokens, {duration}"
+
+
+class StubEmbeddings:
+    """Embedding model stand-in: constant vectors after an optional simulated latency."""
+
+    model = "stub"
+
+    def __init__(self, dim: int = 1536, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [[0.0] * self.dim for _ in texts]
+
+
+class StubIndex:
+    """Vector store stand-in that accepts and discards upserts."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.vectors = 0
+
+    def upsert(self, vectors: List[Any]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.vectors += len(vectors)
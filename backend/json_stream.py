@@ -0,0 +1,179 @@
+"""Incremental reading of large JSON content files.
+
+`json.load` materialises a whole file (and every object in it) before the
+first item can be processed.  The content files are one big array of Q&A
+items, or an object whose ``hadiths`` array holds the bulk of the data, so
+this module decodes them item by item from a bounded text buffer using
+`json.JSONDecoder.raw_decode`:
+
+* `iter_json_array` yields the items of the top-level array, or of the
+  array stored under a top-level key;
+* `read_json_object` returns the other top-level members of an object,
+  streaming past (not loading) the members named in ``skip``;
+* `json_root_type` and `json_object_keys` let callers sniff a file's format
+  without loading it.
+
+Memory is bounded by the largest single item, not the file.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+_CHUNK_CHARS = 1 << 16
+
+
+class _JSONReader:
+    """Cursor over a JSON text file with a refillable buffer."""
+
+    def __init__(self, f: TextIO, chunk_chars: int = _CHUNK_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, at_least: int = 0) -> bool:
+        """Append more text (dropping consumed text); False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(self.chunk_chars, at_least))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in JSON but found '{found or 'end of file'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read at least as much again as is buffered,
+                # so a large value is re-decoded only O(log n) times.
+                if not self._fill(at_least=len(self.buf) - self.pos):
+                    raise
+                continue
+            # A number cut by the buffer end ("-7." of "-7.5e3") decodes as
+            # a shorter number; make sure its last character is in the buffer.
+            if (
+                isinstance(value, (int, float)) and not self.eof
+                and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)
+                and self._fill(at_least=len(self.buf) - self.pos)
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self) -> Iterator[Any]:
+        """Yield the values of the array starting at the cursor."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def object_keys(self) -> Iterator[str]:
+        """Yield the member names of the object at the cursor.
+
+        After each name the cursor is on the member's value, which the caller
+        must consume (`value` or `array_items`) before resuming iteration.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def skip_value(self) -> None:
+        """Consume the value at the cursor, item by item when it is an array."""
+        if self.peek() == "[":
+            for _ in self.array_items():
+                pass
+        else:
+            self.value()
+
+
+def json_root_type(path: Path) -> str:
+    """"array", "object" or "other" for the top-level value of the file at *path*."""
+    with open(path, encoding="utf-8") as f:
+        first = _JSONReader(f, chunk_chars=256).peek()
+    return {"[": "array", "{": "object"}.get(first, "other")
+
+
+def json_object_keys(path: Path) -> List[str]:
+    """Top-level member names of the object in *path*, streaming past the values."""
+    keys: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        reader = _JSONReader(f)
+        for name in reader.object_keys():
+            keys.append(name)
+            reader.skip_value()
+    return keys
+
+
+def iter_json_array(path: Path, key: Optional[str] = None) -> Iterator[Any]:
+    """Yield the items of the top-level array of *path*, or of the array at top-level *key*."""
+    with open(path, encoding="utf-8") as f:
+        reader = _JSONReader(f)
+        if key is None:
+            yield from reader.array_items()
+            return
+        for name in reader.object_keys():
+            if name == key and reader.peek() == "[":
+                yield from reader.array_items()
+                return
+            reader.skip_value()
+
+
+def read_json_object(path: Path, skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """Top-level members of the object in *path*; members in *skip* map to None unread."""
+    skip = set(skip)
+    members: Dict[str, Any] = {}
+    with open(path, encoding="utf-8") as f:
+        reader = _JSONReader(f)
+        for name in reader.object_keys():
+            if name in skip:
+                reader.skip_value()
+                members[name] = None
+            else:
+                members[name] = reader.value()
+    return members
@@ -0,0 +1,239 @@
+"""BM25 inverted index for keyword-heavy queries.
+
+Transliterated terms ("istikhara", "mahr", "witr") and narrator names are
+often ranked poorly by embedding search alone.  This index is built at ingest
+time over the same documents as the vector store and fused with the dense
+results (see `reciprocal_rank_fusion`).
+
+BM25 term weights only depend on the term frequency, the document length and
+the collection statistics, all of which are fixed once the index is built.
+Each posting therefore stores its final *impact* score, and a query is just a
+concatenation of a few posting slices followed by a sparse sum -- well under a
+millisecond for typical queries, so the dense call still dominates latency.
+
+On disk the index is ``bm25.npz`` (vocabulary, posting offsets, doc ids and
+impacts) plus ``documents.jsonl`` holding the id, text and filterable
+metadata (`backend.filters.FILTER_FIELDS`) of every document.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.filters import FILTER_FIELDS, MetadataPostings
+
+logger = logging.getLogger(__name__)
+
+BM25_FILE = "bm25.npz"
+DOCUMENTS_FILE = "documents.jsonl"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Very common English function words; BM25's idf already down-weights them
+# but dropping them keeps posting lists (and query time) small.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in is it its "
+    "of on or she so that the their them there they this to was we were what when "
+    "which who will with you your".split()
+)
+
+
+def fold(text: str) -> str:
+    """Lower-case *text* and strip combining marks (ā → a, Arabic harakat)."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split *text* into folded word tokens without stopwords."""
+    return [t for t in _TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Impact-precomputed BM25 postings over a fixed document set."""
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        impacts: np.ndarray,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        """Wrap prebuilt postings.
+
+        Args:
+            vocabulary: Term -> term number
+            offsets: ``postings[offsets[t]:offsets[t + 1]]`` are the docs of term ``t``
+            postings: Document rows, grouped by term
+            impacts: BM25 contribution of each posting
+            ids: Document id per row
+            texts: Document text per row
+            metadata: Filterable metadata per row
+        """
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.impacts = impacts
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.metadata = [
+            {field: meta[field] for field in FILTER_FIELDS if field in meta}
+            for meta in (metadata if metadata is not None else [{} for _ in self.ids])
+        ]
+        # Row ids per metadata value, for pre-filtered searches
+        self.filter_index = MetadataPostings(self.metadata)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ------------------------------------------------------------------
+    # Construction & persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """Tokenize *texts* and precompute BM25 impacts for every posting."""
+        term_postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_postings[term].append((row, tf))
+
+        n_docs = max(len(texts), 1)
+        avg_len = float(lengths.mean()) if len(texts) else 0.0
+        norm = k1 * (1 - b + b * lengths / (avg_len or 1.0))
+
+        vocabulary: Dict[str, int] = {}
+        offsets = [0]
+        postings: List[int] = []
+        impacts: List[float] = []
+        for term in sorted(term_postings):
+            entries = term_postings[term]
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            vocabulary[term] = len(vocabulary)
+            for row, tf in entries:
+                postings.append(row)
+                impacts.append(idf * tf * (k1 + 1) / (tf + norm[row]))
+            offsets.append(len(postings))
+
+        logger.info(f"Built BM25 index: {len(texts)} documents, {len(vocabulary)} terms, {len(postings)} postings")
+        return cls(
+            vocabulary,
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(postings, dtype=np.int32),
+            np.asarray(impacts, dtype=np.float32),
+            ids,
+            texts,
+            metadata,
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the index directory at *path*."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.vocabulary, key=self.vocabulary.__getitem__)
+        np.savez(
+            path / BM25_FILE,
+            terms=np.asarray(terms, dtype=str),
+            offsets=self.offsets,
+            postings=self.postings,
+            impacts=self.impacts,
+        )
+        with open(path / DOCUMENTS_FILE, "w", encoding="utf-8") as f:
+            for doc_id, text, meta in zip(self.ids, self.texts, self.metadata):
+                row = {"id": doc_id, "text": text, "metadata": meta}
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        logger.info(f"Saved BM25 index ({len(self)} documents) to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        path = Path(path)
+        with np.load(path / BM25_FILE) as data:
+            terms = data["terms"].tolist()
+            offsets, postings, impacts = data["offsets"], data["postings"], data["impacts"]
+
+        ids: List[str] = []
+        texts: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        with open(path / DOCUMENTS_FILE, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row["id"])
+                texts.append(row["text"])
+                metadata.append(row.get("metadata") or {})
+
+        vocabulary = {term: i for i, term in enumerate(terms)}
+        logger.info(f"Loaded BM25 index from {path}: {len(ids)} documents, {len(vocabulary)} terms")
+        return cls(vocabulary, offsets, postings, impacts, ids, texts, metadata)
+
+    # ------------------------------------------------------------------
+    # Query path
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return ``(row, bm25_score)`` pairs for the *k* best rows.
+
+        When *rows* is given (see `filter_index`) only postings of those rows
+        are accumulated.
+        """
+        slices = []
+        for term in set(tokenize(query)):
+            t = self.vocabulary.get(term)
+            if t is not None:
+                slices.append(slice(self.offsets[t], self.offsets[t + 1]))
+        if not slices:
+            return []
+
+        hits = np.concatenate([self.postings[s] for s in slices])
+        weights = np.concatenate([self.impacts[s] for s in slices])
+        if rows is not None:
+            keep = np.isin(hits, rows)
+            hits, weights = hits[keep], weights[keep]
+            if len(hits) == 0:
+                return []
+        unique_rows, inverse = np.unique(hits, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        k = min(k, len(unique_rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(unique_rows[i]), float(scores[i])) for i in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]],
+    k: int = 60,
+    limit: Optional[int] = None,
+) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: ``score(d) = sum(1 / (k + rank))`` over lists."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ordered[:limit] if limit is not None else ordered
@@ -6,17 +6,30 @@ import asyncio
 import re
 import logging
 import json
+import time
 from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, HTTPException, Body, Request
+from fastapi import FastAPI, HTTPException, Body, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_429_TOO_MANY_REQUESTS
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
+from backend.answer_cache import get_answer_cache
 from backend.config import get_settings
+from backend.context_packer import get_context_packer
+from backend.embedding_cache import get_embedding_cache
+from backend.filters import Filters, normalize_filters
 from backend.llm import chat, moderate, chat_stream
 from backend.models import ChatRequest, ChatResponse, Citation
-from backend.retrieval import retrieve_context
+from backend.references import get_reference_index
+from backend.related_index import get_related_index
+from backend.retrieval import get_retrieval_engine
+from backend.text_search import get_text_search_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,6 +51,27 @@ app.add_middleware(
     expose_headers=["*"],  # Expose headers for streaming responses
 )
 
+# ---------------------------------------------------------------------------
+# Lifecycle hooks
+# ---------------------------------------------------------------------------
+
+
+@app.on_event("startup")
+async def _startup() -> None:
+    """Create and verify the shared retrieval engine once per process."""
+    await get_retrieval_engine().start()
+    # Compile the Qur'an / hadith reference index off the event loop
+    await asyncio.to_thread(get_reference_index)
+    await asyncio.to_thread(get_text_search_index)
+    await asyncio.to_thread(get_related_index)
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    """Stop background tasks owned by the retrieval engine."""
+    await get_retrieval_engine().stop()
+
+
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
@@ -57,6 +91,14 @@ def _extract_citations(text: str) -> List[Citation]:
     return citations
 
 
+def _request_filters(body: Dict[str, Any]) -> Optional[Filters]:
+    """Validate the optional retrieval `filters` of a chat request body."""
+    try:
+        return normalize_filters(body.get("filters"))
+    except ValueError as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Invalid filters: {e}")
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
@@ -110,6 +152,14 @@ async def chat_endpoint(request: Request) -> ChatResponse:
         )
 
     logger.info(f"Processing chat request with query: '{query}'")
+    filters = _request_filters(body)
+
+    # 0️⃣ Exact references ("Q 2:255", "Nawawi 40 hadith 13") are answered
+    # straight from the precompiled index: no moderation, retrieval or LLM.
+    reference_answer = get_reference_index().lookup(query)
+    if reference_answer is not None:
+        logger.info(f"Answered reference query from index: {reference_answer.citations}")
+        return reference_answer
 
     # 1️⃣ Safety: moderation check
     if await moderate(query):
@@ -119,8 +169,9 @@ async def chat_endpoint(request: Request) -> ChatResponse:
         )
 
     # 2️⃣ Retrieve knowledge context
+    engine = get_retrieval_engine()
     try:
-        context_chunks, sim_score = await retrieve_context(query)
+        retrieved = await engine.retrieve(query, filters=filters)
     except Exception as e:
         logger.error(f"Error retrieving context: {str(e)}")
         raise HTTPException(
@@ -128,6 +179,8 @@ async def chat_endpoint(request: Request) -> ChatResponse:
             detail=f"Error retrieving context: {str(e)}",
         )
 
+    context_chunks, sim_score = retrieved.contents, retrieved.max_similarity
+
     # 3️⃣ Fallback when low similarity
     if sim_score < settings.CONFIDENCE_THRESHOLD:
         return ChatResponse(
@@ -136,9 +189,17 @@ async def chat_endpoint(request: Request) -> ChatResponse:
             confidence=sim_score,
         )
 
-    # 4️⃣ Generate answer from LLM
+    # 3️⃣b Paraphrase of a recent question over the same context
+    answer_cache = get_answer_cache()
+    index_version = engine.index_version
+    cached = answer_cache.get(retrieved.query_embedding, retrieved.ids, index_version)
+    if cached is not None:
+        return cached
+
+    # 4️⃣ Generate answer from LLM over the token-budgeted context
+    packed = get_context_packer().pack(context_chunks, retrieved.token_counts)
     try:
-        answer, model_conf = await chat(context_chunks, query)
+        answer, model_conf = await chat(packed.contents, query)
     except Exception as e:
         logger.error(f"Error generating answer: {str(e)}")
         raise HTTPException(
@@ -153,6 +214,7 @@ async def chat_endpoint(request: Request) -> ChatResponse:
     overall_conf = (sim_score + model_conf) / 2
 
     response = ChatResponse(answer=answer, citations=citations, confidence=overall_conf)
+    answer_cache.put(retrieved.query_embedding, retrieved.ids, response, index_version)
     logger.info(f"Returning response: {response}")
     return response
 
@@ -205,6 +267,28 @@ async def chat_stream_endpoint(request: Request) -> StreamingResponse:
         )
 
     logger.info(f"Processing streaming chat request with query: '{query}'")
+    filters = _request_filters(body)
+
+    # 0️⃣ Exact references are answered straight from the precompiled index
+    reference_answer = get_reference_index().lookup(query)
+    if reference_answer is not None:
+        logger.info(f"Streaming reference query from index: {reference_answer.citations}")
+
+        async def reference_response():
+            yield f"data: {reference_answer.answer}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(
+            reference_response(),
+            media_type="text/plain",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+                "Access-Control-Allow-Headers": "*",
+            }
+        )
 
     # 1️⃣ Safety: moderation check
     if await moderate(query):
@@ -215,7 +299,7 @@ async def chat_stream_endpoint(request: Request) -> StreamingResponse:
 
     # 2️⃣ Retrieve knowledge context
     try:
-        context_chunks, sim_score = await retrieve_context(query)
+        retrieved = await get_retrieval_engine().retrieve(query, filters=filters)
     except Exception as e:
         logger.error(f"Error retrieving context for streaming: {str(e)}")
         raise HTTPException(
@@ -223,6 +307,8 @@ async def chat_stream_endpoint(request: Request) -> StreamingResponse:
             detail=f"Error retrieving context: {str(e)}",
         )
 
+    sim_score = retrieved.max_similarity
+
     # 3️⃣ Handle low similarity case
     if sim_score < settings.CONFIDENCE_THRESHOLD:
         async def low_confidence_response():
@@ -241,7 +327,9 @@ async def chat_stream_endpoint(request: Request) -> StreamingResponse:
             }
         )
 
-    # 4️⃣ Stream the response
+    # 4️⃣ Stream the response over the token-budgeted context
+    context_chunks = get_context_packer().pack(retrieved.contents, retrieved.token_counts).contents
+
     async def generate_stream():
         """Generate Server-Sent Events formatted stream."""
         try:
@@ -273,10 +361,69 @@ async def chat_stream_endpoint(request: Request) -> StreamingResponse:
     )
 
 
+@app.get("/search")
+async def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Arabic or English words"),
+    type: Optional[str] = Query(None, pattern="^(quran|hadith)$", description="Restrict to ayat or hadith"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Full-text search over Qur'an ayat and hadith, Arabic diacritic-insensitive.
+
+    Every query word must appear; exact phrase matches rank first.  Results
+    carry the original text plus `<mark>`-highlighted HTML.
+    """
+    started = time.perf_counter()
+    total, results = get_text_search_index().search(q, kind=type, limit=limit)
+    return {
+        "query": q,
+        "total": total,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": results,
+    }
+
+
+@app.get("/related/{doc_id:path}")
+async def related_endpoint(doc_id: str, k: int = Query(5, ge=1, le=50)):
+    """Precomputed nearest neighbours of a corpus document (see build_related_index.py).
+
+    Served from the in-memory graph: no embedding or vector search per call.
+    """
+    related_index = get_related_index()
+    if related_index is None:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Related-items graph has not been built",
+        )
+    related = related_index.related(doc_id, k)
+    if related is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"Unknown document id '{doc_id}'")
+    return {"id": doc_id, "related": related}
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring and load balancers."""
-    return {"status": "healthy", "version": "1.0.0"}
+    """Health check endpoint for monitoring and load balancers.
+
+    Reports 503 while a configured retrieval engine is not ready so load
+    balancers hold traffic until startup checks have passed.
+    """
+    retrieval = get_retrieval_engine().health()
+    if retrieval["status"] == "unavailable":
+        return JSONResponse(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "version": "1.0.0", "retrieval": retrieval},
+        )
+    return {"status": "healthy", "version": "1.0.0", "retrieval": retrieval}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for caches and retrieval, as JSON."""
+    return {
+        "embedding_cache": get_embedding_cache().stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "context_packer": get_context_packer().stats(),
+    }
 
 
 @app.get("/")
@@ -288,7 +435,10 @@ async def api_info():
         "endpoints": {
             "/chat": "Standard chat completion endpoint",
             "/chat/stream": "Streaming chat completion endpoint (SSE format)",
-            "/health": "Health check endpoint"
+            "/search": "Arabic/English full-text search over Qur'an and hadith",
+            "/related/{id}": "Precomputed related documents for a corpus document id",
+            "/health": "Health check and retrieval readiness endpoint",
+            "/metrics": "Cache and retrieval counters"
         },
         "streaming": {
             "format": "Server-Sent Events (SSE)",
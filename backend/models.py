@@ -1,4 +1,4 @@
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, constr, validator
 
@@ -21,6 +21,9 @@ class ChatRequest(BaseModel):
     query: constr(strip_whitespace=True, min_length=3)
     messages: Optional[List[Message]] = None
     session_id: Optional[str] = None
+    # Restrict retrieval by document metadata, e.g. {"type": "hadith"} or
+    # {"source": ["fiqh-of-the-family.json"]}; see backend/filters.py.
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None
 
 
 class Citation(BaseModel):
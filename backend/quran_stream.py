@@ -0,0 +1,67 @@
+"""Incremental reading of `content/quran.xml` for ingestion.
+
+The file holds 6,236 ``<aya>`` elements (vowelled Arabic in ``text``, an
+English ``<translation>`` child) grouped in ``<sura>`` elements.  `iter_ayat`
+streams them with `xml.etree.ElementTree.iterparse`, clearing every element
+once read, so memory does not depend on the file size.  `verse_windows`
+groups the stream into overlapping runs of consecutive ayat within a surah;
+ingestion indexes both, so a query matches a single verse or a passage
+whose meaning spans several.
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List
+
+from backend.references import Ayah
+
+
+def iter_ayat(path: Path) -> Iterator[Ayah]:
+    """Yield every aya of *path* in mushaf order."""
+    root = None
+    surah = 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            elif elem.tag == "sura":
+                surah = int(elem.get("index"))
+        elif elem.tag == "aya":
+            translation = elem.findtext("translation") or ""
+            yield Ayah(surah, int(elem.get("index")), elem.get("text", ""), translation.strip())
+            elem.clear()
+        elif elem.tag == "sura":
+            # Drop the emptied aya elements of the finished surah as well
+            root.clear()
+
+
+def verse_windows(ayat: Iterable[Ayah], size: int, stride: int) -> Iterator[List[Ayah]]:
+    """Runs of *size* consecutive ayat, starting every *stride* ayat, within each surah.
+
+    The last run of a surah is aligned to its end so every aya is covered;
+    a surah shorter than *size* is one run.  Runs of a single aya (which
+    would duplicate the aya itself) are not produced.
+    """
+    stride = max(1, min(stride, size))
+    recent: Deque[Ayah] = deque(maxlen=size)
+    since = 0  # ayat added since the last run
+    covered = 0  # last aya of the last run
+
+    def tail() -> Iterator[List[Ayah]]:
+        if len(recent) > 1 and recent[-1].ayah != covered:
+            yield list(recent)
+
+    for ayah in ayat:
+        if recent and ayah.surah != recent[-1].surah:
+            yield from tail()
+            recent.clear()
+            since = covered = 0
+        recent.append(ayah)
+        since += 1
+        if len(recent) == size and (covered == 0 or since >= stride):
+            yield list(recent)
+            since, covered = 0, ayah.ayah
+    yield from tail()
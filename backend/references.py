@@ -0,0 +1,414 @@
+"""Exact Qur'an / hadith reference lookups that bypass retrieval and the LLM.
+
+A large share of questions are plain references -- "what does Q 2:255 say",
+"Bukhari 1/2", "Nawawi 40 hadith 13", "surat al-Kahf 10".  Sending those
+through moderation, embeddings, vector search and a full GPT call is slow and
+risks a paraphrased answer.  Instead `ReferenceIndex` is compiled once from
+`content/quran.xml` and `content/ahadith.json` into plain dictionaries, and
+`ReferenceIndex.lookup` recognises reference-only queries so `/chat` can
+answer them directly in microseconds with proper citations.  Anything that
+is not purely a reference ("explain Q 2:255 ...") falls through to RAG.
+When the corpus has been compiled (`backend/compile_corpus.py`), the
+dictionaries are filled from the artifact's tables instead of the raw files.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.lexical_index import fold
+from backend.models import ChatResponse, Citation
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on ayat returned for a range such as "2:1-300".
+MAX_RANGE_AYAT = 10
+
+# Tables `ReferenceIndex.to_tables` adds to the corpus artifact; bump the
+# version when their layout or the parsing above changes.
+REFERENCE_TABLES = ("surahs", "ayat", "hadith")
+REFERENCE_TABLES_VERSION = 1
+
+# Transliterated surah names in mushaf order (kept in sync with the list in
+# app/api/quran/route.js).
+SURAH_NAMES_EN: Tuple[str, ...] = (
+    "Al-Fatihah", "Al-Baqarah", "Aali Imran", "An-Nisa", "Al-Ma'idah", "Al-An'am",
+    "Al-A'raf", "Al-Anfal", "At-Tawbah", "Yunus", "Hud", "Yusuf", "Ar-Ra'd",
+    "Ibrahim", "Al-Hijr", "An-Nahl", "Al-Isra", "Al-Kahf", "Maryam", "Ta-Ha",
+    "Al-Anbiya", "Al-Hajj", "Al-Mu'minun", "An-Nur", "Al-Furqan", "Ash-Shu'ara",
+    "An-Naml", "Al-Qasas", "Al-Ankabut", "Ar-Rum", "Luqman", "As-Sajdah",
+    "Al-Ahzab", "Saba", "Fatir", "Ya-Sin", "As-Saffat", "Sad", "Az-Zumar",
+    "Ghafir", "Fussilat", "Ash-Shura", "Az-Zukhruf", "Ad-Dukhan", "Al-Jathiyah",
+    "Al-Ahqaf", "Muhammad", "Al-Fath", "Al-Hujurat", "Qaf", "Adh-Dhariyat",
+    "At-Tur", "An-Najm", "Al-Qamar", "Ar-Rahman", "Al-Waqi'ah", "Al-Hadid",
+    "Al-Mujadila", "Al-Hashr", "Al-Mumtahanah", "As-Saff", "Al-Jumu'ah",
+    "Al-Munafiqun", "At-Taghabun", "At-Talaq", "At-Tahrim", "Al-Mulk", "Al-Qalam",
+    "Al-Haqqah", "Al-Ma'arij", "Nuh", "Al-Jinn", "Al-Muzzammil", "Al-Muddathir",
+    "Al-Qiyamah", "Al-Insan", "Al-Mursalat", "An-Naba", "An-Nazi'at", "Abasa",
+    "At-Takwir", "Al-Infitar", "Al-Mutaffifin", "Al-Inshiqaq", "Al-Buruj",
+    "At-Tariq", "Al-A'la", "Al-Ghashiyah", "Al-Fajr", "Al-Balad", "Ash-Shams",
+    "Al-Layl", "Ad-Duha", "Ash-Sharh", "At-Tin", "Al-Alaq", "Al-Qadr", "Al-Bayyinah",
+    "Az-Zalzalah", "Al-Adiyat", "Al-Qari'ah", "At-Takathur", "Al-Asr", "Al-Humazah",
+    "Al-Fil", "Quraysh", "Al-Ma'un", "Al-Kawthar", "Al-Kafirun", "An-Nasr",
+    "Al-Masad", "Al-Ikhlas", "Al-Falaq", "An-Nas",
+)
+
+# Spoken collection names -> collection key used in the index.
+COLLECTION_ALIASES: Dict[str, str] = {
+    "nawawi": "nawawi40",
+    "an nawawi": "nawawi40",
+    "al nawawi": "nawawi40",
+    "imam nawawi": "nawawi40",
+    "nawawi 40": "nawawi40",
+    "nawawi forty": "nawawi40",
+    "40 hadith": "nawawi40",
+    "forty hadith": "nawawi40",
+    "arbain": "nawawi40",
+    "arbaeen": "nawawi40",
+    "bukhari": "bukhari",
+    "sahih bukhari": "bukhari",
+    "sahih al bukhari": "bukhari",
+    "muslim": "muslim",
+    "sahih muslim": "muslim",
+}
+
+COLLECTION_LABELS: Dict[str, str] = {
+    "nawawi40": "Nawawi 40",
+    "bukhari": "Bukhari",
+    "muslim": "Muslim",
+}
+
+# Words that may surround a reference without changing the intent of the
+# query ("what does Q 2:255 say?").  Anything else means the user wants an
+# explanation, which goes through the normal RAG pipeline.
+_FILLER_WORDS = frozenset(
+    "a an the of in from what whats does do did say says said show me read recite "
+    "quote text translation meaning please is it give tell about verse verses ayah "
+    "ayat aya ayahs hadith hadeeth number no surah sura surat chapter q quran koran "
+    "qur an book and".split()
+)
+
+_ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+_APOSTROPHES_RE = re.compile(r"[’‘ʿʾ'`]")
+_NON_WORD_RE = re.compile(r"[^\w:/\-]+")
+_ARTICLE_RE = re.compile(r"^(?:aal|al|an|ar|as|ash|at|ad|adh|az|ال)")
+
+_QURAN_NUMERIC_RE = re.compile(
+    r"\b(?:q|quran|qur an|koran|surah|sura|surat)?\s*(\d{1,3})\s*[:.]\s*(\d{1,3})(?:\s*-\s*(\d{1,3}))?\b"
+)
+_NUMBER_RE = re.compile(r"(\d{1,4})(?:\s*-\s*(\d{1,3}))?")
+_HADITH_RE = re.compile(
+    r"\b(" + "|".join(sorted((re.escape(a) for a in COLLECTION_ALIASES), key=len, reverse=True)) + r")\b"
+    r"[^\d]*?(?:(\d{1,4})\s*[/:]\s*)?(\d{1,5})\b"
+)
+
+
+@dataclass(frozen=True)
+class Reference:
+    """A parsed reference: Qur'an ayat or a single hadith."""
+
+    kind: str  # "quran" | "hadith"
+    surah: int = 0
+    ayah_start: int = 0
+    ayah_end: int = 0
+    collection: str = ""
+    book: Optional[int] = None
+    number: int = 0
+
+
+@dataclass
+class Ayah:
+    surah: int
+    ayah: int
+    arabic: str
+    translation: str
+
+
+@dataclass
+class HadithEntry:
+    collection: str
+    book: Optional[int]
+    number: int
+    narrator: str
+    text: str
+    arabic: str
+
+
+def normalize_text(text: str) -> str:
+    """Folded, punctuation-light form of *text* used for reference parsing."""
+    text = fold(text.translate(_ARABIC_DIGITS))
+    text = _APOSTROPHES_RE.sub("", text)
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def _name_keys(name: str) -> List[str]:
+    """Lookup keys for a surah name, with and without article / final 'h'."""
+    words = re.split(r"[\s\-]+", normalize_text(name))
+    base = "".join(words)
+    keys = {base, _ARTICLE_RE.sub("", base)}
+    if len(words) > 1:
+        keys.add("".join(words[1:]))
+    keys |= {k[:-1] for k in keys if k.endswith("h") and len(k) > 3}
+    return [k for k in keys if len(k) >= 2]
+
+
+class ReferenceIndex:
+    """Precompiled Qur'an and hadith lookups keyed by reference."""
+
+    def __init__(self):
+        self.ayat: Dict[Tuple[int, int], Ayah] = {}
+        self.surah_lengths: Dict[int, int] = {}
+        self.surah_names: Dict[int, Tuple[str, str]] = {}
+        self.name_to_surah: Dict[str, int] = {}
+        self.hadith: Dict[Tuple[str, Optional[int], int], HadithEntry] = {}
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, content_dir: Path) -> "ReferenceIndex":
+        index = cls()
+        quran_path = Path(content_dir) / "quran.xml"
+        hadith_path = Path(content_dir) / "ahadith.json"
+
+        if quran_path.exists():
+            index._load_quran(quran_path)
+        else:
+            logger.warning(f"Qur'an file not found: {quran_path}")
+        if hadith_path.exists():
+            index._load_hadith(hadith_path)
+        else:
+            logger.warning(f"Hadith file not found: {hadith_path}")
+
+        logger.info(f"Reference index built: {len(index.ayat)} ayat, {len(index.hadith)} hadith")
+        return index
+
+    @classmethod
+    def from_artifact(cls, artifact: Any, content_dir: Path) -> Optional["ReferenceIndex"]:
+        """Rebuild the index from the tables of a compiled corpus (see `backend.corpus_artifact`).
+
+        Returns None when the artifact lacks the tables or no longer matches
+        the reference files in *content_dir*.
+        """
+        files = [path for path in (Path(content_dir) / "quran.xml", Path(content_dir) / "ahadith.json") if path.exists()]
+        stale = artifact.stale_reason(files, {"reference_tables": REFERENCE_TABLES_VERSION}, exact=False)
+        if stale is None and not set(REFERENCE_TABLES) <= set(artifact.tables):
+            stale = "it has no reference tables"
+        if stale is not None:
+            logger.info(f"Not loading the reference index from {artifact.path}: {stale}")
+            return None
+
+        index = cls()
+        for row in artifact.table("surahs").iter_rows():
+            index._add_surah(row["surah"], row.get("arabic_name", ""))
+        for row in artifact.table("ayat").iter_rows():
+            index._add_ayah(Ayah(row["surah"], row["ayah"], row.get("arabic", ""), row.get("translation", "")))
+        for row in artifact.table("hadith").iter_rows():
+            entry = HadithEntry(**{"book": None, **row})
+            index.hadith[(entry.collection, entry.book, entry.number)] = entry
+        logger.info(f"Reference index loaded from {artifact.path}: {len(index.ayat)} ayat, {len(index.hadith)} hadith")
+        return index
+
+    def to_tables(self) -> Dict[str, Dict[str, List[Any]]]:
+        """Columns of the surah, aya and hadith tables, for the corpus artifact."""
+        surahs = sorted(self.surah_names)
+        ayat = [self.ayat[key] for key in sorted(self.ayat)]
+        hadith = list(self.hadith.values())
+        return {
+            "surahs": {
+                "surah": surahs,
+                "arabic_name": [self.surah_names[surah][1] for surah in surahs],
+            },
+            "ayat": {
+                "surah": [a.surah for a in ayat],
+                "ayah": [a.ayah for a in ayat],
+                "arabic": [a.arabic for a in ayat],
+                "translation": [a.translation for a in ayat],
+            },
+            "hadith": {
+                "collection": [h.collection for h in hadith],
+                "book": [h.book for h in hadith],
+                "number": [h.number for h in hadith],
+                "narrator": [h.narrator for h in hadith],
+                "text": [h.text for h in hadith],
+                "arabic": [h.arabic for h in hadith],
+            },
+        }
+
+    def _add_surah(self, surah: int, arabic_name: str) -> None:
+        english_name = SURAH_NAMES_EN[surah - 1] if surah <= len(SURAH_NAMES_EN) else f"Surah {surah}"
+        self.surah_names[surah] = (english_name, arabic_name)
+        for key in _name_keys(english_name) + _name_keys(arabic_name):
+            self.name_to_surah.setdefault(key, surah)
+
+    def _add_ayah(self, ayah: Ayah) -> None:
+        self.ayat[(ayah.surah, ayah.ayah)] = ayah
+        self.surah_lengths[ayah.surah] = max(self.surah_lengths.get(ayah.surah, 0), ayah.ayah)
+
+    def _load_quran(self, path: Path) -> None:
+        surah = 0
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start" and elem.tag == "sura":
+                surah = int(elem.get("index"))
+                self._add_surah(surah, elem.get("name", ""))
+            elif event == "end" and elem.tag == "aya":
+                translation = elem.findtext("translation") or ""
+                self._add_ayah(Ayah(surah, int(elem.get("index")), elem.get("text", ""), translation.strip()))
+                elem.clear()
+
+    def _load_hadith(self, path: Path) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        title = (data.get("metadata", {}).get("english", {}) or {}).get("title", "")
+        collection = COLLECTION_ALIASES.get("nawawi") if "nawawi" in title.lower() else normalize_text(title)
+
+        for hadith in data.get("hadiths", []):
+            english = hadith.get("english") or {}
+            if isinstance(english, str):
+                english = {"text": english}
+            entry = HadithEntry(
+                collection=collection,
+                # Single-book collections such as the Forty are referenced by number only
+                book=None if collection == "nawawi40" else hadith.get("bookId"),
+                number=int(hadith.get("idInBook", 0)),
+                narrator=(english.get("narrator") or "").strip(),
+                text=(english.get("text") or "").strip(),
+                arabic=(hadith.get("arabic") or "").strip(),
+            )
+            self.hadith[(entry.collection, entry.book, entry.number)] = entry
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+    def parse(self, query: str) -> Optional[Reference]:
+        """Return the reference if *query* is nothing but a reference."""
+        text = normalize_text(query)
+
+        match = _HADITH_RE.search(text)
+        if match:
+            number_start = match.start(2) if match.group(2) else match.start(3)
+            gap = text[match.end(1):number_start].split()
+            if not _only_filler(text, match) or any(w not in _FILLER_WORDS for w in gap):
+                return None
+            collection = COLLECTION_ALIASES[match.group(1)]
+            book = int(match.group(2)) if match.group(2) else None
+            return Reference(kind="hadith", collection=collection, book=book, number=int(match.group(3)))
+
+        match = _QURAN_NUMERIC_RE.search(text)
+        if match:
+            if not _only_filler(text, match):
+                return None
+            start = int(match.group(2))
+            end = int(match.group(3)) if match.group(3) else start
+            return Reference(kind="quran", surah=int(match.group(1)), ayah_start=start, ayah_end=end)
+
+        return self._parse_named_surah(text)
+
+    def _parse_named_surah(self, text: str) -> Optional[Reference]:
+        """Handle "surat al-kahf 10" / "baqarah verse 255" / Arabic names."""
+        for number in _NUMBER_RE.finditer(text):
+            words = text[:number.start()].split()
+            # Drop connecting words between the name and the number
+            while words and words[-1] in ("ayah", "aya", "ayat", "verse", "v", "آية", "اية"):
+                words.pop()
+            for size in (3, 2, 1):
+                if len(words) < size:
+                    continue
+                key = "".join(words[-size:]).replace("-", "")
+                surah = self.name_to_surah.get(key) or self.name_to_surah.get(_ARTICLE_RE.sub("", key))
+                if surah is None:
+                    continue
+                residue = words[:-size] + text[number.end():].split()
+                if any(w not in _FILLER_WORDS and w not in ("سورة", "سوره") for w in residue):
+                    return None
+                start = int(number.group(1))
+                end = int(number.group(2)) if number.group(2) else start
+                return Reference(kind="quran", surah=surah, ayah_start=start, ayah_end=end)
+        return None
+
+    # ------------------------------------------------------------------
+    # Answering
+    # ------------------------------------------------------------------
+    def answer(self, reference: Reference) -> Optional[ChatResponse]:
+        """Build a `ChatResponse` for *reference*, or ``None`` if unknown."""
+        if reference.kind == "quran":
+            return self._answer_quran(reference)
+        return self._answer_hadith(reference)
+
+    def _answer_quran(self, ref: Reference) -> Optional[ChatResponse]:
+        length = self.surah_lengths.get(ref.surah)
+        if not length or not 1 <= ref.ayah_start <= length or ref.ayah_end < ref.ayah_start:
+            return None
+        end = min(ref.ayah_end, length, ref.ayah_start + MAX_RANGE_AYAT - 1)
+
+        english_name, arabic_name = self.surah_names[ref.surah]
+        span = f"{ref.ayah_start}" if end == ref.ayah_start else f"{ref.ayah_start}-{end}"
+        parts = [f"**Surah {english_name} ({arabic_name}) {ref.surah}:{span}**"]
+        citations = []
+        for ayah in range(ref.ayah_start, end + 1):
+            entry = self.ayat[(ref.surah, ayah)]
+            parts.append(f"{entry.arabic}\n\n*{entry.translation}* [[Q {ref.surah}:{ayah}]]")
+            citations.append(Citation(type="quran", ref=f"{ref.surah}:{ayah}"))
+
+        return ChatResponse(answer="\n\n".join(parts), citations=citations, confidence=1.0)
+
+    def _answer_hadith(self, ref: Reference) -> Optional[ChatResponse]:
+        entry = self.hadith.get((ref.collection, ref.book, ref.number))
+        if entry is None:
+            return None
+
+        label = COLLECTION_LABELS.get(entry.collection, entry.collection.title())
+        cite = f"{label} {entry.book}/{entry.number}" if entry.book is not None else f"{label}, hadith {entry.number}"
+        parts = [f"**{cite}**"]
+        if entry.narrator:
+            parts.append(entry.narrator)
+        if entry.text:
+            parts.append(f"*{entry.text}*")
+        if entry.arabic:
+            parts.append(entry.arabic)
+
+        return ChatResponse(
+            answer="\n\n".join(parts),
+            citations=[Citation(type="hadith", ref=cite)],
+            confidence=1.0,
+        )
+
+    def lookup(self, query: str) -> Optional[ChatResponse]:
+        """Answer *query* directly if it is a known reference, else ``None``."""
+        reference = self.parse(query)
+        if reference is None:
+            return None
+        return self.answer(reference)
+
+
+def _only_filler(text: str, match: "re.Match[str]") -> bool:
+    """True when everything around *match* in *text* is filler words."""
+    residue = (text[:match.start()] + " " + text[match.end():]).split()
+    return all(w in _FILLER_WORDS for w in residue)
+
+
+# Global reference index instance
+_reference_index: Optional[ReferenceIndex] = None
+
+
+def get_reference_index() -> ReferenceIndex:
+    """Get the global reference index: from the corpus artifact when current, else built from content."""
+    global _reference_index
+    if _reference_index is None:
+        from backend.config import get_settings
+        from backend.corpus_artifact import get_corpus_artifact
+
+        content_dir = Path(get_settings().CONTENT_DIR)
+        artifact = get_corpus_artifact()
+        if artifact is not None:
+            _reference_index = ReferenceIndex.from_artifact(artifact, content_dir)
+        if _reference_index is None:
+            _reference_index = ReferenceIndex.build(content_dir)
+    return _reference_index
@@ -0,0 +1,214 @@
+"""Precomputed "related items" graph over the local vector index.
+
+Related-verse / related-hadith panels need the nearest neighbours of a
+document that is already in the corpus, so the answer never changes between
+index builds.  `RelatedIndex.build` computes the k-nearest-neighbour graph of
+every row once, offline (exact blocked matrix products, or one query per row
+against an IVF index for large corpora), and stores it next to the local
+index as ``related.npz``:
+
+    ids         (n,) document ids
+    neighbours  (n, k) int32 row of each neighbour, best first
+    scores      (n, k) float16 cosine similarity of each neighbour
+
+At request time a lookup is a dict access plus one row slice: no embedding
+call, no vector search.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.vector_index import DOCUMENTS_FILE, LocalVectorIndex
+
+logger = logging.getLogger(__name__)
+
+RELATED_FILE = "related.npz"
+
+# Query rows scored per block; the (block, n) score matrix is capped at this
+# many float32 entries.
+_GRAPH_BLOCK_ENTRIES = 1 << 24
+
+# Corpus rows upcast to float32 at a time when the matrix is float16.
+_UPCAST_BLOCK_ROWS = 8192
+
+
+def _block_scores(vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """``queries @ vectors.T`` as float32, upcasting half-precision rows in blocks."""
+    if vectors.dtype == np.float32:
+        return queries @ vectors.T
+
+    out = np.empty((len(queries), len(vectors)), dtype=np.float32)
+    for start in range(0, len(vectors), _UPCAST_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + _UPCAST_BLOCK_ROWS], dtype=np.float32)
+        out[:, start:start + len(block)] = queries @ block.T
+    return out
+
+
+def exact_knn(vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """``(neighbours, scores)`` of every row's *k* nearest other rows, best first."""
+    n = len(vectors)
+    k = min(k, n - 1)
+    neighbours = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k <= 0:
+        return neighbours, scores
+
+    block_rows = max(1, min(1024, _GRAPH_BLOCK_ENTRIES // n))
+    for start in range(0, n, block_rows):
+        queries = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        sims = _block_scores(vectors, queries)
+        local = np.arange(len(queries))
+        sims[local, start + local] = -np.inf  # a document is not related to itself
+
+        if k < n - 1:
+            candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.argsort(-sims, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+
+        neighbours[start:start + len(queries)] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:start + len(queries)] = np.take_along_axis(candidate_scores, order, axis=1)
+    np.clip(scores, -1.0, 1.0, out=scores)
+    return neighbours, scores
+
+
+def approximate_knn(index: LocalVectorIndex, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Like `exact_knn`, but one ``index.search`` (e.g. IVF) per row."""
+    n = len(index)
+    k = min(k, n - 1)
+    neighbours = np.empty((n, max(k, 0)), dtype=np.int32)
+    scores = np.empty((n, max(k, 0)), dtype=np.float32)
+    for row in range(n):
+        hits = [(r, s) for r, s in index.search(index.vectors[row], k + 1) if r != row][:k]
+        # IVF can return fewer than k hits when the probed lists are small;
+        # pad with the row itself and a score that sorts last.
+        hits += [(row, -1.0)] * (k - len(hits))
+        neighbours[row] = [r for r, _ in hits]
+        scores[row] = [s for _, s in hits]
+    return neighbours, scores
+
+
+class RelatedIndex:
+    """Precomputed k-nearest-neighbour lists keyed by document id."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        neighbours: np.ndarray,
+        scores: np.ndarray,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Wrap a built graph.
+
+        Args:
+            ids: (n,) document id per row
+            neighbours: (n, k) neighbour rows, best first
+            scores: (n, k) neighbour similarities
+            metadata: Optional metadata per row, returned with neighbours
+        """
+        if not (len(ids) == len(neighbours) == len(scores)):
+            raise ValueError("ids, neighbours and scores must have the same length")
+        self.ids = np.asarray(ids).astype(str)
+        self.neighbours = neighbours
+        self.scores = scores
+        self.metadata = metadata
+        # First row wins for duplicate ids, like the lexical / vector indexes
+        self.rows: Dict[str, int] = {}
+        for row, doc_id in enumerate(self.ids.tolist()):
+            self.rows.setdefault(doc_id, row)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def k(self) -> int:
+        return int(self.neighbours.shape[1])
+
+    # ------------------------------------------------------------------
+    # Construction & persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, index: LocalVectorIndex, k: int = 10, approximate: bool = False) -> "RelatedIndex":
+        """Compute the neighbour graph of every row of *index*."""
+        started = time.perf_counter()
+        if approximate:
+            neighbours, scores = approximate_knn(index, k)
+        else:
+            neighbours, scores = exact_knn(index.vectors, k)
+        logger.info(
+            f"Built {'approximate' if approximate else 'exact'} {neighbours.shape[1]}-NN graph "
+            f"for {len(index)} documents in {time.perf_counter() - started:.1f}s"
+        )
+        return cls(index.ids, neighbours, scores.astype(np.float16), index.metadata)
+
+    def save(self, path: Path) -> None:
+        """Write ``related.npz`` into the index directory *path*."""
+        path = Path(path)
+        np.savez(path / RELATED_FILE, ids=self.ids, neighbours=self.neighbours, scores=self.scores)
+        mb = (self.neighbours.nbytes + self.scores.nbytes) / (1024 * 1024)
+        logger.info(f"Saved {self.k}-NN graph for {len(self)} documents to {path / RELATED_FILE} ({mb:.1f} MiB)")
+
+    @classmethod
+    def load(cls, path: Path) -> "RelatedIndex":
+        """Load the graph from index directory *path*, with row metadata when available."""
+        path = Path(path)
+        with np.load(path / RELATED_FILE) as data:
+            ids, neighbours, scores = data["ids"], data["neighbours"], data["scores"]
+
+        metadata = None
+        if (path / DOCUMENTS_FILE).exists():
+            with open(path / DOCUMENTS_FILE, encoding="utf-8") as f:
+                metadata = [json.loads(line).get("metadata") or {} for line in f]
+            if len(metadata) != len(ids):
+                logger.warning(f"{path / RELATED_FILE} is stale ({len(ids)} rows vs {len(metadata)} documents)")
+                metadata = None
+
+        logger.info(f"Loaded {neighbours.shape[1]}-NN graph for {len(ids)} documents from {path}")
+        return cls(ids, neighbours, scores, metadata)
+
+    # ------------------------------------------------------------------
+    # Query path
+    # ------------------------------------------------------------------
+    def related(self, doc_id: str, k: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Up to *k* neighbours of *doc_id*, best first, or None for an unknown id."""
+        row = self.rows.get(doc_id)
+        if row is None:
+            return None
+
+        results = []
+        for neighbour, score in zip(self.neighbours[row, :k].tolist(), self.scores[row, :k].tolist()):
+            if neighbour == row:  # padding from an approximate build
+                continue
+            item: Dict[str, Any] = {"id": str(self.ids[neighbour]), "score": round(float(score), 4)}
+            if self.metadata is not None:
+                item["metadata"] = self.metadata[neighbour]
+            results.append(item)
+        return results
+
+
+# Global related-items graph instance (None when it has not been built)
+_related_index: Optional[RelatedIndex] = None
+_related_index_loaded = False
+
+
+def get_related_index() -> Optional[RelatedIndex]:
+    """Get the global related-items graph from the local index directory, if built."""
+    global _related_index, _related_index_loaded
+    if not _related_index_loaded:
+        from backend.config import get_settings
+
+        path = Path(get_settings().LOCAL_INDEX_PATH)
+        if (path / RELATED_FILE).exists():
+            _related_index = RelatedIndex.load(path)
+        else:
+            logger.info(f"No related-items graph at {path / RELATED_FILE}; run backend/build_related_index.py")
+        _related_index_loaded = True
+    return _related_index
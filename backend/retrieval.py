@@ -1,130 +1,658 @@
 """Light-weight wrapper around LangChain + Pinecone to retrieve top-k context
 for a given user query.  Isolated into its own module for easier testing and
 potential swapping of vector DB or embedding model in the future.
+
+The heavy clients (Pinecone, OpenAI embeddings, LangChain vector store) live
+on a long-lived :class:`RetrievalEngine` which is created and verified once at
+FastAPI startup.  Index statistics are refreshed on a background interval so
+the request path only pays for the actual similarity search.
+
+Two backends are supported, selected by `RETRIEVAL_BACKEND`: Pinecone, and an
+in-process NumPy index (`backend.vector_index`) for self-hosted deployments
+and offline load tests.
+
+Every blocking client call (Pinecone, LangChain, OpenAI embeddings, NumPy
+scoring) runs on a bounded, dedicated thread pool and searches are gated by a
+semaphore, so retrieval never stalls the event loop serving SSE streams.
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import List, Tuple
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 import os
 
-# Import Pinecone and LangChain lazily inside the retrieval function to avoid
-# heavy dependencies (and ModuleNotFoundError) when Pinecone is not configured
+# Import Pinecone and LangChain lazily inside the engine to avoid heavy
+# dependencies (and ModuleNotFoundError) when Pinecone is not configured
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:  # pragma: no cover
     # These imports are for type checkers only; at runtime they are loaded
-    # lazily in `retrieve_context`.
+    # lazily in `RetrievalEngine.start`.
     from pinecone import Pinecone  # type: ignore
     from langchain_openai import OpenAIEmbeddings  # type: ignore
     from langchain_pinecone import PineconeVectorStore  # type: ignore
+    from backend.vector_index import LocalVectorIndex
 
-from backend.config import get_settings
+from backend.config import Settings, get_settings
+from backend.chunking import ParentStore
+from backend.documents import document_id, parent_id
+from backend.embedding_cache import CachedEmbeddings, get_embedding_cache
+from backend.filters import Filters, normalize_filters, to_pinecone_filter
+from backend.lexical_index import BM25_FILE, BM25Index, reciprocal_rank_fusion
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-async def retrieve_context(query: str, k: int = 5) -> Tuple[List[str], float]:
-    """Embed *query* and fetch the *k* most similar chunks from Pinecone.
+T = TypeVar("T")
 
-    Returns a tuple `(contents, max_similarity)` where:
-      *contents*         list of plain text strings representing the retrieved
-                         knowledge chunks (Qur'an ayāt or ahadith).
-      *max_similarity*   the cosine similarity score of the top match; used as
-                         a crude confidence proxy upstream.
+# (doc_id, text, score, ingest-time token count or None)
+Hit = Tuple[str, str, float, Optional[int]]
+
+
+def _token_count(metadata: Dict[str, Any]) -> Optional[int]:
+    """Token count stored by the ingestion scripts, if any."""
+    value = metadata.get("token_count")
+    return int(value) if value is not None else None
+
+
+@dataclass
+class RetrievalResult:
+    """Everything one search produced, for callers that need more than text."""
+
+    contents: List[str]
+    max_similarity: float
+    # Document ids of *contents*, in the same order
+    ids: List[str] = field(default_factory=list)
+    # Embedding the dense search used (``None`` when retrieval is disabled)
+    query_embedding: Optional[List[float]] = None
+    # Ingest-time token count per chunk (``None`` when not stored)
+    token_counts: List[Optional[int]] = field(default_factory=list)
+
+
+class RetrievalEngine:
+    """Long-lived owner of the retrieval clients (Pinecone or local index).
+
+    The engine is started once (see `backend.main` startup hook) and then
+    shared by every request, so building the embedding model, the vector
+    store wrapper and checking that the index exists are no longer part of
+    the per-request latency.
     """
 
-    settings = get_settings()
+    def __init__(self, settings: Optional[Settings] = None):
+        """Initialize the engine without touching the network.
+
+        Args:
+            settings: Application settings; defaults to the cached global ones
+        """
+        self.settings = settings or get_settings()
+        self.backend = self._resolve_backend()
+
+        self._pc: Optional["Pinecone"] = None
+        self._index: Any = None
+        self._vector_store: Optional["PineconeVectorStore"] = None
+        self._local_index: Optional["LocalVectorIndex"] = None
+        self._embeddings: Optional[CachedEmbeddings] = None
+        self._lexical_index: Optional[BM25Index] = None
+        self._parents: Optional[ParentStore] = None
+
+        self._ready = False
+        self._error: Optional[str] = None
+        self._stats: Optional[Dict[str, Any]] = None
+        self._stats_updated_at: Optional[float] = None
+        self._index_built_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._retry_task: Optional[asyncio.Task] = None
+        self._start_failures = 0
+        self._retry_at = 0.0
+        self._start_lock = asyncio.Lock()
+
+        # Blocking client calls run here instead of on the event loop; the
+        # semaphore bounds how many searches may be queued or in flight.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(self.settings.RETRIEVAL_MAX_CONCURRENCY)
+        self.in_flight = 0
 
     # ------------------------------------------------------------------
-    # Graceful fallback when Pinecone isn't configured
+    # Lifecycle
     # ------------------------------------------------------------------
-    # During local development many contributors do not have a Pinecone
-    # account – or simply haven’t added `PINECONE_API_KEY` to their env.  In
-    # that case we skip vector retrieval entirely and tell the caller that no
-    # useful context was found by returning ([], 0.0) instead of raising and
-    # bubbling a 500 error up to the frontend.
-
-    if not settings.PINECONE_API_KEY:
-        logger.warning(
-            "PINECONE_API_KEY not set. Skipping semantic retrieval and "
-            "falling back to low-confidence answer."
+    def _resolve_backend(self) -> str:
+        """Pick "pinecone", "local" or "none" from settings."""
+        choice = self.settings.RETRIEVAL_BACKEND.lower()
+        if choice in ("pinecone", "local"):
+            return choice
+        if choice != "auto":
+            logger.warning(f"Unknown RETRIEVAL_BACKEND '{choice}', falling back to auto")
+
+        if self.settings.PINECONE_API_KEY:
+            return "pinecone"
+        if (Path(self.settings.LOCAL_INDEX_PATH) / "manifest.json").exists():
+            return "local"
+        return "none"
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any retrieval backend is configured for this deployment."""
+        return self.backend != "none"
+
+    @property
+    def ready(self) -> bool:
+        """Whether the engine can serve similarity searches."""
+        return self._ready
+
+    async def start(self) -> None:
+        """Create the clients, verify the index and start the stats refresher.
+
+        A failed start is retried in the background with exponential
+        backoff; calls made before the next attempt is due return at once.
+        """
+        if not self.enabled:
+            # During local development many contributors do not have a
+            # Pinecone account – or simply haven't added `PINECONE_API_KEY`
+            # to their env – nor a local index.  Requests then fall back to
+            # a low-confidence answer instead of a 500 error.
+            logger.warning(
+                "PINECONE_API_KEY not set and no local index found. Semantic "
+                "retrieval disabled; answers will fall back to low confidence."
+            )
+            return
+
+        async with self._start_lock:
+            if self._ready or time.time() < self._retry_at:
+                return
+            try:
+                await self._run(self._connect)
+            except Exception as e:
+                self._error = str(e)
+                self._start_failures += 1
+                delay = min(
+                    self.settings.RETRIEVAL_RETRY_SECONDS * 2 ** (self._start_failures - 1),
+                    self.settings.RETRIEVAL_RETRY_MAX_SECONDS,
+                )
+                self._retry_at = time.time() + delay
+                logger.error(f"Failed to start retrieval engine: {e}; retrying in {delay:.0f}s")
+                if self._retry_task is None or self._retry_task.done():
+                    self._retry_task = asyncio.create_task(self._retry_start())
+                return
+            self._ready = True
+            self._error = None
+            self._start_failures = 0
+            self._retry_at = 0.0
+            logger.info(f"Retrieval engine ready ({self.backend} backend, index '{self.index_name}')")
+
+            interval = self.settings.RETRIEVAL_STATS_REFRESH_SECONDS
+            if interval > 0 and self.backend == "pinecone":
+                self._refresh_task = asyncio.create_task(self._refresh_stats_loop(interval))
+
+    async def _retry_start(self) -> None:
+        """Keep retrying a failed start once each backoff delay has passed."""
+        while not self._ready:
+            await asyncio.sleep(max(self._retry_at - time.time(), 0.0))
+            await self.start()
+
+    async def stop(self) -> None:
+        """Cancel the background tasks and shut down worker pools."""
+        for task in (self._refresh_task, self._retry_task):
+            if task is None or task is asyncio.current_task():
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+        self._retry_task = None
+        self._ready = False
+        if hasattr(self._local_index, "close"):
+            self._local_index.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking call on the engine's dedicated thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.settings.RETRIEVAL_MAX_WORKERS,
+                thread_name_prefix="retrieval",
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    @property
+    def index_name(self) -> str:
+        if self.backend == "local":
+            return self.settings.LOCAL_INDEX_PATH
+        return self.settings.PINECONE_INDEX_NAME
+
+    @property
+    def index_version(self) -> str:
+        """Opaque tag that changes whenever the searchable corpus changes.
+
+        Built from the backend, the index name, the vector count (refreshed
+        in the background for Pinecone) and the build time of a local index.
+        """
+        count = (self._stats or {}).get("total_vector_count")
+        return f"{self.backend}:{self.index_name}:{count}:{self._index_built_at}"
+
+    def _connect(self) -> None:
+        """Blocking part of `start`: build clients and check the index once."""
+        if self.backend == "local":
+            self._connect_local()
+        else:
+            self._connect_pinecone()
+        self._load_lexical_index()
+        self._load_parent_store()
+        self._update_stats()
+
+    def _load_lexical_index(self) -> None:
+        """Load the BM25 side of hybrid retrieval if it has been built."""
+        path = Path(self.settings.LEXICAL_INDEX_PATH)
+        if not self.settings.HYBRID_RETRIEVAL:
+            return
+        if not (path / BM25_FILE).exists():
+            logger.info(f"No lexical index at {path}; using vector-only retrieval")
+            return
+        self._lexical_index = BM25Index.load(path)
+
+    def _load_parent_store(self) -> None:
+        """Open the full texts of chunked documents if ingestion wrote them."""
+        path = Path(self.settings.PARENT_STORE_PATH)
+        if self.settings.RETRIEVAL_EXPAND_PARENTS <= 0:
+            return
+        if not path.exists():
+            logger.info(f"No parent store at {path}; returning chunks without expansion")
+            return
+        self._parents = ParentStore(path)
+
+    def _connect_local(self) -> None:
+        """Memory-map the local index and build the query embedder for its model."""
+        from langchain_openai import OpenAIEmbeddings  # type: ignore
+        from backend.ann_index import open_local_index
+        from backend.vector_index import MANIFEST_FILE
+
+        # Uses quantized or IVF search when their build scripts have been run.
+        path = Path(self.settings.LOCAL_INDEX_PATH)
+        self._local_index = open_local_index(
+            path,
+            n_probe=self.settings.LOCAL_INDEX_NPROBE,
+            quantization=self.settings.LOCAL_INDEX_QUANTIZATION.lower(),
+            rescore=self.settings.LOCAL_INDEX_RESCORE,
+            shards=self.settings.LOCAL_INDEX_SHARDS,
         )
-        return [], 0.0
+        with open(path / MANIFEST_FILE, encoding="utf-8") as f:
+            self._index_built_at = json.load(f).get("created_at")
 
-    # ------------------------------------------------------------------
-    # Import 3rd-party dependencies *after* we know we actually need them
-    # ------------------------------------------------------------------
-    from pinecone import Pinecone  # type: ignore
-    from langchain_openai import OpenAIEmbeddings  # type: ignore
-    from langchain_pinecone import PineconeVectorStore  # type: ignore
+        # Queries must be embedded with the model the index was built with.
+        kwargs: Dict[str, Any] = {"openai_api_key": self.settings.OPENAI_API_KEY}
+        if self._local_index.model:
+            kwargs["model"] = self._local_index.model
+        self._embeddings = CachedEmbeddings(OpenAIEmbeddings(**kwargs), get_embedding_cache())
+
+    def _connect_pinecone(self) -> None:
+        # ------------------------------------------------------------------
+        # Import 3rd-party dependencies *after* we know we actually need them
+        # ------------------------------------------------------------------
+        from pinecone import Pinecone  # type: ignore
+        from langchain_openai import OpenAIEmbeddings  # type: ignore
+        from langchain_pinecone import PineconeVectorStore  # type: ignore
+
+        settings = self.settings
 
-    # Lazily create Pinecone instance so repeated calls are cheap
-    pc: 'Pinecone' = getattr(retrieve_context, "_pc", None)  # type: ignore[assignment]
-    if pc is None:
-        pc = Pinecone(
+        # Ensure third-party libs that expect env vars (LangChain Pinecone
+        # wrapper) see the keys even though we already loaded them via
+        # settings. Some versions of `langchain_pinecone` read only from env,
+        # not from the instantiated client.
+        os.environ['OPENAI_API_KEY'] = settings.OPENAI_API_KEY
+        os.environ['PINECONE_API_KEY'] = settings.PINECONE_API_KEY
+
+        self._pc = Pinecone(
             api_key=settings.PINECONE_API_KEY,
             environment=settings.PINECONE_ENV,
         )
-        retrieve_context._pc = pc  # type: ignore[attr-defined]
 
-    # Ensure index exists
-    if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():  # pragma: no cover
-        raise RuntimeError(
-            f"Pinecone index '{settings.PINECONE_INDEX_NAME}' not found. Did you run the ingestion script?"
+        if settings.PINECONE_INDEX_NAME not in self._pc.list_indexes().names():  # pragma: no cover
+            raise RuntimeError(
+                f"Pinecone index '{settings.PINECONE_INDEX_NAME}' not found. Did you run the ingestion script?"
+            )
+
+        self._index = self._pc.Index(settings.PINECONE_INDEX_NAME)
+
+        # Pass the key explicitly rather than relying on the global env so
+        # that LangChain's constructor never raises "The api_key client
+        # option must be set ...".  Repeated questions are served from the
+        # two-tier query-embedding cache instead of the API.
+        self._embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY),
+            get_embedding_cache(),
+        )
+
+        # Wrap existing Pinecone index with LangChain vector store
+        self._vector_store = PineconeVectorStore(
+            index_name=settings.PINECONE_INDEX_NAME,
+            embedding=self._embeddings,
+            text_key="text"
         )
 
     # ------------------------------------------------------------------
-    # Build embedding model
+    # Index statistics (kept off the request path)
+    # ------------------------------------------------------------------
+    def _update_stats(self) -> None:
+        """Fetch index stats synchronously and remember them."""
+        if self._local_index is not None:
+            self._stats = {
+                "total_vector_count": len(self._local_index),
+                "dimension": self._local_index.dim,
+                "dtype": str(self._local_index.vectors.dtype),
+                "ivf_lists": getattr(self._local_index, "n_lists", None),
+                "quantization": getattr(self._local_index, "mode", None),
+                "shards": getattr(self._local_index, "n_shards", 1),
+            }
+            self._stats_updated_at = time.time()
+            return
+
+        try:
+            stats = self._index.describe_index_stats()
+            self._stats = stats.to_dict() if hasattr(stats, "to_dict") else dict(stats)
+            self._stats_updated_at = time.time()
+            logger.info(f"Pinecone index '{self.settings.PINECONE_INDEX_NAME}' stats: {self._stats}")
+        except Exception as e:
+            logger.error(f"Failed to get Pinecone index stats: {e}")
+
+    async def _refresh_stats_loop(self, interval: float) -> None:
+        """Periodically refresh index stats in a worker thread."""
+        while True:
+            await asyncio.sleep(interval)
+            await self._run(self._update_stats)
+
+    def health(self) -> Dict[str, Any]:
+        """Readiness summary used by the `/health` endpoint."""
+        if not self.enabled:
+            status = "disabled"
+        elif self._ready:
+            status = "ready"
+        else:
+            status = "unavailable"
+
+        return {
+            "status": status,
+            "backend": self.backend,
+            "index": self.index_name,
+            "vector_count": (self._stats or {}).get("total_vector_count"),
+            "stats_updated_at": self._stats_updated_at,
+            "error": self._error,
+            "hybrid": self._lexical_index is not None,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.settings.RETRIEVAL_MAX_CONCURRENCY,
+            "embedding_cache": get_embedding_cache().stats(),
+        }
+
+    # ------------------------------------------------------------------
+    # Query path
     # ------------------------------------------------------------------
-    # When the environment variable `OPENAI_API_KEY` is not set, LangChain's
-    # `OpenAIEmbeddings` constructor throws the error seen by the user
-    # ("The api_key client option must be set ...").  We already **require**
-    # the key in our `Settings` model, so pass it explicitly here to avoid
-    # relying on the global environment and to make unit-testing easier.
+    async def search(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[str], float]:
+        """Embed *query* and fetch the *k* most similar chunks.
+
+        See `retrieve_context` for the shape of the return value and
+        `retrieve` for the full result.
+        """
+        result = await self.retrieve(query, k=k, filters=filters)
+        return result.contents, result.max_similarity
+
+    async def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> RetrievalResult:
+        """Embed *query* and fetch the *k* most similar chunks with their ids.
+
+        With a lexical index loaded, dense and BM25 candidates are fetched
+        concurrently and fused by reciprocal rank.  *filters* (see
+        `backend.filters`) restrict both searches to matching documents
+        before scoring; unknown fields raise ``ValueError``.
+        """
+        filters = normalize_filters(filters)
+        if not await self._check_ready():
+            return RetrievalResult([], 0.0)
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                # Embedded up front (usually an embedding-cache hit) so the
+                # vector is available to callers such as the answer cache.
+                embedding = await self._run(self._embeddings.embed_query, query)
+                return await self._search_embedded(query, embedding, k, filters)
+            finally:
+                self.in_flight -= 1
+
+    async def retrieve_batch(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[RetrievalResult]:
+        """Retrieve for many queries with a single embedding round-trip.
+
+        All queries are embedded in one request (cache hits excluded), then
+        at most *max_concurrency* (default `RETRIEVAL_BATCH_CONCURRENCY`)
+        searches run at once.  Batch searches also take slots of the engine
+        semaphore, so a large batch is interleaved with interactive traffic
+        rather than starving it.  Results are in the order of *queries*.
+        """
+        filters = normalize_filters(filters)
+        if not await self._check_ready():
+            return [RetrievalResult([], 0.0) for _ in queries]
+
+        queries = list(queries)
+        async with self._semaphore:
+            embeddings = await self._run(self._embeddings.embed_queries, queries)
+
+        batch_limit = asyncio.Semaphore(max_concurrency or self.settings.RETRIEVAL_BATCH_CONCURRENCY)
+
+        async def search_one(query: str, embedding: List[float]) -> RetrievalResult:
+            async with batch_limit, self._semaphore:
+                self.in_flight += 1
+                try:
+                    return await self._search_embedded(query, embedding, k, filters)
+                finally:
+                    self.in_flight -= 1
+
+        return list(await asyncio.gather(*(search_one(q, e) for q, e in zip(queries, embeddings))))
+
+    async def _check_ready(self) -> bool:
+        """``False`` when retrieval is disabled; raise when it cannot be started.
 
-    embed_model = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
+        An engine whose start failed is retried here too once its backoff
+        delay has passed, so traffic recovers as soon as the backend does.
+        """
+        if self._ready:
+            return True
+        if not self.enabled:
+            return False
+        await self.start()
+        if self._ready:
+            return True
+        raise RuntimeError(f"Retrieval engine is not ready: {self._error or 'not started'}")
 
-    # Obtain index object
-    index = pc.Index(settings.PINECONE_INDEX_NAME)
+    async def _search_embedded(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int,
+        filters: Optional[Filters],
+    ) -> RetrievalResult:
+        """Dense (and lexical) search for an already embedded *query*."""
+        if self._lexical_index is not None:
+            candidates = max(k, self.settings.HYBRID_CANDIDATES)
+            # Dense search runs on the retrieval pool while the
+            # sub-millisecond lexical search runs here, so hybrid
+            # adds no visible latency.
+            dense_task = asyncio.ensure_future(self._run(self._vector_hits, embedding, candidates, filters))
+            lexical = self._lexical_hits(query, candidates, filters)
+            dense = await dense_task
+            hits = self._fuse(dense, lexical, k)
+        else:
+            dense = await self._run(self._vector_hits, embedding, k, filters)
+            hits = dense
+        if self._parents is not None:
+            hits = await self._run(self._expand_parents, hits)
 
-    # Log index stats for debugging
-    try:
-        stats = index.describe_index_stats()
-        logger.info(f"Pinecone index '{settings.PINECONE_INDEX_NAME}' stats: {stats}")
-    except Exception as e:
-        logger.error(f"Failed to get Pinecone index stats: {e}")
+        logger.info(f"Retrieval query: '{query}'")
+        logger.info(f"Docs with scores (raw): {[(text, score) for _, text, score, _ in hits]}")
 
-    # Ensure third-party libs that expect env vars (LangChain Pinecone wrapper)
-    # see the keys even though we already loaded them via settings. Some
-    # versions of `langchain_pinecone` read only from env, not from the
-    # instantiated client above.
-    os.environ['OPENAI_API_KEY'] = settings.OPENAI_API_KEY
-    os.environ['PINECONE_API_KEY'] = settings.PINECONE_API_KEY
+        if not hits:
+            return RetrievalResult([], 0.0, query_embedding=embedding)
 
-    # Wrap existing Pinecone index with LangChain vector store
-    vector_store = PineconeVectorStore(
-        index_name=settings.PINECONE_INDEX_NAME,
-        embedding=embed_model,
-        text_key="text"
-    )
+        ids, contents, scores, token_counts = zip(*hits)
 
-    # LangChain returns list[Document] with .page_content and .metadata
-    docs_with_score = vector_store.similarity_search_with_score(query, k=k)
+        # Vector scores are cosine similarities (higher is better); the best
+        # dense match stays the confidence proxy even when fusion reorders.
+        max_sim = max((score for _, _, score, _ in dense), default=0.0)
 
-    logger.info(f"Retrieval query: '{query}'")
-    logger.info(f"Docs with scores (raw): {docs_with_score}")
+        logger.info(f"Retrieved scores: {scores}")
+        logger.info(f"Max similarity: {max_sim}")
 
-    if not docs_with_score:
-        return [], 0.0
+        return RetrievalResult(list(contents), max_sim, list(ids), embedding, list(token_counts))
 
-    contents, scores = zip(*[(doc.page_content, score) for doc, score in docs_with_score])
+    def _expand_parents(self, hits: List[Hit]) -> List[Hit]:
+        """Replace sibling chunks of one document by the whole document.
 
-    # Scores from similarity_search_with_score are already cosine similarities (higher is better)
-    max_sim = max(scores) if scores else 0.0
+        Chunks keep the context compact; but when `RETRIEVAL_EXPAND_PARENTS`
+        or more hits are chunks of the same parent, the query is about that
+        document as a whole.  The group is replaced, at the rank of its best
+        chunk, by the parent text with the parent id and token count.
+        """
+        groups: Dict[str, int] = {}
+        for doc_id, _, _, _ in hits:
+            parent = parent_id(doc_id)
+            if parent != doc_id:
+                groups[parent] = groups.get(parent, 0) + 1
+        expand = {parent for parent, count in groups.items() if count >= self.settings.RETRIEVAL_EXPAND_PARENTS}
+        if not expand:
+            return hits
 
-    logger.info(f"Retrieved scores (cosine similarity): {scores}")
-    logger.info(f"Max similarity: {max_sim}")
+        expanded: List[Hit] = []
+        done = set()
+        for hit in hits:
+            parent = parent_id(hit[0])
+            if parent not in expand:
+                expanded.append(hit)
+                continue
+            if parent in done:
+                continue
+            done.add(parent)
+            stored = self._parents.get(parent)
+            if stored is None:
+                # Store older than the index; keep the chunks as they are
+                expanded.extend(h for h in hits if parent_id(h[0]) == parent)
+                continue
+            text, tokens = stored
+            expanded.append((parent, text, hit[2], tokens))
+        return expanded
 
-    return list(contents), max_sim 
\ No newline at end of file
+    def _vector_hits(self, embedding: List[float], k: int, filters: Optional[Filters] = None) -> List[Hit]:
+        """Dense ``(doc_id, text, cosine, token_count)`` hits from the configured backend."""
+        if self.backend == "local":
+            index = self._local_index
+            rows = index.filter_index.rows(filters)
+            return [
+                (str(index.ids[row]), index.texts[row], score, _token_count(index.metadata[row]))
+                for row, score in index.search(embedding, k=k, rows=rows)
+            ]
+
+        # LangChain returns list[Document] with .page_content and .metadata
+        return [
+            (document_id(doc.metadata), doc.page_content, score, _token_count(doc.metadata))
+            for doc, score in self._vector_store.similarity_search_by_vector_with_score(
+                embedding, k=k, filter=to_pinecone_filter(filters)
+            )
+        ]
+
+    def _lexical_hits(self, query: str, k: int, filters: Optional[Filters] = None) -> List[Hit]:
+        """BM25 ``(doc_id, text, score, None)`` hits; token counts come from the dense side."""
+        index = self._lexical_index
+        rows = index.filter_index.rows(filters)
+        return [(index.ids[row], index.texts[row], score, None) for row, score in index.search(query, k=k, rows=rows)]
+
+    def _fuse(
+        self,
+        dense: List[Hit],
+        lexical: List[Hit],
+        k: int,
+    ) -> List[Hit]:
+        """Reciprocal-rank fusion of both hit lists into ``(doc_id, text, rrf_score, token_count)``."""
+        docs = {doc_id: (text, tokens) for doc_id, text, _, tokens in lexical}
+        docs.update({doc_id: (text, tokens) for doc_id, text, _, tokens in dense})
+        fused = reciprocal_rank_fusion(
+            [[hit[0] for hit in dense], [hit[0] for hit in lexical]],
+            k=self.settings.RRF_K,
+            limit=k,
+        )
+        return [(doc_id, docs[doc_id][0], score, docs[doc_id][1]) for doc_id, score in fused]
+
+
+# Global retrieval engine instance
+_retrieval_engine: Optional[RetrievalEngine] = None
+
+
+def get_retrieval_engine() -> RetrievalEngine:
+    """Get or create the global retrieval engine instance."""
+    global _retrieval_engine
+    if _retrieval_engine is None:
+        _retrieval_engine = RetrievalEngine()
+        logger.info("Initialized retrieval engine")
+    return _retrieval_engine
+
+
+async def retrieve_context(
+    query: str,
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[str], float]:
+    """Embed *query* and fetch the *k* most similar chunks from the index.
+
+    Returns a tuple `(contents, max_similarity)` where:
+      *contents*         list of plain text strings representing the retrieved
+                         knowledge chunks (Qur'an ayāt or ahadith).
+      *max_similarity*   the cosine similarity score of the top match; used as
+                         a crude confidence proxy upstream.
+
+    The shared engine is started lazily here as well so scripts that call
+    this function outside of FastAPI keep working.
+    """
+    engine = get_retrieval_engine()
+    if engine.enabled and not engine.ready:
+        await engine.start()
+    return await engine.search(query, k=k, filters=filters)
+
+
+async def retrieve_context_batch(
+    queries: Sequence[str],
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[List[str], float]]:
+    """Batch form of `retrieve_context`: one ``(contents, max_similarity)`` per query.
+
+    Embeds every query in a single request and runs the vector searches
+    concurrently (bounded by `RETRIEVAL_BATCH_CONCURRENCY`), for nightly
+    pre-answering jobs and tools that fan out sub-queries.
+    """
+    engine = get_retrieval_engine()
+    if engine.enabled and not engine.ready:
+        await engine.start()
+    results = await engine.retrieve_batch(queries, k=k, filters=filters)
+    return [(result.contents, result.max_similarity) for result in results]
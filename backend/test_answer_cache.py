@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the semantic answer cache used by /chat.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.answer_cache import SemanticAnswerCache
+from backend.models import ChatResponse
+
+SHOES = [1.0, 0.0, 0.0]
+SHOES_PARAPHRASE = [0.98, 0.2, 0.0]   # cosine ~0.98
+MUSIC = [0.0, 0.0, 1.0]
+CONTEXT = ["qa:12", "qa:40"]
+
+
+def _answer(text: str) -> ChatResponse:
+    return ChatResponse(answer=text, citations=[], confidence=0.8)
+
+
+def test_paraphrase_with_same_context_hits():
+    cache = SemanticAnswerCache(max_entries=4, threshold=0.95)
+    cache.put(SHOES, CONTEXT, _answer("Praying in clean shoes is permitted."), "v1")
+
+    # Context order does not matter, only the set of ids
+    assert cache.get(SHOES_PARAPHRASE, list(reversed(CONTEXT)), "v1").answer.startswith("Praying")
+    assert cache.get(MUSIC, CONTEXT, "v1") is None
+    assert cache.get(SHOES_PARAPHRASE, ["qa:12", "qa:99"], "v1") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["context_mismatches"]) == (1, 2, 1)
+
+
+def test_lru_eviction_and_ttl():
+    cache = SemanticAnswerCache(max_entries=2, threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], ["a"], _answer("a"), "v1")
+    cache.put([0.0, 1.0, 0.0], ["b"], _answer("b"), "v1")
+    assert cache.get([1.0, 0.0, 0.0], ["a"], "v1") is not None  # "b" is now oldest
+    cache.put([0.0, 0.0, 1.0], ["c"], _answer("c"), "v1")
+
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get([0.0, 1.0, 0.0], ["b"], "v1") is None
+    assert cache.get([1.0, 0.0, 0.0], ["a"], "v1") is not None
+
+    cache.ttl_seconds = -1
+    assert cache.get([1.0, 0.0, 0.0], ["a"], "v1") is None
+    assert cache.expirations == 1
+
+
+def test_index_version_change_invalidates():
+    cache = SemanticAnswerCache(max_entries=4)
+    cache.put(SHOES, CONTEXT, _answer("old"), "v1")
+    assert cache.get(SHOES, CONTEXT, "v2") is None
+    assert len(cache) == 0 and cache.invalidations == 1
+
+    cache.put(SHOES, CONTEXT, _answer("new"), "v2")
+    assert cache.get(SHOES, CONTEXT, "v2").answer == "new"
+
+
+if __name__ == "__main__":
+    test_paraphrase_with_same_context_hits()
+    test_lru_eviction_and_ttl()
+    test_index_version_change_invalidates()
+    print("✅ Answer cache tests passed")
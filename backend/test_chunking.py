@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test token-bounded chunking, the parent store and parent expansion at
+retrieval time.  Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "test-not-used")
+
+from backend.chunking import ParentStore, chunk_document, iter_chunks, split_text
+from backend.context_packer import count_tokens
+from backend.documents import document_id
+from backend.retrieval import RetrievalEngine
+from backend.test_support import Doc
+
+
+def _qa(index, answer):
+    question = "Is it permissible to combine prayers while travelling?"
+    text = f"Question: {question}\n\nAnswer: {answer}"
+    return Doc(
+        page_content=text,
+        metadata={"source": "fiqh.json", "type": "qa", "question": question,
+                  "item_index": str(index), "token_count": count_tokens(text)},
+    )
+
+
+def _paragraphs(n, sentences=6):
+    return "\n\n".join(
+        " ".join(f"Paragraph {p} sentence {s} explains one point of the ruling." for s in range(sentences))
+        for p in range(n)
+    )
+
+
+def test_split_respects_budget_boundaries_and_overlap():
+    text = _paragraphs(12)
+    chunks = split_text(text, max_tokens=120, overlap_tokens=30)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 120 for chunk in chunks)
+    # Every chunk ends at a sentence boundary, and consecutive chunks overlap
+    assert all(chunk.endswith(".") for chunk in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last_sentence = prev.rsplit(". ", 1)[-1].split("\n\n")[-1]
+        assert last_sentence in nxt
+    # Nothing is lost: every sentence appears in some chunk
+    for p in range(12):
+        assert any(f"Paragraph {p} sentence 5 " in chunk for chunk in chunks)
+
+    # A short text is one chunk; a sentence with no boundary is cut between words
+    assert split_text("One sentence.", max_tokens=50) == ["One sentence."]
+    words = split_text("word " * 400, max_tokens=50)
+    assert len(words) > 1 and all(count_tokens(chunk) <= 50 for chunk in words)
+
+
+def test_joiners_count_towards_the_budget():
+    # Paragraphs and sentences whose own counts add up to exactly the budget
+    paragraphs = "\n\n".join("x" * 40 for _ in range(30))
+    sentences = " ".join("Short point of law." for _ in range(60))
+    for text in (paragraphs, sentences, _paragraphs(8)):
+        for budget in range(20, 140, 7):
+            for overlap in (0, 15):
+                chunks = split_text(text, max_tokens=budget, overlap_tokens=overlap)
+                assert all(count_tokens(chunk) <= budget for chunk in chunks), (budget, overlap)
+
+
+def test_chunks_link_to_parent_and_repeat_question():
+    short = _qa(0, "Yes, for the traveller.")
+    long = _qa(1, _paragraphs(10))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ParentStore(Path(tmp) / "parents.sqlite3")
+        out = list(iter_chunks([short, long], max_tokens=150, overlap_tokens=20, parents=store))
+
+        assert out[0] is short and store.get("fiqh.json:0") is None
+        chunks = out[1:]
+        assert len(chunks) == len(chunk_document(long, 150, 20)) > 1
+        for i, chunk in enumerate(chunks):
+            assert chunk.page_content.startswith("Question: Is it permissible")
+            assert chunk.metadata["parent_id"] == "fiqh.json:1"
+            assert chunk.metadata["chunk_index"] == i and chunk.metadata["chunk_count"] == len(chunks)
+            assert chunk.metadata["token_count"] == count_tokens(chunk.page_content) <= 150
+            assert document_id(chunk.metadata) == f"fiqh.json:1#{i}"
+        # Parent metadata is untouched and the full text is stored
+        assert "chunk_index" not in long.metadata
+        assert store.get("fiqh.json:1") == (long.page_content, long.metadata["token_count"])
+        store.close()
+
+
+def test_retrieval_expands_sibling_chunks_to_parent():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ParentStore(Path(tmp) / "parents.sqlite3")
+        store.put("fiqh.json:1", "whole answer", 900)
+        engine = RetrievalEngine()
+        engine._parents = store
+        engine.settings = engine.settings.model_copy(update={"RETRIEVAL_EXPAND_PARENTS": 2})
+
+        hits = [
+            ("fiqh.json:1#2", "chunk two", 0.9, 100),
+            ("bukhari.json:7", "hadith", 0.8, 40),
+            ("fiqh.json:1#0", "chunk zero", 0.7, 100),
+            ("fiqh.json:4#1", "lone chunk", 0.6, 100),
+        ]
+        assert engine._expand_parents(hits) == [
+            ("fiqh.json:1", "whole answer", 0.9, 900),
+            ("bukhari.json:7", "hadith", 0.8, 40),
+            ("fiqh.json:4#1", "lone chunk", 0.6, 100),
+        ]
+        # A lone chunk of a parent is not expanded
+        assert engine._expand_parents(hits[1:3]) == hits[1:3]
+        store.close()
+
+
+def test_pinecone_float_metadata_gives_the_same_chunk_ids():
+    class FakePinecone:
+        """Returns numeric metadata as floats, like the Pinecone API does."""
+
+        def similarity_search_by_vector_with_score(self, embedding, k, filter=None):
+            metadata = {"source": "fiqh.json", "item_index": "3", "chunk_index": 1.0, "token_count": 120.0}
+            return [(Doc(page_content="chunk one", metadata=metadata), 0.9)]
+
+    engine = RetrievalEngine()
+    engine.backend = "pinecone"
+    engine._vector_store = FakePinecone()
+    dense = engine._vector_hits([0.0], k=1)
+    assert [hit[0] for hit in dense] == ["fiqh.json:3#1"]
+    assert document_id({"source": "b.json", "hadith_id": 7.0}) == "b.json:7"
+
+    # The dense and lexical copies of the chunk fuse into one hit
+    lexical = [("fiqh.json:3#1", "chunk one", 3.2, None), ("fiqh.json:3#2", "chunk two", 2.0, None)]
+    assert [hit[0] for hit in engine._fuse(dense, lexical, k=5)] == ["fiqh.json:3#1", "fiqh.json:3#2"]
+
+
+if __name__ == "__main__":
+    test_split_respects_budget_boundaries_and_overlap()
+    test_joiners_count_towards_the_budget()
+    test_chunks_link_to_parent_and_repeat_question()
+    test_retrieval_expands_sibling_chunks_to_parent()
+    test_pinecone_float_metadata_gives_the_same_chunk_ids()
+    print("✅ Chunking tests passed")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test content adapter discovery, parallel, order-preserving corpus parsing,
+and that a file failing part-way keeps its ingested documents.  Runs offline.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.content_adapters import AdapterRegistry, format_reports, parse_corpus
+from backend.documents import IngestManifest, IngestPlan
+from backend.json_stream import iter_json_array
+from backend.test_support import Doc
+
+
+def parse_lines(path):
+    """One document per line; a line of many words is long enough to chunk."""
+    for index, line in enumerate(path.read_text(encoding="utf-8").splitlines()):
+        yield Doc(page_content=line, metadata={"source": path.name, "item_index": str(index)})
+
+
+def parse_qa_array(path):
+    """One document per item of a JSON array, streamed like the Q&A files."""
+    for index, item in enumerate(iter_json_array(path)):
+        yield Doc(page_content=item["answer"], metadata={"source": path.name, "item_index": str(index)})
+
+
+def _registry():
+    registry = AdapterRegistry()
+    registry.register("lines", lambda path: path.suffix == ".txt")(parse_lines)
+    registry.register("qa", lambda path: path.suffix == ".json")(parse_qa_array)
+    return registry
+
+
+def test_discover_matches_adapters_and_skips_unknown_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ["b.txt", "a.txt", "notes.md", ".hidden.txt"]:
+            (Path(tmp) / name).write_text("x\n", encoding="utf-8")
+        found = _registry().discover(Path(tmp))
+        assert [(path.name, adapter.name) for path, adapter in found] == [("a.txt", "lines"), ("b.txt", "lines")]
+
+
+def test_parallel_parse_keeps_file_order_and_reports():
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(5):
+            lines = [f"file {i} line {j}." for j in range(i + 1)]
+            lines.append(" ".join(f"Sentence {k} of a long line." for k in range(60)))
+            (Path(tmp) / f"f{i}.txt").write_text("\n".join(lines), encoding="utf-8")
+        files = _registry().discover(Path(tmp))
+
+        results = {}
+        for workers in (1, 3):
+            reports, parents = [], []
+            store = SimpleNamespace(put=lambda *row: parents.append(row))
+            docs = list(parse_corpus(files, 100, 10, parents=store, workers=workers, reports=reports))
+            results[workers] = [(d.metadata["source"], d.page_content) for d in docs]
+            assert [r.name for r in reports] == [f"f{i}.txt" for i in range(5)]
+            assert sum(r.documents for r in reports) == len(docs)
+            # The long line of every file was chunked and its parent kept
+            assert [row[0] for row in parents] == [f"f{i}.txt:{i + 1}" for i in range(5)]
+        assert results[1] == results[3]
+        assert "total" in format_reports(reports)
+
+
+def test_truncated_file_is_reported_and_keeps_its_ingested_ids():
+    with tempfile.TemporaryDirectory() as tmp:
+        items = [{"question": f"q{i}", "answer": f"Answer number {i}."} for i in range(8)]
+        data = json.dumps(items)
+        (Path(tmp) / "a.txt").write_text("one line\n", encoding="utf-8")
+        (Path(tmp) / "qa.json").write_text(data, encoding="utf-8")
+        files = _registry().discover(Path(tmp))
+        manifest = IngestManifest(Path(tmp) / "manifest.json")
+        manifest.record(parse_corpus(files, 100, 10, workers=1))
+        assert len(manifest) == 9
+
+        # Cut the file in half: the items before the cut still stream out
+        (Path(tmp) / "qa.json").write_text(data[: len(data) // 2], encoding="utf-8")
+        for workers, produced in ((1, 4), (2, 0)):
+            reports, plan = [], IngestPlan()
+            docs = list(manifest.select(parse_corpus(files, 100, 10, workers=workers, reports=reports), plan))
+            assert docs == []
+            assert [(r.name, r.documents, r.failed) for r in reports] == [
+                ("a.txt", 1, False), ("qa.json", produced, True)
+            ]
+            assert "FAILED" in format_reports(reports).splitlines()[2]
+
+            manifest.finish(plan, sources=["a.txt", "qa.json"], failed=[r.name for r in reports if r.failed])
+            assert plan.deletes == []
+
+        # Without the failure recorded the missing half would be deleted
+        plan = IngestPlan()
+        list(manifest.select(parse_corpus(files, 100, 10, workers=1), plan))
+        manifest.finish(plan, sources=["a.txt", "qa.json"])
+        assert len(plan.deletes) == 4
+
+
+if __name__ == "__main__":
+    test_discover_matches_adapters_and_skips_unknown_files()
+    test_parallel_parse_keeps_file_order_and_reports()
+    test_truncated_file_is_reported_and_keeps_its_ingested_ids()
+    print("✅ Content adapter tests passed")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test token-budgeted context packing between retrieval and the LLM.
+Runs offline: token counts fall back to a length estimate without tiktoken.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.context_packer import ContextPacker, count_tokens, split_sentences, truncate_to_tokens
+
+SHORT = "Question: Is witr obligatory?\n\nAnswer: It is a confirmed sunnah."
+LONG = " ".join(f"Sentence number {i} explains one more detail of the ruling." for i in range(200))
+
+
+def test_split_sentences_handles_arabic_punctuation():
+    assert split_sentences("هل الوتر واجب؟ لا. Next line\nLast") == ["هل الوتر واجب؟", "لا.", "Next line", "Last"]
+
+
+def test_everything_fits_within_budget():
+    packer = ContextPacker(budget=10_000)
+    packed = packer.pack([SHORT, LONG])
+    assert packed.contents == [SHORT, LONG]
+    assert packed.tokens_saved == 0
+
+
+def test_long_chunk_is_cut_at_sentence_boundary():
+    budget = count_tokens(SHORT) + 100
+    packer = ContextPacker(budget=budget, min_chunk_tokens=32)
+    packed = packer.pack([SHORT, LONG, SHORT], [count_tokens(SHORT), count_tokens(LONG), None])
+
+    assert packed.contents[0] == SHORT
+    head = packed.contents[1]
+    assert LONG.startswith(head) and head.endswith("ruling.")
+    assert packed.tokens_packed <= budget
+    assert packed.truncated == 1 and packed.dropped == 1
+    assert packed.tokens_saved == packed.tokens_retrieved - packed.tokens_packed > 0
+    assert packer.stats()["tokens_saved"] == packed.tokens_saved
+
+
+def test_truncation_keeps_the_original_separators():
+    text = "Question: Is witr obligatory?\n\nAnswer: No.\nIt is a confirmed sunnah. Pray it nightly."
+    budget = count_tokens("Question: Is witr obligatory?\n\nAnswer: No.\nIt is a")
+    head = truncate_to_tokens(text, budget)
+    assert head == "Question: Is witr obligatory?\n\nAnswer: No." and count_tokens(head) <= budget
+    assert truncate_to_tokens(text, count_tokens(text) + 10) == text
+    assert truncate_to_tokens("\n  First line.\nSecond.", 100) == "First line.\nSecond."
+    assert truncate_to_tokens(text, 1) == ""
+
+
+def test_precomputed_counts_are_trusted_and_zero_budget_disables():
+    # A stored count larger than the budget forces truncation even for short text
+    packed = ContextPacker(budget=5, min_chunk_tokens=64).pack([SHORT], [1000])
+    assert packed.contents == [] and packed.dropped == 1
+
+    packed = ContextPacker(budget=0).pack([SHORT, LONG])
+    assert packed.contents == [SHORT, LONG]
+
+
+if __name__ == "__main__":
+    test_split_sentences_handles_arabic_punctuation()
+    test_everything_fits_within_budget()
+    test_long_chunk_is_cut_at_sentence_boundary()
+    test_truncation_keeps_the_original_separators()
+    test_precomputed_counts_are_trusted_and_zero_budget_disables()
+    print("✅ Context packer tests passed")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped corpus artifact: column round trips, embeddings,
+staleness checks, and loading the reference index from it.  Runs offline.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from backend.corpus_artifact import CorpusArtifact, document_columns, fingerprint_file, write_artifact
+from backend.references import REFERENCE_TABLES_VERSION, ReferenceIndex
+from backend.test_support import Doc
+
+CONTENT = Path(__file__).resolve().parents[1] / "content"
+
+
+def test_tables_documents_and_embeddings_round_trip():
+    docs = [
+        Doc(page_content="قل هو الله أحد", metadata={"source": "q.xml", "sura": 112, "aya": 1, "item_index": "112:1"}),
+        Doc(page_content="", metadata={"source": "a.json", "hadith_id": "7", "chunk_index": 0, "score": 0.5}),
+        Doc(page_content="Question: x\n\nAnswer", metadata={"source": "a.json", "hadith_id": 8, "tags": ["fiqh"], "flag": True}),
+    ]
+    matrix = np.arange(9, dtype=np.float32).reshape(3, 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "corpus.bin"
+        write_artifact(
+            path,
+            {"documents": document_columns(docs), "empty": {"id": []}},
+            sources={},
+            config={"CHUNK_MAX_TOKENS": 512},
+            embeddings=("model-a", matrix, np.array([1, 0, 1], dtype=np.uint8)),
+        )
+        artifact = CorpusArtifact(path)
+        assert len(artifact) == 3 and len(artifact.table("empty")) == 0
+
+        loaded = list(artifact.iter_documents(Doc))
+        assert [(d.page_content, d.metadata) for d in loaded] == [(d.page_content, d.metadata) for d in docs]
+        # Integer columns are plain numpy arrays; mixed-type columns keep their types
+        sura = artifact.table("documents").column("sura")
+        assert sura.kind == "int" and sura.values[0] == 112 and sura[1] is None
+        assert artifact.table("documents").column("hadith_id").slice(0, 3) == [None, "7", 8]
+        assert list(artifact.iter_documents(Doc, start=2))[0].metadata["tags"] == ["fiqh"]
+
+        vectors, present = artifact.embeddings()
+        assert artifact.embedding_model == "model-a"
+        assert present.tolist() == [True, False, True] and vectors[2].tolist() == [6, 7, 8]
+
+        path.write_bytes(b"not an artifact" * 10)
+        try:
+            CorpusArtifact(path)
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+
+def test_stale_reason_tracks_files_and_config():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = Path(tmp) / "a.json", Path(tmp) / "b.json"
+        a.write_text('{"x": 1}', encoding="utf-8")
+        b.write_text('{"y": 2}', encoding="utf-8")
+        path = Path(tmp) / "corpus.bin"
+        write_artifact(path, {}, {p.name: fingerprint_file(p) for p in (a, b)}, {"CHUNK_MAX_TOKENS": 512})
+        artifact = CorpusArtifact(path)
+
+        assert artifact.stale_reason([a, b], {"CHUNK_MAX_TOKENS": 512}) is None
+        assert "CHUNK_MAX_TOKENS" in artifact.stale_reason([a, b], {"CHUNK_MAX_TOKENS": 256})
+        assert "b.json" in artifact.stale_reason([a], {})
+        assert artifact.stale_reason([a], {}, exact=False) is None
+
+        # A touched but identical file still matches; an edited one does not
+        os.utime(a, ns=(0, 0))
+        assert artifact.stale_reason([a, b], {}) is None
+        a.write_text('{"x": 2}', encoding="utf-8")
+        assert "a.json changed" in artifact.stale_reason([a, b], {})
+
+
+def test_reference_index_loads_from_the_artifact():
+    with tempfile.TemporaryDirectory() as tmp:
+        content = Path(tmp) / "content"
+        content.mkdir()
+        for name in ("quran.xml", "ahadith.json"):
+            shutil.copy(CONTENT / name, content / name)
+        built = ReferenceIndex.build(content)
+        path = Path(tmp) / "corpus.bin"
+        sources = {p.name: fingerprint_file(p) for p in content.iterdir()}
+        write_artifact(path, built.to_tables(), sources, {"reference_tables": REFERENCE_TABLES_VERSION})
+
+        loaded = ReferenceIndex.from_artifact(CorpusArtifact(path), content)
+        assert loaded is not None
+        for attr in ("ayat", "surah_lengths", "surah_names", "name_to_surah", "hadith"):
+            assert getattr(loaded, attr) == getattr(built, attr), attr
+        assert [c.ref for c in loaded.lookup("surah baqarah verse 255").citations] == ["2:255"]
+
+        # Without the tables, or with other content, the caller parses instead
+        write_artifact(path, {}, sources, {"reference_tables": REFERENCE_TABLES_VERSION})
+        assert ReferenceIndex.from_artifact(CorpusArtifact(path), content) is None
+        write_artifact(path, built.to_tables(), {}, {"reference_tables": REFERENCE_TABLES_VERSION})
+        assert ReferenceIndex.from_artifact(CorpusArtifact(path), content) is None
+
+
+if __name__ == "__main__":
+    test_tables_documents_and_embeddings_round_trip()
+    test_stale_reason_tracks_files_and_config()
+    test_reference_index_loads_from_the_artifact()
+    print("✅ Corpus artifact tests passed")
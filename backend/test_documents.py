@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test deterministic document ids and the incremental ingestion manifest.
+Runs offline.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.documents import IngestJournal, IngestManifest, IngestPlan, content_hash, document_id, parent_id
+
+
+def _doc(source, key, text):
+    return SimpleNamespace(page_content=text, metadata={"source": source, "hadith_id": key, "type": "hadith"})
+
+
+def test_ids_and_hashes_are_deterministic():
+    doc = _doc("bukhari.json", "7", "Actions are by intentions")
+    assert document_id(doc.metadata) == "bukhari.json:7"
+    assert document_id({"source": "fiqh.json", "item_index": "3"}) == "fiqh.json:3"
+    chunk_id = document_id({"source": "fiqh.json", "item_index": "3", "chunk_index": 0})
+    assert chunk_id == "fiqh.json:3#0"
+    assert parent_id(chunk_id) == "fiqh.json:3" and parent_id("fiqh.json:3") == "fiqh.json:3"
+    reordered = dict(reversed(list(doc.metadata.items())))
+    assert content_hash(doc.page_content, doc.metadata) == content_hash(doc.page_content, reordered)
+    assert content_hash("other", doc.metadata) != content_hash(doc.page_content, doc.metadata)
+
+
+def test_manifest_plans_only_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "manifest.json"
+        first = [_doc("a.json", "1", "one"), _doc("a.json", "2", "two"), _doc("b.json", "1", "b one")]
+
+        manifest = IngestManifest.load(path, target="islamic-kb")
+        plan = manifest.plan(first, sources=["a.json", "b.json"])
+        assert len(plan.upserts) == 3 and plan.deletes == [] and plan.unchanged == 0
+        manifest.record(plan.upserts)
+        manifest.save()
+
+        # No-op rerun: nothing to embed
+        manifest = IngestManifest.load(path, target="islamic-kb")
+        plan = manifest.plan(first, sources=["a.json", "b.json"])
+        assert plan.upserts == [] and plan.deletes == [] and plan.unchanged == 3
+        assert len(manifest.plan(first, sources=["a.json", "b.json"], force=True).upserts) == 3
+
+        # One edit, one removal; b.json failed to load and keeps its ids
+        second = [_doc("a.json", "1", "one, edited")]
+        plan = manifest.plan(second, sources=["a.json", "b.json"])
+        assert [document_id(d.metadata) for d in plan.upserts] == ["a.json:1"]
+        assert plan.deletes == ["a.json:2"]
+
+        # b.json no longer scanned at all: its ids are removed
+        plan = manifest.plan(second, sources=["a.json"])
+        assert sorted(plan.deletes) == ["a.json:2", "b.json:1"]
+
+        # A manifest for another index is ignored
+        assert len(IngestManifest.load(path, target="other-index")) == 0
+
+
+def test_journal_survives_a_crash_and_resumes():
+    docs = [_doc("a.json", str(i), f"text {i}") for i in range(6)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "journal.jsonl"
+        journal = IngestJournal(path, target="islamic-kb", full=True)
+        journal.start()
+        journal.commit(docs[:2])
+        journal.commit(docs[2:3])
+        journal.close()
+        # Crash in the middle of writing the third batch
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"batch": 3, "sources": ["a.json"], "docum')
+
+        previous = IngestJournal.load(path)
+        assert previous.full and previous.target == "islamic-kb" and previous.batches == 2
+        assert sorted(previous.entries) == ["a.json:0", "a.json:1", "a.json:2"]
+
+        # Resuming the --full run only re-sends what it had not committed
+        manifest = IngestManifest(Path(tmp) / "manifest.json", target="islamic-kb")
+        plan = IngestPlan()
+        todo = list(manifest.select(docs, plan, force=previous.full, committed=previous.entries))
+        assert [document_id(d.metadata) for d in todo] == ["a.json:3", "a.json:4", "a.json:5"]
+
+        # The rewritten journal keeps committed work and appends cleanly
+        previous.start()
+        previous.commit(todo)
+        resumed = IngestJournal.load(path)
+        assert resumed.batches == 3 and len(resumed.entries) == 6
+        resumed.remove()
+        assert IngestJournal.load(path) is None
+
+
+if __name__ == "__main__":
+    test_ids_and_hashes_are_deterministic()
+    test_manifest_plans_only_changes()
+    test_journal_survives_a_crash_and_resumes()
+    print("✅ Document manifest tests passed")
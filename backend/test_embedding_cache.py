@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the two-tier query-embedding cache: LRU eviction, TTL expiry, query
+normalization, the SQLite tier and its row cap.  Runs offline.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.embedding_cache import CachedEmbeddings, EmbeddingCache, cache_key, normalize_query
+
+
+class FakeEmbeddings:
+    """Embedding model stand-in that counts API calls."""
+
+    model = "fake-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_lru_eviction_and_ttl():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    assert cache.get("m", "a") == [1.0]  # "b" is now oldest
+    cache.put("m", "c", [3.0])
+
+    assert cache.evictions == 1
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0] and cache.get("m", "c") == [3.0]
+
+    cache.ttl_seconds = -1
+    assert cache.get("m", "a") is None
+    assert cache.stats()["memory_entries"] == 1
+
+
+def test_normalized_queries_share_a_vector():
+    assert normalize_query("  How to   pray\tWITR \n") == "how to pray witr"
+    assert cache_key("m", "How to pray witr") == cache_key("m", " how  to pray WITR")
+    assert cache_key("m", "how to pray witr") != cache_key("other-model", "how to pray witr")
+
+    model = FakeEmbeddings()
+    embeddings = CachedEmbeddings(model, EmbeddingCache(max_entries=8))
+    first = embeddings.embed_query("How to pray witr")
+    assert embeddings.embed_query("  how to PRAY witr ") == first
+    assert model.calls == 1
+
+    # A batch sends each distinct miss once, in a single request
+    vectors = embeddings.embed_queries(["is music haram", "How to pray witr", "is music haram"])
+    assert model.calls == 2 and vectors[0] == vectors[2] and vectors[1] == first
+
+
+def test_disk_tier_survives_restart_and_is_capped():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite3"
+        cache = EmbeddingCache(max_entries=1, path=path, disk_max_entries=10)
+        for i in range(10):
+            cache.put("m", f"q{i}", [float(i), 0.5])
+        assert cache.stats()["disk_entries"] == 10 and cache.disk_pruned == 0
+
+        reopened = EmbeddingCache(max_entries=4, path=path, disk_max_entries=10)
+        assert reopened.get("m", "Q3") == [3.0, 0.5]
+        assert reopened.disk_hits == 1 and reopened.get("m", "q3") == [3.0, 0.5]
+        assert reopened.memory_hits == 1
+
+        # One row past the cap prunes the oldest rows down to 90% of it
+        reopened.put("m", "q10", [10.0, 0.5])
+        assert reopened.disk_pruned == 2 and reopened.stats()["disk_entries"] == 9
+        fresh = EmbeddingCache(max_entries=4, path=path)
+        assert fresh.get("m", "q0") is None and fresh.get("m", "q10") == [10.0, 0.5]
+        assert fresh.stats()["disk_entries"] == 9
+
+        # A smaller cap is applied when the file is opened
+        assert EmbeddingCache(path=path, disk_max_entries=5).stats()["disk_entries"] == 4
+
+
+def test_stats_counters():
+    model = FakeEmbeddings()
+    cache = EmbeddingCache(max_entries=8)
+    embeddings = CachedEmbeddings(model, cache)
+    for text in ("a", "b", "a", "a"):
+        embeddings.embed_query(text)
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 0, 2)
+    assert stats["hit_rate"] == 0.5 and stats["embedding_calls_saved"] == 2
+    assert stats["estimated_seconds_saved"] == 2 * stats["avg_embedding_latency_seconds"]
+    assert stats["memory_entries"] == 2 and stats["persistent"] is False
+    assert EmbeddingCache().stats()["hit_rate"] == 0.0
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_normalized_queries_share_a_vector()
+    test_disk_tier_survives_restart_and_is_capped()
+    test_stats_counters()
+    print("✅ Embedding cache tests passed")
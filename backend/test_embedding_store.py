@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed embedding store and its use by the ingestion
+pipeline.  Runs offline.
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from backend.embedding_store import KEYS_FILE, VECTORS_FILE, EmbeddingStore, StoredEmbeddings
+from backend.ingest_pipeline import IngestPipeline
+
+
+class FakeEmbeddings:
+    """Deterministic 4-d vectors; records every text sent to the "API"."""
+
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.sent = []
+
+    def embed_documents(self, texts):
+        self.sent.extend(texts)
+        return [[float(len(t)), float(t.count("a")), 1.0, float(i)] for i, t in enumerate(texts)]
+
+
+def test_store_round_trip_persistence_and_recovery():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(Path(tmp), "fake/model")
+        assert store.get_many(["alpha"]) == [None]
+        assert store.put_many(["alpha", "beta", "alpha"], [[1, 2], [3, 4], [9, 9]]) == 2
+        assert store.put_many(["beta"], [[5, 6]]) == 0  # append-only: first vector wins
+
+        # Whitespace / Unicode-normalization variants share a key; case does not
+        hits = store.get_many(["beta", "  alpha\n", "Alpha", "gamma"])
+        assert hits[0].tolist() == [3, 4] and hits[1].tolist() == [1, 2]
+        assert hits[2] is None and hits[3] is None
+
+        # A crash mid-append leaves a partial row that reopening drops
+        with open(store.path / VECTORS_FILE, "ab") as f:
+            f.write(b"\x00" * 5)
+        with open(store.path / KEYS_FILE, "ab") as f:
+            f.write(b"\x01" * 32)
+        reopened = EmbeddingStore(Path(tmp), "fake/model")
+        assert len(reopened) == 2
+        assert reopened.get_many(["alpha"])[0].tolist() == [1, 2]
+        assert reopened.put_many(["gamma"], [[7, 8]]) == 1
+        assert EmbeddingStore(Path(tmp), "fake/model").get_many(["gamma"])[0].tolist() == [7, 8]
+
+        # Another model never sees these vectors
+        assert EmbeddingStore(Path(tmp), "other").get_many(["alpha"]) == [None]
+
+
+def test_compact_keeps_only_live_texts():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(Path(tmp), "m")
+        texts = [f"text {i}" for i in range(10)]
+        store.put_many(texts, np.arange(20, dtype=np.float32).reshape(10, 2))
+        assert store.compact(texts[::3]) == 6
+        reopened = EmbeddingStore(Path(tmp), "m")
+        assert len(reopened) == 4
+        assert [v.tolist() for v in reopened.get_many(texts[::3])] == [[0, 1], [6, 7], [12, 13], [18, 19]]
+        assert reopened.get_many(["text 1"]) == [None]
+        assert reopened.vectors_path.stat().st_size == 4 * 2 * 4
+
+
+def test_crashed_compaction_never_mixes_keys_and_vectors():
+    texts = [f"text {i}" for i in range(10)]
+    vectors = np.arange(20, dtype=np.float32).reshape(10, 2)
+
+    def crash(*args):
+        raise KeyboardInterrupt("crash")
+
+    for step in ("_write_meta", "_remove_other_generations"):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EmbeddingStore(Path(tmp), "m")
+            store.put_many(texts, vectors)
+            # Crash after writing the new pair (before / after switching to it)
+            setattr(store, step, crash)
+            try:
+                store.compact(texts[5:])
+            except KeyboardInterrupt:
+                pass
+
+            reopened = EmbeddingStore(Path(tmp), "m")
+            expected = 10 if step == "_write_meta" else 5
+            assert len(reopened) == expected, step
+            got = reopened.get_many(texts)
+            for i, vector in enumerate(got):
+                if vector is not None:
+                    assert vector.tolist() == vectors[i].tolist(), (step, i)
+            assert all(vector is not None for vector in got[5:])
+            # Only the current generation's files are left
+            assert sorted(p.name for p in Path(tmp, "m").glob("*.bin")) == sorted(
+                [reopened.keys_path.name, reopened.vectors_path.name]
+            )
+
+
+def test_read_only_store_changes_nothing_on_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        missing = EmbeddingStore(root / "absent", "fake", read_only=True)
+        assert len(missing) == 0 and missing.get_many(["alpha"]) == [None]
+        assert not (root / "absent").exists()
+
+        store = EmbeddingStore(root, "fake")
+        store.put_many(["alpha", "beta"], [[1, 2], [3, 4]])
+        # A writer's partial row and another generation's files, as a
+        # concurrent append or compaction would leave them
+        with open(store.vectors_path, "ab") as f:
+            f.write(b"\x00" * 5)
+        for name in ("keys.1.bin", "vectors.1.bin"):
+            (store.path / name).write_bytes(b"in progress")
+        before = {path.name: path.read_bytes() for path in store.path.iterdir()}
+
+        reader = EmbeddingStore(root, "fake", read_only=True)
+        assert len(reader) == 2 and reader.get_many(["beta"])[0].tolist() == [3, 4]
+        for write in (lambda: reader.put_many(["gamma"], [[5, 6]]), lambda: reader.compact([])):
+            try:
+                write()
+                raise AssertionError("expected PermissionError")
+            except PermissionError:
+                pass
+        assert {path.name: path.read_bytes() for path in store.path.iterdir()} == before
+
+
+def test_rebuild_from_unchanged_content_makes_no_api_calls():
+    docs = [
+        SimpleNamespace(page_content=f"doc {i} " + "a" * i, metadata={"source": "t.json", "item_index": str(i), "token_count": 10})
+        for i in range(30)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        upserted = {}
+
+        def run(embeddings):
+            pipeline = IngestPipeline(
+                embed=embeddings.embed_documents,
+                upsert=lambda batch, vectors: upserted.update(
+                    {d.metadata["item_index"]: list(v) for d, v in zip(batch, vectors)}
+                ),
+                concurrency=3,
+                batch_documents=7,
+                lookup=embeddings.lookup,
+            )
+            return asyncio.run(pipeline.run(docs))
+
+        api = FakeEmbeddings()
+        first = run(StoredEmbeddings(api, EmbeddingStore(Path(tmp), api.model)))
+        assert len(api.sent) == 30 and first.stored == 0
+        expected = dict(upserted)
+
+        # Same content, fresh process: everything comes from disk
+        api = FakeEmbeddings()
+        upserted.clear()
+        second = run(StoredEmbeddings(api, EmbeddingStore(Path(tmp), api.model)))
+        assert api.sent == [] and second.stored == 30 and second.requests == 0
+        assert upserted == expected
+
+        # One changed document is the only text embedded
+        docs[4] = SimpleNamespace(page_content="changed", metadata=docs[4].metadata)
+        api = FakeEmbeddings()
+        third = run(StoredEmbeddings(api, EmbeddingStore(Path(tmp), api.model)))
+        assert api.sent == ["changed"] and third.stored == 29 and third.documents == 30
+
+
+if __name__ == "__main__":
+    test_store_round_trip_persistence_and_recovery()
+    test_compact_keeps_only_live_texts()
+    test_crashed_compaction_never_mixes_keys_and_vectors()
+    test_read_only_store_changes_nothing_on_disk()
+    test_rebuild_from_unchanged_content_makes_no_api_calls()
+    print("✅ Embedding store tests passed")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent embed-and-upsert ingestion pipeline with fake clients.
+Runs offline.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.ingest_pipeline import IngestPipeline, TokenRateLimiter, token_batches
+
+
+def _docs(n, tokens=10):
+    return [
+        SimpleNamespace(page_content=f"doc {i}", metadata={"source": "t.json", "item_index": str(i), "token_count": tokens})
+        for i in range(n)
+    ]
+
+
+class FakeClients:
+    """Embeds with a delay, fails texts containing *poison*, records upserts."""
+
+    def __init__(self, delay=0.0, poison=None):
+        self.delay = delay
+        self.poison = poison
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.upserted = []
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.poison is not None and self.poison in texts:
+                raise RuntimeError("invalid input")
+            return [[float(len(t))] for t in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def upsert(self, batch, vectors):
+        assert len(batch) == len(vectors)
+        self.upserted.extend(doc.metadata["item_index"] for doc in batch)
+
+
+def test_token_batches_respect_budgets():
+    docs = _docs(10, tokens=30)
+    assert [len(b) for b in token_batches(docs, max_tokens=100, max_documents=50)] == [3, 3, 3, 1]
+    assert [len(b) for b in token_batches(docs, max_tokens=1000, max_documents=4)] == [4, 4, 2]
+    big = _docs(2, tokens=500)
+    assert [len(b) for b in token_batches(big, max_tokens=100, max_documents=50)] == [1, 1]
+
+
+def test_pipeline_runs_batches_concurrently():
+    clients = FakeClients(delay=0.05)
+    pipeline = IngestPipeline(clients.embed, clients.upsert, concurrency=4, batch_tokens=100, batch_documents=10)
+    recorded = []
+    pipeline.on_upserted = recorded.extend
+
+    started = time.perf_counter()
+    stats = asyncio.run(pipeline.run(_docs(200)))
+    elapsed = time.perf_counter() - started
+
+    assert sorted(clients.upserted, key=int) == [str(i) for i in range(200)]
+    assert len(recorded) == 200
+    assert stats.documents == 200 and stats.tokens == 2000 and stats.requests == 20
+    assert clients.max_in_flight == 4
+    assert elapsed < 20 * 0.05 * 0.6  # well under the sequential time
+
+
+def test_failing_batch_is_split_and_reported():
+    clients = FakeClients(poison="doc 7")
+    pipeline = IngestPipeline(clients.embed, clients.upsert, concurrency=2, batch_tokens=100,
+                              batch_documents=10, max_retries=0)
+    stats = asyncio.run(pipeline.run(_docs(30)))
+    assert stats.failed_ids == ["t.json:7"]
+    assert sorted(clients.upserted, key=int) == [str(i) for i in range(30) if i != 7]
+
+
+def test_failing_upsert_callback_stops_the_run():
+    clients = FakeClients(delay=0.01)
+    recorded = []
+
+    def on_upserted(batch):
+        if len(recorded) >= 20:
+            raise OSError("No space left on device")
+        recorded.extend(batch)
+
+    pipeline = IngestPipeline(clients.embed, clients.upsert, concurrency=2, batch_tokens=100,
+                              batch_documents=10, upsert_workers=1, on_upserted=on_upserted)
+
+    async def run():
+        await asyncio.wait_for(pipeline.run(_docs(1000)), timeout=5)
+
+    try:
+        asyncio.run(run())
+        raise AssertionError("expected OSError")
+    except OSError as e:
+        assert "No space" in str(e)
+    # The run stopped early instead of embedding the rest of the corpus
+    assert len(recorded) == 20 and len(clients.upserted) < 200
+
+
+def test_rate_limiter_throttles_to_budget():
+    async def run():
+        limiter = TokenRateLimiter(tokens_per_minute=60_000)  # 1000 tokens/s, 60k burst
+        started = time.perf_counter()
+        await limiter.acquire(60_000)  # the full bucket: no wait
+        burst = time.perf_counter() - started
+        await limiter.acquire(200)  # has to wait for the refill
+        return burst, time.perf_counter() - started, limiter.waited_seconds
+
+    burst, elapsed, waited = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.15 < waited < 0.25 and elapsed >= 0.15
+    asyncio.run(TokenRateLimiter(0).acquire(10**9))  # 0 disables throttling
+
+
+if __name__ == "__main__":
+    test_token_batches_respect_budgets()
+    test_pipeline_runs_batches_concurrently()
+    test_failing_batch_is_split_and_reported()
+    test_failing_upsert_callback_stops_the_run()
+    test_rate_limiter_throttles_to_budget()
+    print("✅ Ingestion pipeline tests passed")
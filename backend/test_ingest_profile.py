@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the ingestion profiling helpers used by `ingest_content.py --dry-run`.
+Runs offline.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.ingest_pipeline import IngestPipeline
+from backend.ingest_profile import (
+    StageTimer,
+    StubEmbeddings,
+    StubIndex,
+    TokenStats,
+    estimate_embedding,
+    histogram,
+    token_table,
+)
+
+
+def test_stage_timer_separates_nested_stages():
+    timer = StageTimer()
+
+    def parse():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    def chunk(items):
+        for item in items:
+            time.sleep(0.02)
+            yield item
+            yield item
+
+    assert list(timer.iterate("chunk", chunk(timer.iterate("parse", parse())))) == [0, 0, 1, 1, 2, 2]
+    assert timer.items["parse"] == 3 and timer.items["chunk"] == 6
+    assert timer.seconds["chunk"] > timer.seconds["parse"] >= 0.03
+
+    lines = timer.report(["parse", "chunk", "embed"], exclusive={"chunk": "parse"}).splitlines()
+    chunk_seconds = float(lines[2].split()[1])
+    assert 0.05 <= chunk_seconds < timer.seconds["chunk"]
+    assert lines[3].split() == ["embed", "0.000", "0", "-"]
+
+
+def test_token_statistics_and_estimates():
+    stats = {"a.json": TokenStats(documents=[900, 10], units=list(range(1, 101))), "b.xml": TokenStats()}
+    summary = stats["a.json"].summary()
+    assert summary["units"] == 100 and summary["tokens"] == 5050
+    assert summary["p50"] == 50.5 and summary["max"] == 100 and summary["max_document"] == 900
+    table = token_table(stats).splitlines()
+    assert table[1].split()[:4] == ["a.json", "2", "100", "5050"]
+    assert table[2].split()[:3] == ["b.xml", "0", "0"]
+
+    bars = histogram([10, 70, 70, 5000], bounds=(64, 128)).splitlines()
+    assert [line.split()[:2] for line in bars] == [["0-63", "1"], ["64-127", "2"], [">=128", "1"]]
+
+    assert estimate_embedding(2_000_000, 500_000, 0.10) == (
+        "2,000,000 tokens: $0.20 at $0.10/1M tokens, at least 4.0 min at 500,000 tokens/min"
+    )
+    assert estimate_embedding(10, 0, 0.10).endswith("no rate limit configured")
+
+
+def test_stubs_drive_the_pipeline():
+    docs = [
+        SimpleNamespace(page_content=f"doc {i}", metadata={"source": "t.json", "item_index": str(i), "token_count": 5})
+        for i in range(25)
+    ]
+    timer = StageTimer()
+    index = StubIndex()
+    pipeline = IngestPipeline(
+        embed=timer.wrap("embed", StubEmbeddings(dim=8).embed_documents),
+        upsert=timer.wrap("upsert", lambda batch, vectors: index.upsert(list(zip(batch, vectors)))),
+        batch_documents=10,
+    )
+    stats = asyncio.run(pipeline.run(docs))
+    assert stats.documents == 25 and stats.requests == 3
+    assert index.vectors == 25 and timer.items["embed"] == timer.items["upsert"] == 25
+
+
+if __name__ == "__main__":
+    test_stage_timer_separates_nested_stages()
+    test_token_statistics_and_estimates()
+    test_stubs_drive_the_pipeline()
+    print("✅ Ingestion profiling tests passed")
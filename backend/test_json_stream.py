@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test incremental JSON parsing of content files against json.load.
+Runs offline.
+"""
+
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.json_stream import _JSONReader, iter_json_array, json_root_type, read_json_object
+
+CONTENT_DIR = Path(__file__).resolve().parents[1] / "content"
+
+
+def _write(tmp, name, data):
+    path = Path(tmp) / name
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def test_items_match_json_load_with_tiny_buffers():
+    samples = [
+        '[1, 23, 456, -7.5e3, true, null, "x\\"y", {"a": [1, {}]}]',
+        '{"a": [], "b": {}, "c": "نص عربي", "d": [[1], [2, 3]]}',
+        "[]",
+    ]
+    for text in samples:
+        for chunk in (1, 3, 64):
+            reader = _JSONReader(io.StringIO(text), chunk)
+            if reader.peek() == "[":
+                got = list(reader.array_items())
+            else:
+                got = {key: reader.value() for key in reader.object_keys()}
+            assert got == json.loads(text), (text, chunk)
+
+
+def test_content_files_stream_like_json_load():
+    qa = CONTENT_DIR / "knowledge-propagation.json"
+    assert json_root_type(qa) == "array"
+    assert list(iter_json_array(qa)) == json.loads(qa.read_text(encoding="utf-8"))
+
+    hadith = CONTENT_DIR / "ahadith.json"
+    data = json.loads(hadith.read_text(encoding="utf-8"))
+    header = read_json_object(hadith, skip=["hadiths"])
+    assert header["hadiths"] is None
+    assert header["metadata"] == data["metadata"]
+    assert list(iter_json_array(hadith, key="hadiths")) == data["hadiths"]
+
+
+def test_streamed_array_may_precede_other_members():
+    data = {"hadiths": [{"id": i} for i in range(5)], "metadata": {"english": {"title": "T"}}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "c.json", data)
+        assert read_json_object(path, skip=["hadiths"])["metadata"] == data["metadata"]
+        assert list(iter_json_array(path, key="hadiths")) == data["hadiths"]
+        assert list(iter_json_array(path, key="missing")) == []
+
+
+def test_truncated_file_raises():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bad.json"
+        path.write_text('[{"question": "q", "answer": "a"}, {"question": ', encoding="utf-8")
+        items = iter_json_array(path)
+        assert next(items)["answer"] == "a"
+        try:
+            next(items)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("truncated JSON should raise")
+
+
+if __name__ == "__main__":
+    test_items_match_json_load_with_tiny_buffers()
+    test_content_files_stream_like_json_load()
+    test_streamed_array_may_precede_other_members()
+    test_truncated_file_raises()
+    print("✅ JSON stream tests passed")
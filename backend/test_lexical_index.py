@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test BM25 lexical search and reciprocal-rank fusion used by hybrid retrieval.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.filters import normalize_filters
+from backend.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "qa:1": "Question: How is the witr prayer performed?\n\nAnswer: Witr is prayed after ʿIshāʾ.",
+    "qa:2": "Question: What is ṣalāt al-istikhāra?\n\nAnswer: Istikhara is a prayer for guidance.",
+    "qa:3": "Question: Is the mahr obligatory?\n\nAnswer: The mahr is the bride's right.",
+    "qa:4": "Question: What breaks the fast?\n\nAnswer: Eating and drinking deliberately.",
+}
+
+
+def _index() -> BM25Index:
+    return BM25Index.build(list(DOCS), list(DOCS.values()))
+
+
+def test_tokenize_folds_diacritics_and_stopwords():
+    assert tokenize("The ṣalāt al-Istikhāra") == ["salat", "al", "istikhara"]
+
+
+def test_transliterated_term_ranks_first():
+    index = _index()
+    assert index.ids[index.search("istikhara", k=1)[0][0]] == "qa:2"
+    assert index.ids[index.search("how to pray witr", k=1)[0][0]] == "qa:1"
+    assert index.search("zzzz unknown", k=3) == []
+
+
+def test_save_load_round_trip():
+    index = _index()
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(Path(tmp))
+        loaded = BM25Index.load(Path(tmp))
+    assert loaded.search("mahr", k=2) == index.search("mahr", k=2)
+
+
+def test_metadata_filter_restricts_postings():
+    metadata = [{"type": "qa", "source": f"{doc_id}.json"} for doc_id in DOCS]
+    index = BM25Index.build(list(DOCS), list(DOCS.values()), metadata=metadata)
+    rows = index.filter_index.rows(normalize_filters({"source": ["qa:2.json", "qa:3.json"]}))
+
+    assert [index.ids[r] for r, _ in index.search("prayer", k=5, rows=rows)] == ["qa:2"]
+    assert index.search("witr", k=5, rows=rows) == []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(Path(tmp))
+        loaded = BM25Index.load(Path(tmp))
+    assert loaded.search("prayer", k=5, rows=loaded.filter_index.rows(normalize_filters({"source": "qa:2.json"})))
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert fused[0][0] == "b"
+    assert [doc for doc, _ in fused] == ["b", "a", "d", "c"]
+
+
+if __name__ == "__main__":
+    test_tokenize_folds_diacritics_and_stopwords()
+    test_transliterated_term_ranks_first()
+    test_save_load_round_trip()
+    test_metadata_filter_restricts_postings()
+    test_reciprocal_rank_fusion_rewards_agreement()
+    print("✅ Lexical index tests passed")
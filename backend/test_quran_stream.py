@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test incremental quran.xml parsing and verse windows.
+Runs offline against content/quran.xml.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.quran_stream import iter_ayat, verse_windows
+from backend.references import Ayah
+
+QURAN_XML = Path(__file__).resolve().parents[1] / "content" / "quran.xml"
+
+
+def _refs(windows):
+    return [[(a.surah, a.ayah) for a in window] for window in windows]
+
+
+def test_iter_ayat_streams_the_whole_file():
+    ayat = list(iter_ayat(QURAN_XML))
+    assert len(ayat) == 6236
+    assert (ayat[0].surah, ayat[0].ayah) == (1, 1)
+    assert ayat[0].translation.startswith("In the Name of Allah")
+    assert (ayat[-1].surah, ayat[-1].ayah) == (114, 6)
+    assert len({a.surah for a in ayat}) == 114
+
+
+def test_iter_ayat_small_file():
+    xml = (
+        '<quran><sura index="1" name="x">'
+        '<aya index="1" text="a1"><translation> one </translation></aya>'
+        '<aya index="2" text="a2"/></sura>'
+        '<sura index="2" name="y"><aya index="1" text="b1"><translation>b</translation></aya></sura></quran>'
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "quran.xml"
+        path.write_text(xml, encoding="utf-8")
+        assert list(iter_ayat(path)) == [Ayah(1, 1, "a1", "one"), Ayah(1, 2, "a2", ""), Ayah(2, 1, "b1", "b")]
+
+
+def test_windows_stay_within_surah_and_cover_every_aya():
+    ayat = [Ayah(1, i, "", "") for i in range(1, 8)] + [Ayah(2, i, "", "") for i in range(1, 3)] + [Ayah(3, 1, "", "")]
+    windows = _refs(verse_windows(ayat, size=3, stride=2))
+    assert windows == [
+        [(1, 1), (1, 2), (1, 3)],
+        [(1, 3), (1, 4), (1, 5)],
+        [(1, 5), (1, 6), (1, 7)],
+        # Short surah: one window; single-aya surah: none
+        [(2, 1), (2, 2)],
+    ]
+    # An uneven end is covered by a window aligned to the last aya
+    windows = _refs(verse_windows(ayat[:6], size=3, stride=2))
+    assert windows[-1] == [(1, 4), (1, 5), (1, 6)]
+
+
+if __name__ == "__main__":
+    test_iter_ayat_streams_the_whole_file()
+    test_iter_ayat_small_file()
+    test_windows_stay_within_surah_and_cover_every_aya()
+    print("✅ Qur'an stream tests passed")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test the exact-reference fast path against the bundled content/ files.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.references import ReferenceIndex
+
+INDEX = ReferenceIndex.build(Path(__file__).resolve().parents[1] / "content")
+
+
+def test_quran_reference_forms():
+    for query in ("Q 2:255", "what does Q 2:255 say?", "surah baqarah verse 255", "سورة البقرة ٢٥٥"):
+        answer = INDEX.lookup(query)
+        assert answer is not None, query
+        assert [c.ref for c in answer.citations] == ["2:255"]
+        assert answer.confidence == 1.0
+
+
+def test_quran_range_is_capped_and_validated():
+    answer = INDEX.lookup("2:1-50")
+    assert len(answer.citations) == 10
+    assert INDEX.lookup("Q 1:99") is None
+
+
+def test_hadith_reference():
+    answer = INDEX.lookup("Nawawi 40 hadith 13")
+    assert answer.citations[0].type == "hadith"
+    assert answer.citations[0].ref == "Nawawi 40, hadith 13"
+    # Collections we do not ship fall through to the RAG pipeline
+    assert INDEX.lookup("Bukhari 1/2") is None
+
+
+def test_questions_about_a_reference_are_not_intercepted():
+    assert INDEX.lookup("explain Q 2:255 in the context of tawhid") is None
+    assert INDEX.lookup("how to pray witr") is None
+
+
+if __name__ == "__main__":
+    test_quran_reference_forms()
+    test_quran_range_is_capped_and_validated()
+    test_hadith_reference()
+    test_questions_about_a_reference_are_not_intercepted()
+    print("✅ Reference fast path tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the precomputed related-items graph against brute-force search.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from backend.related_index import RelatedIndex, exact_knn
+from backend.vector_index import LocalVectorIndex
+
+
+def _index(n=300, dim=32, dtype="float32") -> LocalVectorIndex:
+    rng = np.random.default_rng(3)
+    return LocalVectorIndex.from_embeddings(
+        rng.normal(size=(n, dim)),
+        ids=[f"doc:{i}" for i in range(n)],
+        texts=[f"text {i}" for i in range(n)],
+        metadata=[{"type": "hadith", "i": i} for i in range(n)],
+        dtype=dtype,
+    )
+
+
+def test_exact_graph_matches_brute_force():
+    for dtype in ("float32", "float16"):
+        index = _index(dtype=dtype)
+        neighbours, scores = exact_knn(index.vectors, 5)
+        assert neighbours.shape == (len(index), 5)
+        for row in (0, 17, 299):
+            expected = [r for r, _ in index.search(index.vectors[row], 6) if r != row][:5]
+            assert neighbours[row].tolist() == expected
+            assert np.all(np.diff(scores[row]) <= 0)
+        assert not np.any(neighbours == np.arange(len(index))[:, None])
+
+
+def test_related_round_trip_and_lookup():
+    index = _index()
+    graph = RelatedIndex.build(index, k=8)
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(Path(tmp))
+        graph.save(Path(tmp))
+        loaded = RelatedIndex.load(Path(tmp))
+
+    assert loaded.k == 8
+    related = loaded.related("doc:17", k=3)
+    assert [r["id"] for r in related] == [f"doc:{r}" for r in graph.neighbours[17, :3]]
+    assert related[0]["metadata"]["type"] == "hadith"
+    assert related[0]["score"] >= related[-1]["score"]
+    assert len(loaded.related("doc:17")) == 8
+    assert loaded.related("missing") is None
+
+
+def test_tiny_corpus():
+    graph = RelatedIndex.build(_index(n=1), k=5)
+    assert graph.k == 0
+    assert graph.related("doc:0") == []
+
+
+if __name__ == "__main__":
+    test_exact_graph_matches_brute_force()
+    test_related_round_trip_and_lookup()
+    test_tiny_corpus()
+    print("✅ Related-items graph tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test batched retrieval against the local backend with a fake embedding model.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "test-not-used")
+
+import numpy as np
+
+from backend.embedding_cache import CachedEmbeddings, EmbeddingCache
+from backend.retrieval import RetrievalEngine
+from backend.vector_index import LocalVectorIndex
+
+TOPICS = ["witr", "zakat", "hajj", "fasting"]
+
+
+class FakeEmbeddings:
+    """One-hot embedding per topic word; counts API requests."""
+
+    model = "fake"
+
+    def __init__(self):
+        self.requests = 0
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        self.requests += 1
+        return [[float(topic in text) for topic in TOPICS] for text in texts]
+
+
+def _engine(model: FakeEmbeddings) -> RetrievalEngine:
+    engine = RetrievalEngine()
+    engine.backend = "local"
+    engine._local_index = LocalVectorIndex.from_embeddings(
+        np.eye(len(TOPICS)), [f"doc:{t}" for t in TOPICS], [f"About {t}" for t in TOPICS]
+    )
+    engine._embeddings = CachedEmbeddings(model, EmbeddingCache(max_entries=16))
+    engine._ready = True
+    return engine
+
+
+def test_batch_embeds_once_and_keeps_query_order():
+    model = FakeEmbeddings()
+    engine = _engine(model)
+    queries = ["how to pray witr", "hajj rites", "zakat on gold", "hajj rites"]
+
+    async def run():
+        try:
+            results = await engine.retrieve_batch(queries, k=1, max_concurrency=2)
+            # Batch results land in the query-embedding cache for single lookups
+            single = await engine.retrieve("zakat on gold", k=1)
+            return results, single
+        finally:
+            await engine.stop()
+
+    results, single = asyncio.run(run())
+    assert model.requests == 1
+    assert [r.ids for r in results] == [["doc:witr"], ["doc:hajj"], ["doc:zakat"], ["doc:hajj"]]
+    assert all(r.max_similarity > 0.99 for r in results)
+    assert single.ids == ["doc:zakat"]
+
+
+if __name__ == "__main__":
+    test_batch_embeds_once_and_keeps_query_order()
+    print("✅ Batched retrieval tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test that blocking vector-store calls run off the event loop and that no
+more than RETRIEVAL_MAX_CONCURRENCY searches are in flight at once.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "test-not-used")
+
+from backend.embedding_cache import CachedEmbeddings, EmbeddingCache
+from backend.retrieval import RetrievalEngine, get_settings
+
+
+class FakeEmbeddings:
+    model = "fake"
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+class BlockingVectorStore:
+    """Pinecone store stand-in whose searches block until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def similarity_search_by_vector_with_score(self, embedding, k, filter=None):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            self.release.wait(timeout=5)
+        finally:
+            with self.lock:
+                self.active -= 1
+        doc = SimpleNamespace(page_content="text", metadata={"source": "a.json", "hadith_id": 1})
+        return [(doc, 0.9)]
+
+
+def _engine(store: BlockingVectorStore, max_concurrency: int) -> RetrievalEngine:
+    settings = get_settings().model_copy(
+        update={"RETRIEVAL_MAX_CONCURRENCY": max_concurrency, "RETRIEVAL_MAX_WORKERS": 8}
+    )
+    engine = RetrievalEngine(settings)
+    engine.backend = "pinecone"
+    engine._vector_store = store
+    engine._embeddings = CachedEmbeddings(FakeEmbeddings(), EmbeddingCache(max_entries=16))
+    engine._ready = True
+    return engine
+
+
+def test_blocking_searches_are_capped_and_keep_the_loop_responsive():
+    store = BlockingVectorStore()
+    engine = _engine(store, max_concurrency=2)
+
+    async def run():
+        single = [asyncio.ensure_future(engine.retrieve(f"question {i}", k=1)) for i in range(4)]
+        batch = asyncio.ensure_future(engine.retrieve_batch(["a", "b", "c"], k=1, max_concurrency=3))
+
+        # While every slot is taken by a blocked search the loop still ticks
+        ticks, worst_lag, in_flight = 0, 0.0, []
+        while ticks < 20:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst_lag = max(worst_lag, time.perf_counter() - started - 0.01)
+            in_flight.append(engine.in_flight)
+            ticks += 1
+        assert store.active == 2 and store.calls == 2
+        assert max(in_flight) == 2 and worst_lag < 0.1
+
+        store.release.set()
+        results = await asyncio.wait_for(asyncio.gather(*single, batch), timeout=5)
+        await engine.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert store.peak == 2 and store.calls == 7 and engine.in_flight == 0
+    assert [r.ids for r in results[:4]] == [["a.json:1"]] * 4
+    assert [r.ids for r in results[4]] == [["a.json:1"]] * 3
+
+
+if __name__ == "__main__":
+    test_blocking_searches_are_capped_and_keep_the_loop_responsive()
+    print("✅ Retrieval concurrency tests passed")
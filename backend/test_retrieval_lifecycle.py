@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test the retrieval engine lifecycle (start / stop / health), the background
+stats refresh and the `/health` readiness endpoint against a fake backend.
+Runs offline: no OpenAI or Pinecone keys needed.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "test-not-used")
+
+from fastapi.testclient import TestClient
+
+import backend.embedding_cache as embedding_cache
+import backend.retrieval as retrieval
+from backend.embedding_cache import EmbeddingCache
+from backend.retrieval import RetrievalEngine
+
+# Keep health() from opening the configured on-disk embedding cache
+embedding_cache._embedding_cache = EmbeddingCache(max_entries=4)
+
+
+class FakeBackend:
+    """Stands in for the Pinecone connection: counts connects and stats calls."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.connects = 0
+        self.stats_calls = 0
+
+    def connect(self, engine: RetrievalEngine) -> None:
+        self.connects += 1
+        if self.fail:
+            raise RuntimeError("index not reachable")
+        self.update_stats(engine)
+
+    def update_stats(self, engine: RetrievalEngine) -> None:
+        self.stats_calls += 1
+        engine._stats = {"total_vector_count": 100 + self.stats_calls}
+        engine._stats_updated_at = float(self.stats_calls)
+
+
+def _engine(fake: FakeBackend, refresh_seconds: float = 0, retry_seconds: float = 60) -> RetrievalEngine:
+    settings = retrieval.get_settings().model_copy(
+        update={
+            "RETRIEVAL_BACKEND": "pinecone",
+            "RETRIEVAL_STATS_REFRESH_SECONDS": refresh_seconds,
+            "RETRIEVAL_RETRY_SECONDS": retry_seconds,
+            "RETRIEVAL_RETRY_MAX_SECONDS": retry_seconds * 4,
+        }
+    )
+    engine = RetrievalEngine(settings)
+    engine._connect = lambda: fake.connect(engine)
+    engine._update_stats = lambda: fake.update_stats(engine)
+    return engine
+
+
+def test_start_stop_and_stats_refresh():
+    fake = FakeBackend(fail=True)
+    engine = _engine(fake, refresh_seconds=0.01, retry_seconds=0.01)
+
+    async def run():
+        # A failed start reports the error and is retried in the background
+        await engine.start()
+        assert not engine.ready and engine._refresh_task is None
+        health = engine.health()
+        assert health["status"] == "unavailable" and health["error"] == "index not reachable"
+        await asyncio.sleep(0.05)
+        assert fake.connects >= 3 and not engine.ready
+
+        fake.fail = False
+        await asyncio.wait_for(engine._retry_task, timeout=1)
+        connects = fake.connects
+        assert engine.ready and engine.health()["status"] == "ready"
+        assert engine.health()["error"] is None
+        task = engine._refresh_task
+        assert task is not None and not task.done()
+
+        # Starting again is a no-op; the refresher keeps the stats current
+        await engine.start()
+        assert fake.connects == connects and engine._refresh_task is task
+        await asyncio.sleep(0.1)
+        assert fake.stats_calls >= 3
+        assert engine.health()["vector_count"] == 100 + fake.stats_calls
+
+        await engine.stop()
+        assert task.cancelled() and engine._refresh_task is None
+        assert not engine.ready and engine._executor is None
+        calls = fake.stats_calls
+        await asyncio.sleep(0.05)
+        assert fake.stats_calls == calls
+
+    asyncio.run(run())
+
+
+def test_requests_retry_a_failed_start_after_backoff():
+    fake = FakeBackend(fail=True)
+    engine = _engine(fake, retry_seconds=60)
+
+    async def run():
+        await engine.start()
+        retry_task = engine._retry_task
+        assert retry_task is not None and not retry_task.done()
+
+        # Within the backoff delay requests fail fast without reconnecting
+        fake.fail = False
+        try:
+            await engine.retrieve("how to pray witr")
+            raise AssertionError("expected RuntimeError")
+        except RuntimeError as e:
+            assert "index not reachable" in str(e)
+        assert fake.connects == 1
+
+        # Once the delay has passed the next request starts the engine
+        engine._retry_at = 0.0
+        assert await engine._check_ready()
+        assert engine.ready and fake.connects == 2 and engine.health()["error"] is None
+        await asyncio.wait_for(retry_task, timeout=1)
+
+        # Consecutive failures back off exponentially up to the maximum
+        failing = _engine(FakeBackend(fail=True), retry_seconds=60)
+        delays = []
+        for _ in range(4):
+            failing._retry_at = 0.0
+            await failing.start()
+            delays.append(round(failing._retry_at - time.time()))
+        assert delays == [60, 120, 240, 240]
+        await failing.stop()
+        assert failing._retry_task is None
+        await engine.stop()
+
+    asyncio.run(run())
+
+
+def test_refresh_disabled_and_backend_disabled():
+    fake = FakeBackend()
+    engine = _engine(fake, refresh_seconds=0)
+
+    async def run():
+        await engine.start()
+        assert engine.ready and engine._refresh_task is None
+        await engine.stop()
+
+    asyncio.run(run())
+
+    disabled = _engine(fake)
+    disabled.backend = "none"
+    asyncio.run(disabled.start())
+    assert fake.connects == 1 and disabled.health()["status"] == "disabled"
+
+
+def test_health_endpoint_is_503_until_ready():
+    from backend.main import app
+
+    fake = FakeBackend()
+    engine = _engine(fake)
+    previous = retrieval._retrieval_engine
+    retrieval._retrieval_engine = engine
+    try:
+        client = TestClient(app)
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+        assert response.json()["retrieval"]["status"] == "unavailable"
+
+        asyncio.run(engine.start())
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+        assert response.json()["retrieval"]["vector_count"] == 101
+
+        asyncio.run(engine.stop())
+        assert client.get("/health").status_code == 503
+
+        # Deployments without a retrieval backend are healthy
+        retrieval._retrieval_engine = _engine(fake)
+        retrieval._retrieval_engine.backend = "none"
+        response = client.get("/health")
+        assert response.status_code == 200 and response.json()["retrieval"]["status"] == "disabled"
+    finally:
+        retrieval._retrieval_engine = previous
+
+
+if __name__ == "__main__":
+    test_start_stop_and_stats_refresh()
+    test_requests_retry_a_failed_start_after_backoff()
+    test_refresh_disabled_and_backend_disabled()
+    test_health_endpoint_is_503_until_ready()
+    print("✅ Retrieval lifecycle tests passed")
@@ -0,0 +1,11 @@
+"""Shared stand-ins for the offline tests; holds no tests itself."""
+
+from types import SimpleNamespace
+
+
+class Doc(SimpleNamespace):
+    """Stand-in for the LangChain Document built by the ingestion scripts.
+
+    ``langchain.schema`` is not needed to run the tests; the code under test
+    only reads ``page_content`` and ``metadata``.
+    """
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test Arabic-normalized full-text search over a small in-memory reference
+index.  Runs offline.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the repository root to Python path so `backend.*` imports resolve
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.references import Ayah, HadithEntry, ReferenceIndex
+from backend.text_search import TextSearchIndex, highlight, normalize_search_text, stem, terms
+
+
+def _index() -> TextSearchIndex:
+    refs = ReferenceIndex()
+    refs.surah_names[1] = ("Al-Fatihah", "الفاتحة")
+    refs.ayat[(1, 1)] = Ayah(1, 1, "بِسْمِ ٱللَّهِ ٱلرَّحْمَـٰنِ ٱلرَّحِيمِ",
+                             "In the Name of Allah, the Most Beneficent, the Most Merciful.")
+    refs.ayat[(1, 3)] = Ayah(1, 3, "ٱلرَّحْمَـٰنِ ٱلرَّحِيمِ", "The Most Beneficent, the Most Merciful.")
+    refs.ayat[(1, 5)] = Ayah(1, 5, "إِيَّاكَ نَعْبُدُ وَإِيَّاكَ نَسْتَعِينُ", "You (Alone) we worship.")
+    refs.ayat[(2, 116)] = Ayah(2, 116, "بَل لَّهُۥ مَا فِى ٱلسَّمَـٰوَٰتِ وَٱلْأَرْضِ", "To Him belongs all that is in the heavens.")
+    refs.ayat[(1, 2)] = Ayah(1, 2, "ٱلْحَمْدُ لِلَّهِ رَبِّ ٱلْعَـٰلَمِينَ", "All praise is for Allah, Lord of the worlds.")
+    refs.hadith[("nawawi40", None, 1)] = HadithEntry(
+        "nawawi40", None, 1, "Umar",
+        "Actions are according to intentions.",
+        "إِنَّمَا الْأَعْمَالُ بِالنِّيَّاتِ",
+    )
+    return TextSearchIndex.from_references(refs)
+
+
+def test_normalization_unifies_letters_and_strips_marks():
+    assert normalize_search_text("ٱلرَّحْمَـٰنِ") == "الرحمن"
+    assert normalize_search_text("عَلَىٰ الصَّلَاةِ") == "علي الصلاه"
+    assert normalize_search_text("أُمَّة") == normalize_search_text("امه")
+    assert terms("بالنيات والرحيم") == ["نيات", "رحيم"]
+
+
+def test_search_matches_unvowelled_queries():
+    index = _index()
+    total, results = index.search("الرحمن الرحيم")
+    assert total == 2
+    assert [r["ref"] for r in results] == ["1:1", "1:3"]
+
+    total, results = index.search("رحيم", kind="quran", limit=1)
+    assert total == 2 and len(results) == 1
+    assert results[0]["surah_name"] == "Al-Fatihah"
+
+    total, results = index.search("انما الاعمال بالنيات")
+    assert total == 1
+    assert results[0]["type"] == "hadith"
+    assert results[0]["ref"] == "Nawawi 40, hadith 1"
+
+    assert index.search("intentions", kind="quran") == (0, [])
+    assert index.search("رحيم زكاة") == (0, [])
+
+
+def test_name_of_allah_is_never_stemmed_to_lahu():
+    assert stem("الله") == stem("لله") == stem("بالله") == stem("والله") == stem("تالله") == "الله"
+    assert stem("اللهم") == "اللهم" and stem("له") == "له"
+    # Three letters must remain after the prefix
+    assert stem("الحق") == "الحق" and stem("الرحيم") == "رحيم"
+
+    index = _index()
+    total, results = index.search("الله", kind="quran")
+    assert total == 2 and sorted(r["ref"] for r in results) == ["1:1", "1:2"]
+    assert "<mark>لِلَّهِ</mark>" in next(r for r in results if r["ref"] == "1:2")["highlights"]["arabic"]
+    assert index.search("لله", kind="quran")[0] == 2
+    total, results = index.search("له", kind="quran")
+    assert [r["ref"] for r in results] == ["2:116"]
+
+
+def test_exact_phrase_ranks_first():
+    index = _index()
+    # Both ayat contain both words; only 1:1 contains them in this order
+    _, results = index.search("الله الرحمن")
+    assert results[0]["ref"] == "1:1"
+    _, results = index.search("most merciful")
+    assert [r["ref"] for r in results] == ["1:1", "1:3"]
+
+
+def test_highlights_wrap_original_words():
+    marked = highlight("إِيَّاكَ نَعْبُدُ <b>", terms("نعبد"))
+    assert marked == "إِيَّاكَ <mark>نَعْبُدُ</mark> &lt;b&gt;"
+
+    _, results = _index().search("merciful")
+    assert "<mark>Merciful.</mark>" in results[0]["highlights"]["english"]
+
+
+if __name__ == "__main__":
+    test_normalization_unifies_letters_and_strips_marks()
+    test_search_matches_unvowelled_queries()
+    test_name_of_allah_is_never_stemmed_to_lahu()
+    test_exact_phrase_ranks_first()
+    test_highlights_wrap_original_words()
+    print("✅ Text search tests passed")
@@ -0,0 +1,207 @@
+"""In-process vector index used as a drop-in alternative to Pinecone.
+
+The corpus is stored as one contiguous float32 (or float16) matrix of
+L2-normalised embeddings plus a parallel array of document ids, so a query is
+a single vectorised NumPy dot product followed by a partial sort.  Scores are
+therefore cosine similarities, the same scale Pinecone returns, and the
+`CONFIDENCE_THRESHOLD` logic upstream needs no changes.
+
+On disk an index is a directory::
+
+    manifest.json      model name, dimension, dtype, document count
+    vectors.npy        (n, dim) matrix, memory-mapped on load
+    ids.npy            (n,) document ids
+    documents.jsonl    one {"id", "text", "metadata"} object per row
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.filters import MetadataPostings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+
+# Rows are upcast to float32 in blocks of this size when the matrix is stored
+# as float16, since NumPy has no BLAS kernel for half precision.  Blocks that
+# stay in cache are faster (512 rows: 49 ms vs 16384 rows: 88 ms for 20k x 1536).
+_SCORE_BLOCK_ROWS = 512
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return *vectors* scaled to unit L2 norm (zero rows are left as-is)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def dot_rows(vectors: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """``vectors @ q`` as float32, upcasting half-precision rows block by block."""
+    if vectors.dtype == np.float32:
+        return vectors @ q
+
+    out = np.empty(vectors.shape[0], dtype=np.float32)
+    for start in range(0, vectors.shape[0], _SCORE_BLOCK_ROWS):
+        block = vectors[start:start + _SCORE_BLOCK_ROWS]
+        out[start:start + len(block)] = block.astype(np.float32) @ q
+    # Half-precision rounding can push a perfect match slightly past 1.
+    return np.clip(out, -1.0, 1.0, out=out)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* highest *scores*, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class LocalVectorIndex:
+    """Exact (brute-force) cosine-similarity index over a NumPy matrix."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+        model: str = "",
+    ):
+        """Wrap an already-built matrix.
+
+        Args:
+            vectors: (n, dim) embeddings, assumed L2-normalised
+            ids: Document id per row
+            texts: Page content per row, returned by searches
+            metadata: Optional metadata dict per row
+            model: Name of the embedding model that produced *vectors*
+        """
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D matrix")
+        if not (len(ids) == len(texts) == vectors.shape[0]):
+            raise ValueError("vectors, ids and texts must have the same length")
+
+        self.vectors = vectors
+        self.ids = np.asarray(ids)
+        self.texts = list(texts)
+        self.metadata = list(metadata) if metadata is not None else [{} for _ in texts]
+        self.model = model
+        # Row ids per metadata value, for pre-filtered searches
+        self.filter_index = MetadataPostings(self.metadata)
+
+    # ------------------------------------------------------------------
+    # Construction & persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: Sequence[Sequence[float]],
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+        model: str = "",
+        dtype: str = "float32",
+    ) -> "LocalVectorIndex":
+        """Normalise raw embeddings into a contiguous matrix of *dtype*."""
+        matrix = np.ascontiguousarray(normalize_rows(np.asarray(embeddings)), dtype=np.dtype(dtype))
+        return cls(matrix, ids, texts, metadata, model=model)
+
+    def save(self, path: Path) -> None:
+        """Write the index directory at *path*."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        np.save(path / VECTORS_FILE, np.ascontiguousarray(self.vectors))
+        np.save(path / IDS_FILE, self.ids.astype(str))
+        with open(path / DOCUMENTS_FILE, "w", encoding="utf-8") as f:
+            for doc_id, text, meta in zip(self.ids.tolist(), self.texts, self.metadata):
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": meta}, ensure_ascii=False) + "\n")
+
+        manifest = {
+            "model": self.model,
+            "dim": int(self.vectors.shape[1]),
+            "dtype": str(self.vectors.dtype),
+            "count": int(self.vectors.shape[0]),
+            "created_at": time.time(),
+        }
+        with open(path / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Saved local index with {manifest['count']} vectors to {path}")
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "LocalVectorIndex":
+        """Load an index directory, memory-mapping the matrix by default."""
+        path = Path(path)
+        with open(path / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r" if mmap else None)
+        ids = np.load(path / IDS_FILE)
+
+        texts: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        with open(path / DOCUMENTS_FILE, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                texts.append(row["text"])
+                metadata.append(row.get("metadata") or {})
+
+        logger.info(f"Loaded local index from {path}: {manifest['count']} x {manifest['dim']} {manifest['dtype']}")
+        return cls(vectors, ids, texts, metadata, model=manifest.get("model", ""))
+
+    # ------------------------------------------------------------------
+    # Query path
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity between the (normalised) *query* and every row."""
+        return dot_rows(self.vectors, normalize_rows(query.reshape(1, -1))[0])
+
+    def row_scores(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarity between *query* and only the given (sorted) *rows*."""
+        q = normalize_rows(query.reshape(1, -1))[0]
+        block = self.vectors[rows]
+        scores = (block if block.dtype == np.float32 else block.astype(np.float32)) @ q
+        return np.clip(scores, -1.0, 1.0, out=scores)
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 5,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return ``(row, score)`` pairs for the *k* nearest rows, best first.
+
+        When *rows* is given (see `filter_index`) only those rows are scored.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if rows is None:
+            scores = self.scores(query)
+            return [(int(i), float(scores[i])) for i in top_k(scores, k)]
+        if len(rows) == 0:
+            return []
+        scores = self.row_scores(query, rows)
+        return [(int(rows[i]), float(scores[i])) for i in top_k(scores, k)]